@@ -14,6 +14,9 @@ from admin_bot.handlers.questions import register_questions_handlers
 from admin_bot.handlers.applications import register_applications_handlers
 from admin_bot.handlers.meetings import register_meetings_handlers
 from admin_bot.handlers.venues import register_venues_handlers
+from admin_bot.handlers.dbstats import register_dbstats_handlers
+from admin_bot.middlewares import register_admin_middlewares
+from utils.metrics import register_metrics_middlewares
 
 # Command mapping for documentation and consistency
 ADMIN_COMMANDS = {
@@ -27,13 +30,20 @@ ADMIN_COMMANDS = {
     "/help": "Show help message",
     # Superadmin commands
     "/admins": "Manage administrators (superadmin only)",
-    "/stats": "View system statistics (superadmin only)"
+    "/stats": "View system statistics (superadmin only)",
+    "/dbstats": "DB statement stats of the admin bot process, and of all processes via pg_stat_statements (superadmin only)"
 }
 
 def register_admin_handlers(dp: Dispatcher):
     """Register all admin bot handlers"""
     logger.info("Registering admin bot handlers")
     
+    # Handler latency, DB and Bot API time (served on /metrics)
+    register_metrics_middlewares(dp, "admin")
+    
+    # Non-admins are rejected before any handler runs
+    register_admin_middlewares(dp)
+    
     # Register handlers in the correct order
     register_start_handlers(dp)
     register_cities_handlers(dp)
@@ -42,5 +52,6 @@ def register_admin_handlers(dp: Dispatcher):
     register_applications_handlers(dp)
     register_meetings_handlers(dp)
     register_venues_handlers(dp)
+    register_dbstats_handlers(dp)
     
     logger.info(f"Registered {len(ADMIN_COMMANDS)} admin commands")
\ No newline at end of file
@@ -12,11 +12,15 @@ from database.db import (
     is_admin, get_application, update_application_status,
     get_user_answers, get_user, get_user_application, pool, add_meeting_member, get_meeting,
     get_city, get_pending_applications_by_city, get_pending_applications_by_timeslot, get_available_dates_by_city_and_timeslot,
-    get_active_cities, update_user, init_db, get_pool, get_compatible_users_for_meeting, create_meeting
+    get_active_cities, update_user, init_db, get_pool, get_compatible_users_for_meeting, create_meeting,
+    get_pending_applications_page, count_pending_applications_by_city
 )
+from database.cache import reference_cache
 from config import MAX_MEETING_SIZE
 from services.notification_service import NotificationService
 from admin_bot.states import ApplicationReviewStates, MeetingManagementStates
+from admin_bot.pagination import add_page_buttons, parse_page_callback
+from utils.helpers import format_occupancy_dots
 
 # Create router
 router = Router()
@@ -65,6 +69,32 @@ async def select_city_for_applications(callback: CallbackQuery, state: FSMContex
     )
     await callback.answer()
 
+def _application_button_text(app):
+    parts = []
+    if app.get('created_at'):
+        parts.append(app['created_at'].strftime('%d.%m.%Y'))
+    if app.get('note'):
+        parts.append(f"[{app['note'][:20]}]")
+    parts.append(f"{app['user_name']} {app['user_surname']} - {app['city_name']} {app['day_of_week']} {app['time'].strftime('%H:%M')}")
+    return ' | '.join(parts)
+
+async def _oldest_applications_page(city_id, **cursor):
+    """Текст и клавиатура одной страницы заявок по старшинству (None, если заявок нет)"""
+    applications, has_prev, has_next = await get_pending_applications_page(city_id, **cursor)
+    if not applications:
+        return None
+    builder = InlineKeyboardBuilder()
+    for app in applications:
+        builder.add(InlineKeyboardButton(
+            text=_application_button_text(app),
+            callback_data=f"review_app_{app['id']}"
+        ))
+    builder.adjust(1)
+    add_page_buttons(builder, "apps_page", applications, has_prev, has_next)
+    total = await count_pending_applications_by_city(city_id)
+    text = f"Всего {total} необработанных заявок в выбранном городе. Выберите для просмотра:"
+    return text, builder.as_markup()
+
 # Обработчик для просмотра по старшинству
 @router.message(F.text == "По старшинству")
 async def applications_by_oldest(message: Message, state: FSMContext):
@@ -75,32 +105,30 @@ async def applications_by_oldest(message: Message, state: FSMContext):
     if not city_id:
         await message.answer("Сначала выберите город через /applications.")
         return
-    applications = await get_pending_applications_by_city(city_id)
-    if not applications:
+    page = await _oldest_applications_page(city_id)
+    if not page:
         await message.answer("Нет необработанных заявок в этом городе.")
         return
-    applications = sorted(applications, key=lambda x: x['created_at'])
-    builder = InlineKeyboardBuilder()
-    for app in applications:
-        # Формируем текст кнопки
-        parts = []
-        if app.get('created_at'):
-            parts.append(app['created_at'].strftime('%d.%m.%Y'))
-        if app.get('note'):
-            parts.append(f"[{app['note'][:20]}]")
-        parts.append(f"{app['user_name']} {app['user_surname']} - {app['city_name']} {app['day_of_week']} {app['time'].strftime('%H:%M')}")
-        btn_text = ' | '.join(parts)
-        builder.add(InlineKeyboardButton(
-            text=btn_text,
-            callback_data=f"review_app_{app['id']}"
-        ))
-    builder.adjust(1)
-    await message.answer(
-        f"Всего {len(applications)} необработанных заявок в выбранном городе. Выберите для просмотра:",
-        reply_markup=builder.as_markup()
-    )
+    text, markup = page
+    await message.answer(text, reply_markup=markup)
     await state.set_state(ApplicationReviewStates.select_application)
 
+# Листание списка заявок по старшинству
+@router.callback_query(ApplicationReviewStates.select_application, F.data.startswith("apps_page_"))
+async def applications_by_oldest_page(callback: CallbackQuery, state: FSMContext):
+    data = await state.get_data()
+    city_id = data.get('city_id')
+    if not city_id:
+        await callback.answer("Сначала выберите город через /applications.", show_alert=True)
+        return
+    page = await _oldest_applications_page(city_id, **parse_page_callback(callback.data))
+    if not page:
+        await callback.message.edit_text("Нет необработанных заявок в этом городе.")
+        return
+    text, markup = page
+    await callback.message.edit_text(text, reply_markup=markup)
+    await callback.answer()
+
 # Обработчик для просмотра по временному слоту
 @router.message(F.text == "По временному слоту")
 async def applications_by_timeslot(message: Message, state: FSMContext):
@@ -330,8 +358,7 @@ async def show_meetings_for_adding(callback: CallbackQuery, state: FSMContext):
     # Получаем встречи в этом городе с нужным time_slot_id
     async with pool.acquire() as conn:
         meetings = await conn.fetch('''
-            SELECT m.id, m.name, m.meeting_date, m.meeting_time,
-                   (SELECT COUNT(*) FROM meeting_members WHERE meeting_id = m.id) as member_count
+            SELECT m.id, m.name, m.meeting_date, m.meeting_time, m.member_count
             FROM meetings m
             JOIN meeting_time_slots mts ON m.id = mts.meeting_id
             WHERE m.city_id = $1 AND m.status = 'planned' AND mts.time_slot_id = $2
@@ -346,11 +373,7 @@ async def show_meetings_for_adding(callback: CallbackQuery, state: FSMContext):
     for meeting in meetings:
         if meeting['id'] in user_meeting_ids:
             continue  # Не показываем встречи, где пользователь уже состоит
-        member_count = meeting['member_count']
-        if member_count <= MAX_MEETING_SIZE:
-            dots = '🔴' * member_count + '🟢' * (MAX_MEETING_SIZE - member_count)
-        else:
-            dots = '🔴' * MAX_MEETING_SIZE + f'+{member_count - MAX_MEETING_SIZE}'
+        dots = format_occupancy_dots(meeting['member_count'])
         name = meeting['name']
         if len(name) > 10:
             name = name[:10] + '...'
@@ -921,6 +944,7 @@ async def confirm_create_meeting(callback: CallbackQuery, state: FSMContext):
                     RETURNING id
                 ''', data['venue_name'], data.get('venue_address', ''), data['city_id'])
                 venue_id = venue_result['id']
+                reference_cache.invalidate('venues')
             meeting_result = await conn.fetchrow('''
                 INSERT INTO meetings (
                     name, city_id, meeting_date, meeting_time, 
@@ -0,0 +1,56 @@
+from aiogram import Router
+from aiogram.filters import Command, CommandObject
+from aiogram.types import Message
+
+from config import DB_QUERY_STATS_TOP
+from database.db import is_superadmin, get_statement_stats
+from database.tracing import format_query_stats, normalize_sql, query_stats
+
+# Create router
+router = Router()
+
+# Telegram rejects messages longer than 4096 characters
+MAX_MESSAGE_LENGTH = 4096
+STATEMENT_WIDTH = 120
+
+def _format_server_stats(rows):
+    if not rows:
+        return (
+            "All processes: pg_stat_statements is not available "
+            "(add it to shared_preload_libraries and CREATE EXTENSION pg_stat_statements)."
+        )
+    lines = [f"All processes, top {len(rows)} statements by total time (pg_stat_statements):"]
+    for row in rows:
+        statement = normalize_sql(row['query'])
+        if len(statement) > STATEMENT_WIDTH:
+            statement = statement[:STATEMENT_WIDTH - 1] + "…"
+        lines.append(
+            f"{row['calls']} calls, {row['total_exec_time']:.0f} ms total, "
+            f"{row['max_exec_time']:.0f} ms max: {statement}"
+        )
+    return "\n".join(lines)
+
+# Query stats (superadmins only): this admin bot process, plus the whole server if
+# pg_stat_statements is there. Other processes log their own stats on SIGUSR1.
+@router.message(Command("dbstats"))
+async def cmd_dbstats(message: Message, command: CommandObject):
+    if not await is_superadmin(message.from_user.id):
+        await message.answer("Only superadmins can use this command.")
+        return
+
+    if (command.args or "").strip().lower() == "reset":
+        query_stats.reset()
+        await message.answer("Query stats of the admin bot process reset.")
+        return
+
+    report = (
+        "Admin bot process only (user bot, notification service: kill -USR1 <pid> logs theirs).\n"
+        + format_query_stats(width=STATEMENT_WIDTH)
+        + "\n\n"
+        + _format_server_stats(await get_statement_stats(DB_QUERY_STATS_TOP))
+    )
+    await message.answer(report[:MAX_MESSAGE_LENGTH])
+
+# Function to register handlers with the dispatcher
+def register_dbstats_handlers(dp):
+    dp.include_router(router)
@@ -17,11 +17,14 @@ from database.db import (
     get_meeting_members, count_meeting_members, get_user, pool, get_venues_by_city, get_venue,
     get_available_dates, get_available_date, update_available_date, get_available_dates_with_users_count,
     get_users_by_time_preference, get_compatible_users_for_meeting, create_meeting_from_available_date,
-    get_pending_applications_by_timeslot
+    get_pending_applications_by_timeslot, create_meeting_with_members, get_meetings_page,
+    get_meetings_with_member_counts
 )
 from config import MIN_MEETING_SIZE, MAX_MEETING_SIZE
 from services.notification_service import NotificationService
 from admin_bot.states import MeetingManagementStates
+from admin_bot.pagination import add_page_buttons, parse_page_callback
+from utils.helpers import format_occupancy_dots
 
 # Create router
 router = Router()
@@ -311,27 +314,27 @@ async def process_venue_selection(callback: CallbackQuery, state: FSMContext):
         return
     meeting_name = f"{city['name']}: {venue['name']} {meeting_date.strftime('%d.%m.%Y')}"
     await state.update_data(meeting_name=meeting_name)
-        meeting_id = await create_meeting(
+    meeting_id = await create_meeting(
         name=meeting_name,
         meeting_date=meeting_date,
         meeting_time=meeting_time,
-            city_id=data['city_id'],
+        city_id=data['city_id'],
         venue=venue['name'],
         created_by=callback.from_user.id,
         venue_address=venue['address']
     )
-        keyboard = ReplyKeyboardMarkup(
-            keyboard=[
-            # ...
-            ],
-            resize_keyboard=True
-        )
+    # Участников добавляют из меню управления встречей
+    builder = InlineKeyboardBuilder()
+    builder.add(InlineKeyboardButton(
+        text="Управление встречей",
+        callback_data=f"manage_meeting_{meeting_id}"
+    ))
     await callback.message.answer(
-        f"Встреча '{meeting_name}' успешно создана!\n\nХотите добавить участников сейчас?",
-            reply_markup=keyboard
-        )
-        await state.update_data(meeting_id=meeting_id)
-        await state.set_state(MeetingManagementStates.add_members)
+        f"Встреча '{meeting_name}' успешно создана!",
+        reply_markup=builder.as_markup()
+    )
+    await state.update_data(meeting_id=meeting_id)
+    await state.set_state(MeetingManagementStates.select_meeting_to_manage)
 
 # Smart Meeting Creation handler
 @router.message(F.text == "Smart Meeting Creation")
@@ -341,7 +344,7 @@ async def smart_meeting_creation(message: Message, state: FSMContext):
         return
     
     # Clear any previous state
-        await state.clear()
+    await state.clear()
 
     # Get active cities
     cities = await get_active_cities()
@@ -389,42 +392,46 @@ async def list_meetings(message: Message, state: FSMContext):
     )
     await state.clear()
 
-# Callback-обработчик выбора города для просмотра встреч
-@router.callback_query(F.data.startswith("list_meetings_city_"))
-async def list_meetings_for_city(callback: CallbackQuery, state: FSMContext):
-    city_id = int(callback.data.split("_")[-1])
-    await state.update_data(city_id=city_id)  # Сохраняем выбранный город в FSM
-    # Получаем встречи этого города с разными статусами
-    async with pool.acquire() as conn:
-        meetings = await conn.fetch('''
-            SELECT m.*, c.name as city_name
-            FROM meetings m
-            JOIN cities c ON m.city_id = c.id
-            WHERE m.city_id = $1
-            ORDER BY m.id
-        ''', city_id)
+async def show_meetings_page(callback: CallbackQuery, state: FSMContext, city_id, **cursor):
+    """Показывает одну страницу встреч города (cursor — after_id/before_id для get_meetings_page)"""
+    meetings, has_prev, has_next = await get_meetings_page(city_id, **cursor)
     if not meetings:
         await callback.message.edit_text("В этом городе нет созданных встреч.")
         await state.clear()
         return
     builder = InlineKeyboardBuilder()
     for meeting in meetings:
-        member_count = await count_meeting_members(meeting['id'])
-        if member_count <= MAX_MEETING_SIZE:
-            dots = '🔴' * member_count + '🟢' * (MAX_MEETING_SIZE - member_count)
-        else:
-            dots = '🔴' * MAX_MEETING_SIZE + f'+{member_count - MAX_MEETING_SIZE}'
+        dots = format_occupancy_dots(meeting['member_count'])
         builder.add(InlineKeyboardButton(
             text=f"{dots} {meeting['meeting_time'].strftime('%H:%M')} {meeting['meeting_date'].strftime('%d.%m.%Y')}",
             callback_data=f"manage_meeting_{meeting['id']}"
         ))
     builder.adjust(1)
+    add_page_buttons(builder, "meetings_page", meetings, has_prev, has_next)
     await callback.message.edit_text(
         f"Список встреч в городе: {meetings[0]['city_name']}\n\nВыберите встречу для управления:",
         reply_markup=builder.as_markup()
     )
     await state.set_state(MeetingManagementStates.select_meeting_to_manage)
 
+# Callback-обработчик выбора города для просмотра встреч
+@router.callback_query(F.data.startswith("list_meetings_city_"))
+async def list_meetings_for_city(callback: CallbackQuery, state: FSMContext):
+    city_id = int(callback.data.split("_")[-1])
+    await state.update_data(city_id=city_id)  # Сохраняем выбранный город в FSM
+    await show_meetings_page(callback, state, city_id)
+
+# Листание списка встреч города
+@router.callback_query(F.data.startswith("meetings_page_"))
+async def list_meetings_page(callback: CallbackQuery, state: FSMContext):
+    data = await state.get_data()
+    city_id = data.get('city_id')
+    if not city_id:
+        await callback.answer("Не удалось определить город, откройте список встреч заново.", show_alert=True)
+        return
+    await show_meetings_page(callback, state, city_id, **parse_page_callback(callback.data))
+    await callback.answer()
+
 # === ВОССТАНОВЛЕННЫЕ ОБРАБОТЧИКИ ДЛЯ ИЗМЕНЕНИЯ ДАТЫ/ВРЕМЕНИ ===
 
 # Изменение даты встречи — показать список доступных дат
@@ -523,7 +530,7 @@ async def edit_meeting_select_timeslot(callback: CallbackQuery, state: FSMContex
     if not ts:
         logger.error(f"[ERROR] Таймслот не найден: id={time_slot_id}")
         await callback.message.edit_text("Ошибка: таймслот не найден.")
-            return
+        return
     new_time = ts['start_time']
 
     # Обновляем дату и время встречи
@@ -546,7 +553,7 @@ async def edit_meeting_select_timeslot(callback: CallbackQuery, state: FSMContex
 async def process_meeting_selection(callback: CallbackQuery, state: FSMContext, meeting_id: Optional[int] = None):
     logger.warning(f"[DEBUG] process_meeting_selection: callback.data={callback.data}")
     if meeting_id is None:
-    meeting_id = int(callback.data.split('_')[-1])
+        meeting_id = int(callback.data.split('_')[-1])
     data = await state.get_data()
     city_id = data.get('city_id')
     logger.warning(f"[DEBUG] process_meeting_selection: meeting_id={meeting_id}, city_id={city_id}")
@@ -563,18 +570,18 @@ async def process_meeting_selection(callback: CallbackQuery, state: FSMContext,
         text="Участники",
         callback_data=f"members_meeting_{meeting_id}"
     ))
-        builder.add(InlineKeyboardButton(
+    builder.add(InlineKeyboardButton(
         text="Изменить дату",
         callback_data=f"edit_meeting_date_{meeting_id}"
-        ))
-        builder.add(InlineKeyboardButton(
+    ))
+    builder.add(InlineKeyboardButton(
         text="Изменить время",
         callback_data=f"edit_meeting_time_{meeting_id}"
-        ))
-        builder.add(InlineKeyboardButton(
+    ))
+    builder.add(InlineKeyboardButton(
         text="Удалить встречу",
         callback_data=f"del_{meeting_id}"
-        ))
+    ))
     builder.add(InlineKeyboardButton(
         text="Назад к списку встреч",
         callback_data=f"list_meetings_city_{city_id}"
@@ -654,8 +661,8 @@ async def smart_meeting_date_selected(callback: CallbackQuery, state: FSMContext
         ''', date_obj, city_id)
     if not slots:
         await callback.message.edit_text("Нет таймслотов для выбранной даты.")
-            return
-            builder = InlineKeyboardBuilder()
+        return
+    builder = InlineKeyboardBuilder()
     for ts in slots:
         builder.add(InlineKeyboardButton(
             text=f"{ts['start_time'].strftime('%H:%M')}-{ts['end_time'].strftime('%H:%M')}",
@@ -664,12 +671,12 @@ async def smart_meeting_date_selected(callback: CallbackQuery, state: FSMContext
     builder.add(InlineKeyboardButton(
         text="Назад",
         callback_data=f"smart_meeting_city_{city_id}"
-        ))
+    ))
     builder.add(InlineKeyboardButton(
         text="Cancel",
         callback_data="cancel_smart_meeting"
     ))
-            builder.adjust(1)
+    builder.adjust(1)
     await callback.message.edit_text("Выберите таймслот для встречи:", reply_markup=builder.as_markup())
     await state.set_state(MeetingManagementStates.smart_meeting_timeslot)
 
@@ -683,7 +690,7 @@ async def smart_meeting_timeslot_selected(callback: CallbackQuery, state: FSMCon
         ts = await conn.fetchrow('SELECT start_time FROM time_slots WHERE id = $1', time_slot_id)
     if not ts:
         await callback.message.edit_text("Ошибка: таймслот не найден.")
-            return
+        return
     await state.update_data(meeting_time=ts['start_time'])
     data = await state.get_data()
     city_id = data['city_id']
@@ -708,8 +715,8 @@ async def smart_meeting_timeslot_selected(callback: CallbackQuery, state: FSMCon
     builder.adjust(2)
     await callback.message.edit_text(
         f"Выберите площадку для встречи:",
-                reply_markup=builder.as_markup()
-            )
+        reply_markup=builder.as_markup()
+    )
     await state.set_state(MeetingManagementStates.smart_meeting_venue)
 
 # --- Smart Meeting Creation: выбор площадки из списка или вручную ---
@@ -758,10 +765,10 @@ async def continue_smart_meeting_after_venue(msg_obj, state: FSMContext):
             JOIN time_slots ts ON ad.time_slot_id = ts.id
             WHERE ad.date = $1 AND ts.start_time = $2 AND ts.city_id = $3
         ''', meeting_date, meeting_time, city_id)
-        if not slot_row:
-            await msg_obj.answer("Не удалось определить таймслот для этой встречи.")
+    if not slot_row:
+        await msg_obj.answer("Не удалось определить таймслот для этой встречи.")
         return
-        time_slot_id = slot_row['id']
+    time_slot_id = slot_row['id']
     await state.update_data(time_slot_id=time_slot_id)
     # --- Получаем аппликантов ---
     city = await get_city(city_id)
@@ -810,7 +817,7 @@ async def smart_profile_action(callback: CallbackQuery, state: FSMContext):
     user_id = int(parts[-1]) if parts[-1].isdigit() else None
     smart_selected = data.get('smart_selected_users', [])
     if action == "view_user":
-    await show_applicant_profile(callback, 0, user_id, None, None, state)
+        await show_applicant_profile(callback, 0, user_id, None, None, state)
         return
     if action == "add_user":
         if user_id not in smart_selected:
@@ -892,37 +899,7 @@ async def back_to_meetings_city(callback: CallbackQuery, state: FSMContext):
     if not city_id:
         await callback.message.edit_text("Не удалось определить город для возврата к списку встреч.")
         return
-    # Получаем встречи этого города с разными статусами
-    async with pool.acquire() as conn:
-        meetings = await conn.fetch('''
-            SELECT m.*, c.name as city_name
-            FROM meetings m
-            JOIN cities c ON m.city_id = c.id
-            WHERE m.city_id = $1
-            ORDER BY m.id
-        ''', city_id)
-    logger.warning(f"[DEBUG] back_to_meetings_city: найдено встреч: {len(meetings)}")
-    if not meetings:
-        await callback.message.edit_text("В этом городе нет созданных встреч.")
-        await state.clear()
-        return
-    builder = InlineKeyboardBuilder()
-    for meeting in meetings:
-        member_count = await count_meeting_members(meeting['id'])
-        if member_count <= MAX_MEETING_SIZE:
-            dots = '🔴' * member_count + '🟢' * (MAX_MEETING_SIZE - member_count)
-        else:
-            dots = '🔴' * MAX_MEETING_SIZE + f'+{member_count - MAX_MEETING_SIZE}'
-        builder.add(InlineKeyboardButton(
-            text=f"{dots} {meeting['meeting_time'].strftime('%H:%M')} {meeting['meeting_date'].strftime('%d.%m.%Y')}",
-            callback_data=f"manage_meeting_{meeting['id']}"
-        ))
-    builder.adjust(1)
-    await callback.message.edit_text(
-        f"Список встреч в городе: {meetings[0]['city_name']}\n\nВыберите встречу для управления:",
-        reply_markup=builder.as_markup()
-    )
-    await state.set_state(MeetingManagementStates.select_meeting_to_manage)
+    await show_meetings_page(callback, state, city_id)
 
 @router.message(F.text == "Back to Meetings")
 async def back_to_meetings(message: Message, state: FSMContext):
@@ -971,27 +948,18 @@ async def smart_confirm_creation(callback: CallbackQuery, state: FSMContext):
     venue = data['venue']
     venue_address = data.get('venue_address', "")
     meeting_name = data['meeting_name']
-    # Создаём встречу
-    meeting_id = await create_meeting(
+    # Создаём встречу, привязку к слоту, участников и подтверждаем заявки одним запросом
+    meeting_id = await create_meeting_with_members(
         name=meeting_name,
         meeting_date=meeting_date,
         meeting_time=meeting_time,
         city_id=city_id,
         venue=venue,
+        user_ids=selected,
+        time_slot_id=data['time_slot_id'],
         created_by=callback.from_user.id,
         venue_address=venue_address
     )
-    # Добавляем участников и подтверждаем заявки
-    async with pool.acquire() as conn:
-        for user_id in selected:
-            # Если заявка была pending — одобряем
-            await conn.execute('''
-                UPDATE applications SET status = 'approved'
-                WHERE user_id = $1 AND time_slot_id = $2 AND status = 'pending'
-            ''', user_id, data['time_slot_id'])
-            await conn.execute('''
-                INSERT INTO meeting_members (meeting_id, user_id) VALUES ($1, $2)
-            ''', meeting_id, user_id)
     await callback.message.answer(f"Встреча '{meeting_name}' успешно создана и участники добавлены!")
     await state.clear()
 
@@ -1102,19 +1070,11 @@ async def move_member_select_meeting(callback: CallbackQuery, state: FSMContext)
     city_id = meeting['city_id']
     meeting_date = meeting['meeting_date']
     meeting_time = meeting['meeting_time']
-    async with pool.acquire() as conn:
-        # Ищем другие встречи этого города с тем же временем и датой, кроме текущей, и куда пользователь ещё не добавлен
-        meetings = await conn.fetch('''
-            SELECT m.id, m.name, m.meeting_date, m.meeting_time, m.venue
-            FROM meetings m
-            WHERE m.city_id = $1
-              AND m.meeting_date = $2
-              AND m.meeting_time = $3
-              AND m.id != $4
-              AND NOT EXISTS (
-                  SELECT 1 FROM meeting_members mm WHERE mm.meeting_id = m.id AND mm.user_id = $5
-              )
-        ''', city_id, meeting_date, meeting_time, from_meeting_id, user_id)
+    # Другие встречи этого города с тем же временем и датой, кроме текущей, и куда пользователь ещё не добавлен
+    meetings = await get_meetings_with_member_counts(
+        city_id, meeting_date=meeting_date, meeting_time=meeting_time,
+        exclude_meeting_id=from_meeting_id, without_user_id=user_id
+    )
     if not meetings:
         builder = InlineKeyboardBuilder()
         builder.add(InlineKeyboardButton(
@@ -1132,11 +1092,7 @@ async def move_member_select_meeting(callback: CallbackQuery, state: FSMContext)
         return
     builder = InlineKeyboardBuilder()
     for m in meetings:
-        member_count = await count_meeting_members(m['id'])
-        if member_count <= MAX_MEETING_SIZE:
-            dots = '🔴' * member_count + '🟢' * (MAX_MEETING_SIZE - member_count)
-        else:
-            dots = '🔴' * MAX_MEETING_SIZE + f'+{member_count - MAX_MEETING_SIZE}'
+        dots = format_occupancy_dots(m['member_count'])
         builder.add(InlineKeyboardButton(
             text=f"{dots} {m['meeting_time'].strftime('%H:%M')} {m['meeting_date'].strftime('%d.%m.%Y')}",
             callback_data=f"confirm_move_member_{from_meeting_id}_{m['id']}_{user_id}"
@@ -92,6 +92,7 @@ async def cmd_help(message: Message):
         help_text += (
             "\nSuperadmin Commands:\n"
             "/admins - Manage administrators\n"
+            "/dbstats - Database query stats (this bot's process; all processes if pg_stat_statements is enabled)\n"
         )
     
     await message.answer(help_text)
@@ -178,7 +178,9 @@ async def process_add_end_time(message: Message, state: FSMContext):
             return
     await state.update_data(end_time=end_time)
     try:
-        await add_timeslot(day, start_time, end_time, city_id)
+        time_slot_id = await add_timeslot(day, start_time, end_time, city_id)
+        # Сразу создаём даты только для нового слота
+        await timeslot_service.regenerate_timeslot(time_slot_id)
         keyboard = ReplyKeyboardMarkup(
             keyboard=[
                 [KeyboardButton(text="Add Time Slot")],
@@ -371,6 +373,8 @@ async def process_edit_day(message: Message, state: FSMContext):
         success = await update_timeslot(time_slot_id, day_of_week=new_day)
         
         if success:
+            # День недели изменился - пересобираем даты этого слота
+            await timeslot_service.regenerate_timeslot(time_slot_id)
             await message.answer(f"Time slot day updated to {new_day} successfully!")
         else:
             await message.answer("Failed to update time slot. Please try again.")
@@ -526,6 +530,7 @@ async def handle_confirm_delete(callback: CallbackQuery, state: FSMContext):
         success = await delete_timeslot(time_slot_id)
         
         if success:
+            await timeslot_service.regenerate_timeslot(time_slot_id)
             await callback.message.answer("Time slot has been deactivated successfully!")
         else:
             await callback.message.answer("Failed to deactivate time slot. Please try again.")
@@ -655,6 +660,7 @@ async def handle_toggle_slot(callback: CallbackQuery, state: FSMContext):
     try:
         success = await update_timeslot(time_slot_id, active=new_status)
         if success:
+            await timeslot_service.regenerate_timeslot(time_slot_id)
             status_text = "activated" if new_status else "deactivated"
             # Получаем обновлённый список таймслотов только для выбранного города
             async with pool.acquire() as conn:
@@ -0,0 +1,47 @@
+import logging
+from typing import Any, Awaitable, Callable, Dict
+
+from aiogram import BaseMiddleware
+from aiogram.types import CallbackQuery, Message, TelegramObject
+
+from database.db import is_admin
+
+logger = logging.getLogger(__name__)
+
+class AdminOnlyMiddleware(BaseMiddleware):
+    """
+    Outer middleware for the admin bot: updates from users who are not admins are
+    dropped before any handler runs. /start is let through, it registers admins from
+    ADMIN_IDS/SUPERADMIN_IDS and answers everyone else itself.
+
+    is_admin() reads the cached admins table, so this costs no query per update.
+    """
+
+    async def __call__(
+        self,
+        handler: Callable[[TelegramObject, Dict[str, Any]], Awaitable[Any]],
+        event: TelegramObject,
+        data: Dict[str, Any],
+    ) -> Any:
+        user = data.get("event_from_user")
+        if user is None or await is_admin(user.id):
+            return await handler(event, data)
+
+        if isinstance(event, Message) and event.text and event.text.split()[0].split("@")[0] == "/start":
+            return await handler(event, data)
+
+        logger.info(f"Rejected update from non-admin user {user.id}")
+        if isinstance(event, CallbackQuery):
+            await event.answer("У вас нет прав администратора.", show_alert=True)
+        elif isinstance(event, Message):
+            await event.answer(
+                "Sorry, you are not authorized to use this bot.\n"
+                "This bot is only for administrators of the 5 Chairs system."
+            )
+        return None
+
+def register_admin_middlewares(dp):
+    """Check admin rights once per update instead of in every handler"""
+    admin_only = AdminOnlyMiddleware()
+    dp.message.outer_middleware(admin_only)
+    dp.callback_query.outer_middleware(admin_only)
@@ -0,0 +1,25 @@
+from aiogram.types import InlineKeyboardButton
+from aiogram.utils.keyboard import InlineKeyboardBuilder
+
+def add_page_buttons(builder: InlineKeyboardBuilder, prefix, rows, has_prev, has_next):
+    """
+    Add a "◀️ / ▶️" row for a keyset page to the builder.
+
+    Callback data is "<prefix>_prev_<first id>" and "<prefix>_next_<last id>",
+    see parse_page_callback(). Call after builder.adjust() so the row stays on its own.
+    """
+    buttons = []
+    if rows and has_prev:
+        buttons.append(InlineKeyboardButton(text="◀️ Назад", callback_data=f"{prefix}_prev_{rows[0]['id']}"))
+    if rows and has_next:
+        buttons.append(InlineKeyboardButton(text="Вперёд ▶️", callback_data=f"{prefix}_next_{rows[-1]['id']}"))
+    if buttons:
+        builder.row(*buttons)
+    return builder
+
+def parse_page_callback(data):
+    """Turn page callback data into get_*_page() keyword arguments"""
+    direction, cursor = data.rsplit('_', 2)[-2:]
+    if direction == "prev":
+        return {"before_id": int(cursor)}
+    return {"after_id": int(cursor)}
@@ -0,0 +1,262 @@
+#!/usr/bin/env python3
+"""
+Проверка планов запросов из database/db.py на большом наборе данных.
+
+Скрипт заполняет базу синтетическими данными (внутри транзакции, которая в конце
+откатывается), вызывает горячие функции database/db.py и для каждого их запроса
+выполняет EXPLAIN. Если по одной из больших таблиц выбран Seq Scan, скрипт
+завершается с кодом 1.
+
+Запуск (схема должна быть актуальной: alembic upgrade head):
+    python check_query_plans.py [--scale 1.0]
+"""
+import argparse
+import asyncio
+import json
+import logging
+import sys
+from datetime import datetime, timedelta
+
+import asyncpg
+
+from database import db
+from database.pool_config import get_connection_kwargs
+from database.statements import STATEMENTS
+
+logging.basicConfig(
+    level=logging.INFO,
+    format="%(asctime)s - %(name)s - %(levelname)s - %(message)s",
+)
+logger = logging.getLogger(__name__)
+
+# Таблицы, которые растут вместе с числом пользователей; Seq Scan по ним считается ошибкой.
+# Маленькие справочники (cities, admins, questions, venues) сюда не входят.
+LARGE_TABLES = {
+    "users", "applications", "time_slots", "meetings", "meeting_members",
+    "meeting_time_slots", "available_dates", "notifications", "reminder_log",
+}
+
+# Синтетические пользователи получают id вне диапазона реальных Telegram id
+USER_ID_BASE = 10 ** 12
+CITY_PREFIX = "plancheck-"
+
+async def seed(conn, scale):
+    """Заполняет базу данными (в текущей транзакции)"""
+    cities = max(int(200 * scale), 10)
+    slots = min(int(8000 * scale), 10080)  # (day, start, end) уникальны: 7 дней x 1440 минут
+    users = int(100000 * scale)
+    meetings = int(20000 * scale)
+    notifications = int(100000 * scale)
+
+    logger.info(f"Seeding: {cities} cities, {slots} time slots, {users} users, {meetings} meetings")
+
+    await conn.execute('''
+        INSERT INTO cities (name, active)
+        SELECT $1 || g, true FROM generate_series(1, $2) g
+    ''', CITY_PREFIX, cities)
+
+    await conn.execute('''
+        WITH c AS MATERIALIZED (SELECT array_agg(id) AS ids FROM cities WHERE name LIKE $1 || '%')
+        INSERT INTO time_slots (day_of_week, start_time, end_time, city_id, active, created_at)
+        SELECT (ARRAY['Monday','Tuesday','Wednesday','Thursday','Friday','Saturday','Sunday'])[1 + g % 7],
+               time '00:00' + (g / 7) * interval '1 minute',
+               time '01:00' + (g / 7) * interval '1 minute',
+               c.ids[1 + g % array_length(c.ids, 1)],
+               g % 5 <> 0,
+               now()
+        FROM generate_series(0, $2 - 1) g, c
+    ''', CITY_PREFIX, slots)
+
+    await conn.execute('''
+        INSERT INTO users (id, username, name, surname, age, registration_date, status)
+        SELECT $1::bigint + g, 'user' || g, 'Name' || g, 'Surname' || g, 18 + g % 50, now(),
+               (ARRAY['registered','applied','approved','rejected'])[1 + g % 4]
+        FROM generate_series(1, $2) g
+    ''', USER_ID_BASE, users)
+
+    await conn.execute('''
+        WITH s AS MATERIALIZED (
+            SELECT array_agg(ts.id) AS ids FROM time_slots ts
+            JOIN cities c ON c.id = ts.city_id WHERE c.name LIKE $3 || '%'
+        )
+        INSERT INTO applications (user_id, time_slot_id, created_at, status)
+        SELECT $1::bigint + g, s.ids[1 + g % array_length(s.ids, 1)], now() - g * interval '1 second',
+               (ARRAY['pending','approved','rejected','assigned','completed'])[1 + g % 5]
+        FROM generate_series(1, $2) g, s
+    ''', USER_ID_BASE, users, CITY_PREFIX)
+
+    await conn.execute('''
+        WITH c AS MATERIALIZED (SELECT array_agg(id) AS ids FROM cities WHERE name LIKE $1 || '%')
+        INSERT INTO meetings (name, meeting_date, meeting_time, city_id, venue, status, created_at)
+        SELECT $1 || 'meeting-' || g, current_date + (g % 60) - 30, time '10:00' + (g % 10) * interval '1 hour',
+               c.ids[1 + g % array_length(c.ids, 1)], 'Venue ' || g,
+               (ARRAY['planned','confirmed','completed','cancelled'])[1 + g % 4], now()
+        FROM generate_series(1, $2) g, c
+    ''', CITY_PREFIX, meetings)
+
+    await conn.execute('''
+        INSERT INTO meeting_members (meeting_id, user_id, added_at)
+        SELECT m.id, $1::bigint + 1 + (m.n * 5 + k) % $2, now()
+        FROM (SELECT id, row_number() OVER (ORDER BY id) AS n FROM meetings WHERE name LIKE $3 || '%') m,
+             generate_series(0, 4) k
+        ON CONFLICT DO NOTHING
+    ''', USER_ID_BASE, users, CITY_PREFIX)
+
+    await conn.execute('''
+        WITH s AS MATERIALIZED (
+            SELECT array_agg(ts.id) AS ids FROM time_slots ts
+            JOIN cities c ON c.id = ts.city_id WHERE c.name LIKE $1 || '%'
+        )
+        INSERT INTO meeting_time_slots (meeting_id, time_slot_id, created_at)
+        SELECT m.id, s.ids[1 + m.id % array_length(s.ids, 1)], now()
+        FROM meetings m, s
+        WHERE m.name LIKE $1 || '%'
+        ON CONFLICT DO NOTHING
+    ''', CITY_PREFIX)
+
+    await conn.execute('''
+        INSERT INTO available_dates (date, time_slot_id, is_available, created_at)
+        SELECT current_date + ts.id % 7 + 7 * k, ts.id, k % 6 <> 0, now()
+        FROM time_slots ts
+        JOIN cities c ON c.id = ts.city_id
+        CROSS JOIN generate_series(0, 12) k
+        WHERE c.name LIKE $1 || '%'
+        ON CONFLICT DO NOTHING
+    ''', CITY_PREFIX)
+
+    await conn.execute('''
+        INSERT INTO notifications (user_id, text, kind, status, created_at, sent_at)
+        SELECT $1::bigint + 1 + g % $2, 'Notification ' || g, 'reminder',
+               CASE WHEN g % 100 = 0 THEN 'pending' ELSE 'sent' END, now(), now()
+        FROM generate_series(1, $3) g
+    ''', USER_ID_BASE, users, notifications)
+
+    for table in sorted(LARGE_TABLES | {"cities"}):
+        await conn.execute(f"ANALYZE {table}")
+
+class ExplainingConnection:
+    """
+    Stands in for db.pool: every query a db.py function sends is first EXPLAINed
+    on the real connection, then executed normally.
+    """
+
+    def __init__(self, conn):
+        self.conn = conn
+        self.current = None
+        self.seq_scans = []
+
+    # Pool interface used by db.py: "async with pool.acquire() as conn"
+    def acquire(self):
+        return self
+
+    async def __aenter__(self):
+        return self
+
+    async def __aexit__(self, exc_type, exc, tb):
+        return False
+
+    def transaction(self):
+        return self.conn.transaction()
+
+    def _walk(self, node, query):
+        if node.get("Node Type") == "Seq Scan" and node.get("Relation Name") in LARGE_TABLES:
+            self.seq_scans.append((self.current, node["Relation Name"], " ".join(query.split())))
+        for child in node.get("Plans", []):
+            self._walk(child, query)
+
+    async def _explain(self, query, args):
+        if query.lstrip().split(None, 1)[0].upper() not in ("SELECT", "WITH", "UPDATE", "DELETE", "INSERT"):
+            return
+        plan = json.loads(await self.conn.fetchval(f"EXPLAIN (FORMAT JSON) {query}", *args))
+        self._walk(plan[0]["Plan"], query)
+
+    async def fetch(self, query, *args):
+        await self._explain(query, args)
+        return await self.conn.fetch(query, *args)
+
+    async def fetchrow(self, query, *args):
+        await self._explain(query, args)
+        return await self.conn.fetchrow(query, *args)
+
+    async def fetchval(self, query, *args):
+        await self._explain(query, args)
+        return await self.conn.fetchval(query, *args)
+
+    async def execute(self, query, *args):
+        await self._explain(query, args)
+        return await self.conn.execute(query, *args)
+
+    async def fetch_prepared(self, name, *args):
+        return await self.fetch(STATEMENTS[name], *args)
+
+    async def fetchrow_prepared(self, name, *args):
+        return await self.fetchrow(STATEMENTS[name], *args)
+
+    async def fetchval_prepared(self, name, *args):
+        return await self.fetchval(STATEMENTS[name], *args)
+
+async def run_checks(explainer, conn):
+    """Вызывает горячие функции db.py с параметрами из засеянных данных"""
+    user_id = USER_ID_BASE + 4242
+    city_id = await conn.fetchval("SELECT id FROM cities WHERE name = $1", CITY_PREFIX + "7")
+    time_slot_id = await conn.fetchval("SELECT id FROM time_slots WHERE city_id = $1 AND active LIMIT 1", city_id)
+    meeting_id = await conn.fetchval(
+        "SELECT id FROM meetings WHERE city_id = $1 AND status = 'confirmed' LIMIT 1", city_id
+    )
+    now = datetime.now()
+
+    checks = [
+        ("get_user", db.get_user, (user_id,)),
+        ("get_user_application", db.get_user_application, (user_id,)),
+        ("get_user_applications", db.get_user_applications, (user_id,)),
+        ("get_user_meetings", db.get_user_meetings, (user_id,)),
+        ("get_pending_applications_by_city", db.get_pending_applications_by_city, (city_id,)),
+        ("get_pending_applications_page", db.get_pending_applications_page, (city_id,)),
+        ("get_meetings_page", db.get_meetings_page, (city_id,)),
+        ("get_meetings_with_member_counts", db.get_meetings_with_member_counts, (city_id,)),
+        ("get_pending_applications_by_timeslot", db.get_pending_applications_by_timeslot, (city_id, time_slot_id)),
+        ("get_meeting", db.get_meeting, (meeting_id,)),
+        ("get_meeting_members", db.get_meeting_members, (meeting_id,)),
+        ("count_meeting_members", db.count_meeting_members, (meeting_id,)),
+        ("get_meeting_timeslots", db.get_meeting_timeslots, (meeting_id,)),
+        ("get_available_dates_by_timeslot", db.get_available_dates_by_timeslot, (time_slot_id,)),
+        ("get_available_dates_by_city_and_timeslot", db.get_available_dates_by_city_and_timeslot, (city_id, time_slot_id)),
+        ("get_reminder_targets", db.get_reminder_targets, (now, now + timedelta(hours=1))),
+        ("get_meeting_start_times", db.get_meeting_start_times, (now, now + timedelta(days=1))),
+        ("claim_notifications", db.claim_notifications, (200,)),
+    ]
+
+    for name, func, args in checks:
+        explainer.current = name
+        await func(*args)
+        logger.info(f"Checked {name}")
+
+async def main():
+    parser = argparse.ArgumentParser(description="Fail if hot queries in database/db.py use sequential scans")
+    parser.add_argument("--scale", type=float, default=1.0, help="size of the seeded dataset (1.0 = 100k users)")
+    args = parser.parse_args()
+
+    conn = await asyncpg.connect(**get_connection_kwargs())
+    transaction = conn.transaction()
+    await transaction.start()
+    try:
+        await seed(conn, args.scale)
+
+        explainer = ExplainingConnection(conn)
+        db.pool = explainer
+        await run_checks(explainer, conn)
+    finally:
+        # Ничего из засеянных данных не остаётся в базе
+        await transaction.rollback()
+        await conn.close()
+
+    if explainer.seq_scans:
+        for func_name, table, query in explainer.seq_scans:
+            print(f"SEQ SCAN on {table} in {func_name}: {query[:200]}")
+        return 1
+
+    print("No sequential scans on large tables")
+    return 0
+
+if __name__ == "__main__":
+    sys.exit(asyncio.run(main()))
@@ -18,6 +18,82 @@ DB_NAME = os.getenv("DB_NAME", "five_chairs")
 DB_USER = os.getenv("DB_USER", "kostakunak")  # Updated to use the correct PostgreSQL user
 DB_PASSWORD = os.getenv("DB_PASSWORD", "")  # Empty password for local development
 
+# Direct server address for LISTEN/NOTIFY (must bypass PgBouncer in transaction pooling mode)
+DB_LISTEN_HOST = os.getenv("DB_LISTEN_HOST", DB_HOST)
+DB_LISTEN_PORT = int(os.getenv("DB_LISTEN_PORT", str(DB_PORT)))
+
+# Connection pool settings
+def _pool_size(role: str, default_min: int, default_max: int):
+    """(min_size, max_size) for a service role, overridable with DB_POOL_<ROLE>_MIN_SIZE/MAX_SIZE"""
+    prefix = f"DB_POOL_{role.upper()}"
+    return (
+        int(os.getenv(f"{prefix}_MIN_SIZE", str(default_min))),
+        int(os.getenv(f"{prefix}_MAX_SIZE", str(default_max))),
+    )
+
+# Default size for processes that do not pass a role (scripts, tests)
+DB_POOL_MIN_SIZE = int(os.getenv("DB_POOL_MIN_SIZE", "2"))
+DB_POOL_MAX_SIZE = int(os.getenv("DB_POOL_MAX_SIZE", "10"))
+# Sizes per service role (main.py mode)
+DB_POOL_SIZES = {
+    "user": _pool_size("user", 2, 10),
+    "admin": _pool_size("admin", 1, 5),
+    "notification": _pool_size("notification", 1, 4),
+    "timeslot": _pool_size("timeslot", 1, 2),
+    "webhook": _pool_size("webhook", 2, 12),  # user and admin bot in one process
+    "user_worker": _pool_size("user_worker", 1, 4),  # each process of the multi-process user bot
+    "all": _pool_size("all", 2, 15),  # main.py all: bots and background services in one process
+}
+DB_POOL_TIMEOUT = float(os.getenv("DB_POOL_TIMEOUT", "30"))
+DB_STATEMENT_CACHE_SIZE = int(os.getenv("DB_STATEMENT_CACHE_SIZE", "100"))
+DB_MAX_INACTIVE_CONNECTION_LIFETIME = float(os.getenv("DB_MAX_INACTIVE_CONNECTION_LIFETIME", "300"))
+# PgBouncer transaction pooling: no named prepared statements, no statement cache
+DB_PGBOUNCER_MODE = os.getenv("DB_PGBOUNCER_MODE", "false").lower() == "true"
+
+# Multi-process user bot (python run_user_bot.py --workers N): updates are sharded by chat id
+USER_BOT_WORKERS = int(os.getenv("USER_BOT_WORKERS", "1"))
+USER_BOT_WORKER_QUEUE_SIZE = int(os.getenv("USER_BOT_WORKER_QUEUE_SIZE", "1000"))  # updates waiting per worker
+USER_BOT_WORKER_CONCURRENCY = int(os.getenv("USER_BOT_WORKER_CONCURRENCY", "100"))  # updates in progress per worker
+
+# Webhook mode (python main.py webhook): both bots on one aiohttp server, one path each
+WEBHOOK_BASE_URL = os.getenv("WEBHOOK_BASE_URL", "")  # public https URL of the server, e.g. https://bot.example.com
+WEBHOOK_HOST = os.getenv("WEBHOOK_HOST", "0.0.0.0")
+WEBHOOK_PORT = int(os.getenv("WEBHOOK_PORT", "8080"))
+WEBHOOK_USER_PATH = os.getenv("WEBHOOK_USER_PATH", "/webhook/user")
+WEBHOOK_ADMIN_PATH = os.getenv("WEBHOOK_ADMIN_PATH", "/webhook/admin")
+WEBHOOK_SECRET = os.getenv("WEBHOOK_SECRET", "")  # checked against X-Telegram-Bot-Api-Secret-Token
+# Only one replica needs to call setWebhook; turn this off on the others
+WEBHOOK_SET_ON_STARTUP = os.getenv("WEBHOOK_SET_ON_STARTUP", "true").lower() == "true"
+# false: answer Telegram only after the handler finished (end-to-end latency, backpressure)
+WEBHOOK_HANDLE_IN_BACKGROUND = os.getenv("WEBHOOK_HANDLE_IN_BACKGROUND", "true").lower() == "true"
+
+# Query tracing: queries (and pool waits) slower than this are logged with their caller;
+# per-statement stats are dumped on SIGUSR1 and by the admin bot's /dbstats
+DB_TRACING = os.getenv("DB_TRACING", "true").lower() == "true"
+DB_SLOW_QUERY_MS = float(os.getenv("DB_SLOW_QUERY_MS", "200"))
+DB_QUERY_STATS_TOP = int(os.getenv("DB_QUERY_STATS_TOP", "10"))
+DB_QUERY_STATS_MAX_STATEMENTS = int(os.getenv("DB_QUERY_STATS_MAX_STATEMENTS", "1000"))
+
+# Prometheus metrics (GET /metrics on METRICS_HOST); METRICS_PORT=0 disables them everywhere.
+# Every process gets its own port so that several services can run on one host.
+METRICS_HOST = os.getenv("METRICS_HOST", "127.0.0.1")
+METRICS_PORT = int(os.getenv("METRICS_PORT", "9100"))
+
+def _metrics_port(role: str, offset: int):
+    """Metrics port for a service role: METRICS_PORT + offset, overridable with METRICS_PORT_<ROLE>"""
+    default = METRICS_PORT + offset if METRICS_PORT else 0
+    return int(os.getenv(f"METRICS_PORT_{role.upper()}", str(default)))
+
+# Ports per service role (main.py mode)
+METRICS_PORTS = {
+    "user": _metrics_port("user", 1),
+    "admin": _metrics_port("admin", 2),
+    "notification": _metrics_port("notification", 3),
+    "webhook": _metrics_port("webhook", 4),
+    "all": _metrics_port("all", 5),
+    "user_worker": _metrics_port("user_worker", 10),  # first worker; worker N uses this + N
+}
+
 # Admin settings
 ADMIN_IDS_STR = os.getenv("ADMIN_IDS", "5778834899")
 ADMIN_IDS = [int(admin_id.strip()) for admin_id in ADMIN_IDS_STR.split(",") if admin_id.strip()]
@@ -28,6 +104,40 @@ SUPERADMIN_IDS = [int(admin_id.strip()) for admin_id in SUPERADMIN_IDS_STR.split
 MIN_MEETING_SIZE = int(os.getenv("MIN_MEETING_SIZE", "5"))
 MAX_MEETING_SIZE = int(os.getenv("MAX_MEETING_SIZE", "5"))
 
+# Cities, time slots, questions, venues and admins are cached in each process for this many seconds.
+# Bot processes also LISTEN on reference_changes and drop an entry as soon as any process
+# changes the table; with REFERENCE_CACHE_LISTEN=false (or while the listener is
+# reconnecting) a change made elsewhere shows up only after the TTL
+REFERENCE_CACHE_TTL = float(os.getenv("REFERENCE_CACHE_TTL", "60"))
+REFERENCE_CACHE_LISTEN = os.getenv("REFERENCE_CACHE_LISTEN", "true").lower() == "true"
+
+# FSM storage for the bots: postgres (shared by replicas, survives restarts), redis or memory
+FSM_STORAGE = os.getenv("FSM_STORAGE", "postgres")
+FSM_STATE_TTL = int(os.getenv("FSM_STATE_TTL", str(7 * 24 * 3600)))  # seconds of inactivity before a state is dropped, 0 = keep
+FSM_PURGE_INTERVAL = int(os.getenv("FSM_PURGE_INTERVAL", "3600"))
+REDIS_URL = os.getenv("REDIS_URL", "redis://localhost:6379/0")
+
+# Rows per page in admin bot lists (Telegram allows up to 100 inline buttons per message)
+ADMIN_PAGE_SIZE = int(os.getenv("ADMIN_PAGE_SIZE", "20"))
+
+# Available dates are generated this many days ahead
+AVAILABLE_DATES_HORIZON_DAYS = int(os.getenv("AVAILABLE_DATES_HORIZON_DAYS", "14"))
+
 # Notification settings
 REMINDER_DAY_BEFORE = os.getenv("REMINDER_DAY_BEFORE", "true").lower() == "true"
-REMINDER_HOUR_BEFORE = os.getenv("REMINDER_HOUR_BEFORE", "true").lower() == "true"
\ No newline at end of file
+REMINDER_HOUR_BEFORE = os.getenv("REMINDER_HOUR_BEFORE", "true").lower() == "true"
+REMINDER_RESYNC_INTERVAL = int(os.getenv("REMINDER_RESYNC_INTERVAL", "600"))  # seconds between full schedule reloads
+
+# Outbox (notifications table) delivery settings
+OUTBOX_BATCH_SIZE = int(os.getenv("OUTBOX_BATCH_SIZE", "200"))
+OUTBOX_CONCURRENCY = int(os.getenv("OUTBOX_CONCURRENCY", "25"))
+OUTBOX_POLL_INTERVAL = float(os.getenv("OUTBOX_POLL_INTERVAL", "2"))
+OUTBOX_MAX_ATTEMPTS = int(os.getenv("OUTBOX_MAX_ATTEMPTS", "5"))
+OUTBOX_LEASE_SECONDS = int(os.getenv("OUTBOX_LEASE_SECONDS", "300"))
+
+# Telegram Bot API rate limits (per bot token)
+TELEGRAM_GLOBAL_RATE = float(os.getenv("TELEGRAM_GLOBAL_RATE", "30"))
+TELEGRAM_GLOBAL_BURST = int(os.getenv("TELEGRAM_GLOBAL_BURST", "30"))
+TELEGRAM_PER_CHAT_RATE = float(os.getenv("TELEGRAM_PER_CHAT_RATE", "1"))
+TELEGRAM_PER_CHAT_BURST = int(os.getenv("TELEGRAM_PER_CHAT_BURST", "3"))
+TELEGRAM_MAX_RETRIES = int(os.getenv("TELEGRAM_MAX_RETRIES", "3"))
@@ -0,0 +1,77 @@
+import asyncio
+import logging
+import time
+
+import config
+
+logger = logging.getLogger(__name__)
+
+class ReferenceCache:
+    """
+    In-process read-through cache for small reference tables (cities, time slots,
+    questions, venues).
+
+    Each table has a loader that reads it once and returns a snapshot with the
+    indexes the bots need (e.g. time slots by city). Snapshots live for ttl seconds
+    or until invalidate() is called by the code that changed the table. Other
+    processes drop theirs when the reference_changes notification arrives (see
+    handle_change); without a listener they only see a change after ttl.
+    """
+
+    # A changed table -> cached snapshots built from it (venues are listed with their city)
+    DEPENDENTS = {'cities': ('cities', 'venues')}
+
+    def __init__(self, ttl=config.REFERENCE_CACHE_TTL):
+        self.ttl = ttl
+        self._loaders = {}
+        self._entries = {}  # table -> (expires_at, snapshot)
+        self._versions = {}  # table -> invalidation counter
+        self._locks = {}
+
+    def register(self, table, loader):
+        """loader() is an async function returning the snapshot for table"""
+        self._loaders[table] = loader
+        self._versions.setdefault(table, 0)
+
+    async def get(self, table):
+        """Cached snapshot of table, loading it if missing or expired"""
+        entry = self._entries.get(table)
+        if entry and entry[0] > time.monotonic():
+            return entry[1]
+        # One load per table at a time, everyone else waits for its result.
+        # Created here, inside the running loop: on Python 3.9 a Lock binds to the loop
+        # current at creation, and the module is imported before asyncio.run() starts one
+        lock = self._locks.get(table)
+        if lock is None:
+            lock = self._locks[table] = asyncio.Lock()
+        async with lock:
+            entry = self._entries.get(table)
+            if entry and entry[0] > time.monotonic():
+                return entry[1]
+            version = self._versions[table]
+            snapshot = await self._loaders[table]()
+            # Invalidated while loading: serve what we read, but do not keep it
+            if self._versions[table] == version:
+                self._entries[table] = (time.monotonic() + self.ttl, snapshot)
+            return snapshot
+
+    def invalidate(self, *tables):
+        """Drop cached snapshots (all tables if none are given)"""
+        for table in tables or list(self._loaders):
+            self._entries.pop(table, None)
+            self._versions[table] = self._versions.get(table, 0) + 1
+        logger.debug(f"Reference cache invalidated: {tables or 'all'}")
+
+    async def handle_change(self, payload):
+        """Apply a reference_changes event from the database listener"""
+        table = payload.get('table')
+        tables = [name for name in self.DEPENDENTS.get(table, (table,)) if name in self._loaders]
+        if tables:
+            self.invalidate(*tables)
+
+    async def handle_reconnect(self):
+        """Changes made while the listener was disconnected were not announced"""
+        self.invalidate()
+
+
+reference_cache = ReferenceCache()
@@ -3,15 +3,14 @@ import asyncpg
 import logging
 import importlib
 from datetime import datetime, timedelta, time
-from sqlalchemy import create_engine
-from sqlalchemy.ext.asyncio import create_async_engine, AsyncSession
-from sqlalchemy.orm import sessionmaker
-from sqlalchemy.pool import NullPool
 from contextlib import asynccontextmanager
 
 # Import config module
 import config
-from database.models import Base
+from database.pool_config import get_listen_connection_kwargs, get_pool_kwargs
+from database.cache import reference_cache
+from database.instrumented import InstrumentedPool
+from database.tracing import install_query_tracing
 
 # Настройка логирования
 logging.basicConfig(
@@ -23,20 +22,42 @@ logger = logging.getLogger(__name__)
 # Global connection pool for raw SQL queries
 pool = None
 
-# SQLAlchemy engines - will be initialized in init_db()
-sync_engine = None
+# SQLAlchemy engine - built on first use of get_async_session(), most code only needs the pool
 async_engine = None
 
-# Session factory will be initialized in init_db()
+# Session factory is created together with the engine
 AsyncSessionLocal = None
 
+def _init_orm():
+    """Create the SQLAlchemy async engine and session factory on first use"""
+    global async_engine, AsyncSessionLocal
+    if AsyncSessionLocal is None:
+        from sqlalchemy.ext.asyncio import create_async_engine, AsyncSession
+        from sqlalchemy.orm import sessionmaker
+        
+        ASYNC_DB_URL = f"postgresql+asyncpg://{config.DB_USER}:{config.DB_PASSWORD}@{config.DB_HOST}:{config.DB_PORT}/{config.DB_NAME}"
+        connect_args = {"statement_cache_size": 0} if config.DB_PGBOUNCER_MODE else {}
+        async_engine = create_async_engine(
+            ASYNC_DB_URL,
+            pool_size=1,
+            max_overflow=2,
+            pool_recycle=int(config.DB_MAX_INACTIVE_CONNECTION_LIFETIME),
+            connect_args=connect_args
+        )
+        AsyncSessionLocal = sessionmaker(
+            async_engine,
+            class_=AsyncSession,
+            expire_on_commit=False
+        )
+        logger.info("SQLAlchemy engine created")
+    return AsyncSessionLocal
+
 @asynccontextmanager
 async def get_async_session():
     """Get an async session for SQLAlchemy ORM operations"""
-    if AsyncSessionLocal is None:
-        raise RuntimeError("Database not initialized. Call init_db() first.")
-        
-    async with AsyncSessionLocal() as session:
+    session_factory = _init_orm()
+    
+    async with session_factory() as session:
         try:
             yield session
         except Exception as e:
@@ -45,57 +66,31 @@ async def get_async_session():
         finally:
             await session.close()
 
-async def init_db():
-    """Initialize database connection pool and create tables"""
-    global pool, sync_engine, async_engine, AsyncSessionLocal
+async def init_db(role=None):
+    """
+    Initialize database connection pool.
+    The schema is managed by Alembic (alembic upgrade head), not created here.
+    role is the service role (main.py mode) used to size the pool, see config.DB_POOL_SIZES.
+    """
+    global pool
     if pool is None:
         try:
-            # Hardcode the database configuration that we know works
-            DB_HOST = "localhost"
-            DB_PORT = 5432
-            DB_NAME = "five_chairs"
-            DB_USER = "kostakunak"
-            DB_PASSWORD = ""
+            pool_kwargs = get_pool_kwargs(role)
             
             # Log the database configuration
-            logger.info(f"Database configuration: host={DB_HOST}, port={DB_PORT}, name={DB_NAME}, user={DB_USER}")
-            
-            # Create connection strings at runtime
-            SYNC_DB_URL = f"postgresql://{DB_USER}:{DB_PASSWORD}@{DB_HOST}:{DB_PORT}/{DB_NAME}"
-            ASYNC_DB_URL = f"postgresql+asyncpg://{DB_USER}:{DB_PASSWORD}@{DB_HOST}:{DB_PORT}/{DB_NAME}"
-            
-            logger.info(f"Using database URL: {ASYNC_DB_URL}")
-            
-            # Initialize SQLAlchemy engines
-            sync_engine = create_engine(SYNC_DB_URL)
-            async_engine = create_async_engine(ASYNC_DB_URL)
-            
-            # Initialize session factory
-            AsyncSessionLocal = sessionmaker(
-                async_engine,
-                class_=AsyncSession,
-                expire_on_commit=False
+            logger.info(
+                f"Database configuration: host={config.DB_HOST}, port={config.DB_PORT}, name={config.DB_NAME}, "
+                f"user={config.DB_USER}, role={role}, pool={pool_kwargs['min_size']}-{pool_kwargs['max_size']}, "
+                f"pgbouncer={config.DB_PGBOUNCER_MODE}"
             )
             
-            # Create asyncpg connection pool for raw SQL queries
-            pool = await asyncpg.create_pool(
-                host=DB_HOST,
-                port=DB_PORT,
-                database=DB_NAME,
-                user=DB_USER,
-                password=DB_PASSWORD,
-                min_size=2,  # Reduced from 5 to save resources
-                max_size=10,  # Reduced from 20 to save resources
-                timeout=30.0  # Added timeout to prevent hanging connections
-            )
+            # Create asyncpg connection pool for raw SQL queries;
+            # the proxy lets metrics/tracing observe every query (no-op without observers)
+            pool = InstrumentedPool(await asyncpg.create_pool(**pool_kwargs))
             logger.info("Database connection pool created")
+            if config.DB_TRACING:
+                install_query_tracing(asyncio.get_running_loop())
             logging.getLogger("database.db").info(f"[init_db] pool инициализирован: id={id(pool)}")
-            
-            # Create tables using SQLAlchemy models
-            async with async_engine.begin() as conn:
-                await conn.run_sync(Base.metadata.create_all)
-            
-            logger.info("Database tables initialized")
             return pool
         except Exception as e:
             logger.error(f"Failed to create database connection pool: {e}")
@@ -104,16 +99,27 @@ async def init_db():
         logging.getLogger("database.db").info(f"[init_db] pool уже существует: id={id(pool)}")
         return pool
 
+async def connect_db():
+    """
+    Open a standalone connection outside the pool.
+    Used for long-lived sessions such as LISTEN that must not hold a pool slot.
+    """
+    return await asyncpg.connect(timeout=config.DB_POOL_TIMEOUT, **get_listen_connection_kwargs())
+
 async def close_db():
     """Close database connection pool"""
-    global pool
+    global pool, async_engine, AsyncSessionLocal
     if pool:
         await pool.close()
+        pool = None
         logger.info("Database connection pool closed")
     
-    # Close SQLAlchemy engine
-    await async_engine.dispose()
-    logger.info("SQLAlchemy engine disposed")
+    # Close SQLAlchemy engine if it was ever used
+    if async_engine is not None:
+        await async_engine.dispose()
+        async_engine = None
+        AsyncSessionLocal = None
+        logger.info("SQLAlchemy engine disposed")
 
 # User operations
 async def add_user(user_id, username, name, surname, age=None):
@@ -136,47 +142,59 @@ async def add_user(user_id, username, name, surname, age=None):
 async def get_user(user_id):
     """Get user information from the database"""
     async with pool.acquire() as conn:
-        return await conn.fetchrow('SELECT * FROM users WHERE id = $1', user_id)
+        return await conn.fetchrow_prepared('get_user', user_id)
 
 async def update_user(user_id, **kwargs):
     """Update user information in the database"""
-    logger.info(f"[update_user] user_id={user_id}, обновляемые поля: {kwargs}")
+    logger.debug(f"[update_user] user_id={user_id}, обновляемые поля: {kwargs}")
     fields = []
     values = []
     for i, (key, value) in enumerate(kwargs.items(), start=1):
         fields.append(f"{key} = ${i}")
         values.append(value)
     if not fields:
-        logger.info(f"[update_user] Нет полей для обновления user_id={user_id}")
+        logger.debug(f"[update_user] Нет полей для обновления user_id={user_id}")
         return False
     query = f"UPDATE users SET {', '.join(fields)} WHERE id = ${len(values) + 1}"
     values.append(user_id)
     async with pool.acquire() as conn:
         result = await conn.execute(query, *values)
-        logger.info(f"[update_user] Результат обновления user_id={user_id}: {result}")
+        logger.debug(f"[update_user] Результат обновления user_id={user_id}: {result}")
         return True
 
 # City operations
+async def _load_cities():
+    async with pool.acquire() as conn:
+        rows = await conn.fetch('SELECT * FROM cities ORDER BY name')
+    return {
+        'by_id': {row['id']: row for row in rows},
+        'active': [row for row in rows if row['active']],
+    }
+
+reference_cache.register('cities', _load_cities)
+
 async def add_city(name, active=True):
     """Add a new city to the database"""
     async with pool.acquire() as conn:
-        return await conn.fetchval('''
+        city_id = await conn.fetchval('''
             INSERT INTO cities (name, active)
             VALUES ($1, $2)
             ON CONFLICT (name) DO UPDATE
             SET active = $2
             RETURNING id
         ''', name, active)
+    reference_cache.invalidate('cities', 'venues')
+    return city_id
 
 async def get_city(city_id):
-    """Get city information from the database"""
-    async with pool.acquire() as conn:
-        return await conn.fetchrow('SELECT * FROM cities WHERE id = $1', city_id)
+    """Get city information (cached)"""
+    cities = await reference_cache.get('cities')
+    return cities['by_id'].get(city_id)
 
 async def get_active_cities():
-    """Get all active cities"""
-    async with pool.acquire() as conn:
-        return await conn.fetch('SELECT * FROM cities WHERE active = true ORDER BY name')
+    """Get all active cities (cached)"""
+    cities = await reference_cache.get('cities')
+    return list(cities['active'])
 
 async def update_city(city_id, **kwargs):
     """Update city information in the database"""
@@ -194,9 +212,32 @@ async def update_city(city_id, **kwargs):
     
     async with pool.acquire() as conn:
         await conn.execute(query, *values)
-        return True
+    reference_cache.invalidate('cities', 'venues')
+    return True
 
 # Time slot operations
+async def _load_timeslots():
+    async with pool.acquire() as conn:
+        rows = await conn.fetch('''
+            SELECT * FROM time_slots
+            WHERE active = true
+            ORDER BY CASE
+                WHEN day_of_week = 'Monday' THEN 1
+                WHEN day_of_week = 'Tuesday' THEN 2
+                WHEN day_of_week = 'Wednesday' THEN 3
+                WHEN day_of_week = 'Thursday' THEN 4
+                WHEN day_of_week = 'Friday' THEN 5
+                WHEN day_of_week = 'Saturday' THEN 6
+                WHEN day_of_week = 'Sunday' THEN 7
+            END, start_time
+        ''')
+    by_city = {}
+    for row in rows:
+        by_city.setdefault(row['city_id'], []).append(row)
+    return {'active': rows, 'by_city': by_city}
+
+reference_cache.register('time_slots', _load_timeslots)
+
 async def add_timeslot(day_of_week, start_time, end_time=None, city_id=None, active=True):
     """Add a new time slot to the database (теперь обязательно указывать city_id)"""
     if end_time is None:
@@ -206,10 +247,13 @@ async def add_timeslot(day_of_week, start_time, end_time=None, city_id=None, act
             start_time_obj = start_time
         end_time = (datetime.combine(datetime.today(), start_time_obj) + timedelta(hours=1)).time()
     async with pool.acquire() as conn:
-        await conn.execute('''
+        time_slot_id = await conn.fetchval('''
             INSERT INTO time_slots (day_of_week, start_time, end_time, city_id, active)
             VALUES ($1, $2, $3, $4, $5)
+            RETURNING id
         ''', day_of_week, start_time, end_time, city_id, active)
+    reference_cache.invalidate('time_slots')
+    return time_slot_id
 
 async def get_timeslot(time_slot_id):
     """Get time slot information from the database"""
@@ -217,21 +261,14 @@ async def get_timeslot(time_slot_id):
         return await conn.fetchrow('SELECT * FROM time_slots WHERE id = $1', time_slot_id)
 
 async def get_active_timeslots():
-    """Get all active time slots"""
-    async with pool.acquire() as conn:
-        return await conn.fetch('''
-            SELECT * FROM time_slots
-            WHERE active = true
-            ORDER BY CASE
-                WHEN day_of_week = 'Monday' THEN 1
-                WHEN day_of_week = 'Tuesday' THEN 2
-                WHEN day_of_week = 'Wednesday' THEN 3
-                WHEN day_of_week = 'Thursday' THEN 4
-                WHEN day_of_week = 'Friday' THEN 5
-                WHEN day_of_week = 'Saturday' THEN 6
-                WHEN day_of_week = 'Sunday' THEN 7
-            END, start_time
-        ''')
+    """Get all active time slots, Monday first (cached)"""
+    timeslots = await reference_cache.get('time_slots')
+    return list(timeslots['active'])
+
+async def get_active_timeslots_by_city(city_id):
+    """Get the active time slots of one city, Monday first (cached)"""
+    timeslots = await reference_cache.get('time_slots')
+    return list(timeslots['by_city'].get(city_id, []))
 
 # Time slot management operations
 async def update_timeslot(time_slot_id, day_of_week=None, start_time=None, end_time=None, active=None):
@@ -281,7 +318,8 @@ async def update_timeslot(time_slot_id, day_of_week=None, start_time=None, end_t
     
     async with pool.acquire() as conn:
         result = await conn.fetchval(query, *values)
-        return result is not None
+    reference_cache.invalidate('time_slots')
+    return result is not None
 
 async def delete_timeslot(time_slot_id):
     """Delete a time slot (set to inactive)"""
@@ -292,7 +330,8 @@ async def delete_timeslot(time_slot_id):
             WHERE id = $1
             RETURNING id
         ''', time_slot_id)
-        return result is not None
+    reference_cache.invalidate('time_slots')
+    return result is not None
 
 async def assign_timeslot_to_meeting(meeting_id, time_slot_id):
     """Assign a time slot to a meeting"""
@@ -353,14 +392,23 @@ async def get_meetings_by_timeslot(time_slot_id):
         ''', time_slot_id)
 
 # Question operations
+async def _load_questions():
+    async with pool.acquire() as conn:
+        rows = await conn.fetch('SELECT * FROM questions WHERE active = true ORDER BY display_order')
+    return {'active': rows}
+
+reference_cache.register('questions', _load_questions)
+
 async def add_question(text, display_order, active=True):
     """Add a new question to the database"""
     async with pool.acquire() as conn:
-        return await conn.fetchval('''
+        question_id = await conn.fetchval('''
             INSERT INTO questions (text, display_order, active)
             VALUES ($1, $2, $3)
             RETURNING id
         ''', text, display_order, active)
+    reference_cache.invalidate('questions')
+    return question_id
 
 async def get_question(question_id):
     """Get question information from the database"""
@@ -368,9 +416,9 @@ async def get_question(question_id):
         return await conn.fetchrow('SELECT * FROM questions WHERE id = $1', question_id)
 
 async def get_active_questions():
-    """Get all active questions ordered by display_order"""
-    async with pool.acquire() as conn:
-        return await conn.fetch('SELECT * FROM questions WHERE active = true ORDER BY display_order')
+    """Get all active questions ordered by display_order (cached)"""
+    questions = await reference_cache.get('questions')
+    return list(questions['active'])
 
 async def update_question(question_id, **kwargs):
     """Update question information in the database"""
@@ -388,7 +436,8 @@ async def update_question(question_id, **kwargs):
     
     async with pool.acquire() as conn:
         await conn.execute(query, *values)
-        return True
+    reference_cache.invalidate('questions')
+    return True
 
 # User answer operations
 async def add_user_answer(user_id, question_id, answer):
@@ -426,6 +475,13 @@ async def get_or_create_application(user_id, time_slot_id):
         ''', user_id, time_slot_id, datetime.now())
 
 # Admin operations
+async def _load_admins():
+    async with pool.acquire() as conn:
+        rows = await conn.fetch('SELECT * FROM admins')
+    return {'by_id': {row['id']: row for row in rows}}
+
+reference_cache.register('admins', _load_admins)
+
 async def add_admin(admin_id, username, name, is_superadmin=False):
     """Add a new admin to the database"""
     async with pool.acquire() as conn:
@@ -435,45 +491,56 @@ async def add_admin(admin_id, username, name, is_superadmin=False):
             ON CONFLICT (id) DO UPDATE
             SET username = $2, name = $3, is_superadmin = $5
         ''', admin_id, username, name, datetime.now(), is_superadmin)
-        return True
+    reference_cache.invalidate('admins')
+    return True
 
 async def get_admin(admin_id):
-    """Get admin information from the database"""
-    async with pool.acquire() as conn:
-        return await conn.fetchrow('SELECT * FROM admins WHERE id = $1', admin_id)
+    """Get admin information (cached)"""
+    admins = await reference_cache.get('admins')
+    return admins['by_id'].get(admin_id)
 
 async def is_admin(user_id):
-    """Check if a user is an admin"""
-    async with pool.acquire() as conn:
-        admin = await conn.fetchrow('SELECT * FROM admins WHERE id = $1', user_id)
-        return bool(admin)
+    """Check if a user is an admin (cached, no query per update)"""
+    admins = await reference_cache.get('admins')
+    return user_id in admins['by_id']
 
 async def is_superadmin(user_id):
-    """Check if a user is a superadmin"""
-    async with pool.acquire() as conn:
-        admin = await conn.fetchrow('SELECT * FROM admins WHERE id = $1 AND is_superadmin = true', user_id)
-        return bool(admin)
+    """Check if a user is a superadmin (cached)"""
+    admin = await get_admin(user_id)
+    return bool(admin and admin['is_superadmin'])
 
 # Venue operations
+async def _load_venues():
+    async with pool.acquire() as conn:
+        rows = await conn.fetch('''
+            SELECT v.*, c.name as city_name
+            FROM venues v
+            JOIN cities c ON v.city_id = c.id
+            WHERE v.active = true
+            ORDER BY v.name
+        ''')
+    by_city = {}
+    for row in rows:
+        by_city.setdefault(row['city_id'], []).append(row)
+    return {'by_city': by_city}
+
+reference_cache.register('venues', _load_venues)
+
 async def add_venue(name, address, city_id, description=None):
     """Add a new venue to the database"""
     async with pool.acquire() as conn:
-        return await conn.fetchval('''
+        venue_id = await conn.fetchval('''
             INSERT INTO venues (name, address, city_id, description, created_at)
             VALUES ($1, $2, $3, $4, $5)
             RETURNING id
         ''', name, address, city_id, description, datetime.now())
+    reference_cache.invalidate('venues')
+    return venue_id
 
 async def get_venues_by_city(city_id):
-    """Get all venues for a specific city"""
-    async with pool.acquire() as conn:
-        return await conn.fetch('''
-            SELECT v.*, c.name as city_name
-            FROM venues v
-            JOIN cities c ON v.city_id = c.id
-            WHERE v.city_id = $1 AND v.active = true
-            ORDER BY v.name
-        ''', city_id)
+    """Get all active venues for a specific city (cached)"""
+    venues = await reference_cache.get('venues')
+    return list(venues['by_city'].get(city_id, []))
 
 async def get_venue(venue_id):
     """Get venue information by ID"""
@@ -493,7 +560,8 @@ async def add_venue(name, address, city_id, description=None):
             VALUES ($1, $2, $3, $4, true, $5)
             RETURNING id
         ''', name, address, city_id, description, datetime.now())
-        return venue_id
+    reference_cache.invalidate('venues')
+    return venue_id
 
 async def update_venue(venue_id, name=None, address=None, description=None, active=None):
     """Update venue details"""
@@ -534,7 +602,8 @@ async def update_venue(venue_id, name=None, address=None, description=None, acti
         '''
         
         updated_id = await conn.fetchval(update_query, *params)
-        return updated_id is not None
+    reference_cache.invalidate('venues')
+    return updated_id is not None
 
 async def update_venue(venue_id, name=None, address=None, description=None, active=None):
     """Update venue information"""
@@ -555,7 +624,8 @@ async def update_venue(venue_id, name=None, address=None, description=None, acti
             SET name = $1, address = $2, description = $3, active = $4
             WHERE id = $5
         ''', name, address, description, active, venue_id)
-        return True
+    reference_cache.invalidate('venues')
+    return True
 
 async def delete_venue(venue_id):
     """Delete a venue (set inactive)"""
@@ -565,7 +635,8 @@ async def delete_venue(venue_id):
             SET active = false
             WHERE id = $1
         ''', venue_id)
-        return True
+    reference_cache.invalidate('venues')
+    return True
 
 # Meeting operations (formerly groups)
 async def create_meeting(name, meeting_date, meeting_time, city_id, venue, created_by=None, venue_address=None):
@@ -577,6 +648,38 @@ async def create_meeting(name, meeting_date, meeting_time, city_id, venue, creat
             RETURNING id
         ''', name, meeting_date, meeting_time, city_id, venue, venue_address, 'planned', created_by, datetime.now())
 
+async def create_meeting_with_members(name, meeting_date, meeting_time, city_id, venue, user_ids,
+                                      time_slot_id=None, created_by=None, venue_address=None):
+    """
+    Create a meeting together with its time slot link and members in a single statement:
+    the meeting row, meeting_time_slots, all meeting_members and the approval of the
+    members' pending applications either all happen or none does.
+    Returns the new meeting id.
+    """
+    async with pool.acquire() as conn:
+        return await conn.fetchval('''
+            WITH new_meeting AS (
+                INSERT INTO meetings (name, meeting_date, meeting_time, city_id, venue, venue_address, status, created_by, created_at)
+                VALUES ($1, $2, $3, $4, $5, $6, 'planned', $7, $8)
+                RETURNING id
+            ), meeting_slot AS (
+                INSERT INTO meeting_time_slots (meeting_id, time_slot_id, created_at)
+                SELECT id, $9, $8 FROM new_meeting
+                WHERE $9::int IS NOT NULL
+            ), members AS (
+                INSERT INTO meeting_members (meeting_id, user_id, added_at, added_by)
+                SELECT new_meeting.id, u.user_id, $8, $7
+                FROM new_meeting, unnest($10::bigint[]) AS u(user_id)
+                ON CONFLICT (meeting_id, user_id) DO NOTHING
+            ), approved AS (
+                -- Если заявка была pending — одобряем
+                UPDATE applications SET status = 'approved'
+                WHERE user_id = ANY($10::bigint[]) AND time_slot_id = $9 AND status = 'pending'
+            )
+            SELECT id FROM new_meeting
+        ''', name, meeting_date, meeting_time, city_id, venue, venue_address, created_by, datetime.now(),
+            time_slot_id, list(user_ids))
+
 async def get_meeting(meeting_id):
     """Get meeting information from the database"""
     async with pool.acquire() as conn:
@@ -593,6 +696,69 @@ async def get_meetings_by_status(status):
             ORDER BY m.meeting_date, m.meeting_time
         ''', status)
 
+async def get_meetings_with_member_counts(city_id, meeting_date=None, meeting_time=None,
+                                          exclude_meeting_id=None, without_user_id=None):
+    """
+    Get a city's meetings with their member_count (a column kept up to date by a trigger).
+    Optional filters: exact date/time, a meeting to leave out and a user who must not be a member yet.
+    """
+    conditions = ['m.city_id = $1']
+    params = [city_id]
+    for condition, value in (
+        ('m.meeting_date = ${}', meeting_date),
+        ('m.meeting_time = ${}', meeting_time),
+        ('m.id != ${}', exclude_meeting_id),
+        ('NOT EXISTS (SELECT 1 FROM meeting_members x WHERE x.meeting_id = m.id AND x.user_id = ${})', without_user_id),
+    ):
+        if value is not None:
+            params.append(value)
+            conditions.append(condition.format(len(params)))
+    async with pool.acquire() as conn:
+        return await conn.fetch(f'''
+            SELECT m.*, c.name as city_name
+            FROM meetings m
+            JOIN cities c ON m.city_id = c.id
+            WHERE {' AND '.join(conditions)}
+            ORDER BY m.meeting_date, m.meeting_time, m.id
+        ''', *params)
+
+def _keyset_page(rows, limit, backwards, has_cursor):
+    """
+    Trim a page fetched with LIMIT limit + 1 and work out which neighbours exist.
+    Returns (rows in display order, has_prev, has_next).
+    """
+    rows = [dict(row) for row in rows]
+    has_more = len(rows) > limit
+    rows = rows[:limit]
+    if backwards:
+        rows.reverse()
+        return rows, has_more, True
+    return rows, has_cursor, has_more
+
+async def get_meetings_page(city_id, after_id=None, before_id=None, limit=config.ADMIN_PAGE_SIZE):
+    """
+    Get one page of a city's meetings ordered by id, with member_count.
+    after_id/before_id are the last/first meeting id of the current page.
+    Returns (rows, has_prev, has_next).
+    """
+    backwards = before_id is not None
+    cursor = before_id if backwards else after_id
+    condition = ''
+    params = [city_id, limit + 1]
+    if cursor is not None:
+        condition = f"AND m.id {'<' if backwards else '>'} $3"
+        params.append(cursor)
+    async with pool.acquire() as conn:
+        rows = await conn.fetch(f'''
+            SELECT m.*, c.name as city_name
+            FROM meetings m
+            JOIN cities c ON m.city_id = c.id
+            WHERE m.city_id = $1 {condition}
+            ORDER BY m.id {'DESC' if backwards else 'ASC'}
+            LIMIT $2
+        ''', *params)
+    return _keyset_page(rows, limit, backwards, cursor is not None)
+
 async def update_meeting_status(meeting_id, status):
     """Update meeting status in the database"""
     async with pool.acquire() as conn:
@@ -626,13 +792,7 @@ async def remove_meeting_member(meeting_id, user_id):
 async def get_meeting_members(meeting_id):
     """Get all members of a meeting with user information"""
     async with pool.acquire() as conn:
-        return await conn.fetch('''
-            SELECT mm.*, u.name, u.surname, u.username
-            FROM meeting_members mm
-            JOIN users u ON mm.user_id = u.id
-            WHERE mm.meeting_id = $1
-            ORDER BY mm.added_at
-        ''', meeting_id)
+        return await conn.fetch_prepared('get_meeting_members', meeting_id)
 
 async def get_user_meetings(user_id):
     """Get all meetings a user is a member of"""
@@ -650,8 +810,7 @@ async def count_meeting_members(meeting_id):
     """Count the number of members in a meeting"""
     async with pool.acquire() as conn:
         return await conn.fetchval('''
-            SELECT COUNT(*) FROM meeting_members
-            WHERE meeting_id = $1
+            SELECT COALESCE((SELECT member_count FROM meetings WHERE id = $1), 0)
         ''', meeting_id)
         
 # Available Dates operations
@@ -677,15 +836,15 @@ async def get_available_dates(start_date=None, end_date=None):
         start_date = datetime.now().date()
     
     if end_date is None:
-        end_date = start_date + timedelta(days=14)
+        end_date = start_date + timedelta(days=config.AVAILABLE_DATES_HORIZON_DAYS)
     
     async with pool.acquire() as conn:
         return await conn.fetch('''
-            SELECT ad.*, ts.day_of_week, ts.time
+            SELECT ad.*, ts.day_of_week, ts.start_time AS time
             FROM available_dates ad
-            JOIN timeslots ts ON ad.time_slot_id = ts.id
+            JOIN time_slots ts ON ad.time_slot_id = ts.id
             WHERE ad.date >= $1 AND ad.date <= $2 AND ad.is_available = true
-            ORDER BY ad.date, ts.time
+            ORDER BY ad.date, ts.start_time
         ''', start_date, end_date)
 
 async def get_available_dates_by_city_and_timeslot(city_id, time_slot_id, start_date=None, end_date=None):
@@ -694,7 +853,7 @@ async def get_available_dates_by_city_and_timeslot(city_id, time_slot_id, start_
         start_date = datetime.now().date()
     
     if end_date is None:
-        end_date = start_date + timedelta(days=14)
+        end_date = start_date + timedelta(days=config.AVAILABLE_DATES_HORIZON_DAYS)
     
     async with pool.acquire() as conn:
         # Сначала проверим, существует ли временной слот
@@ -758,13 +917,13 @@ async def get_available_dates_by_timeslot(time_slot_id, start_date=None, end_dat
         start_date = datetime.now().date()
     
     if end_date is None:
-        end_date = start_date + timedelta(days=14)
+        end_date = start_date + timedelta(days=config.AVAILABLE_DATES_HORIZON_DAYS)
     
     async with pool.acquire() as conn:
         return await conn.fetch('''
-            SELECT ad.*, ts.day_of_week, ts.time
+            SELECT ad.*, ts.day_of_week, ts.start_time AS time
             FROM available_dates ad
-            JOIN timeslots ts ON ad.time_slot_id = ts.id
+            JOIN time_slots ts ON ad.time_slot_id = ts.id
             WHERE ad.time_slot_id = $1 AND ad.date >= $2 AND ad.date <= $3 AND ad.is_available = true
             ORDER BY ad.date
         ''', time_slot_id, start_date, end_date)
@@ -788,6 +947,156 @@ async def remove_old_available_dates():
         ''')
         return True
 
+# Notification outbox operations
+async def claim_notifications(batch_size, lease_seconds=300):
+    """
+    Claim a batch of due notifications for delivery.
+    Rows are locked with SKIP LOCKED so several dispatchers never claim the same row;
+    rows stuck in 'sending' longer than the lease (crashed dispatcher) are claimed again.
+    """
+    async with pool.acquire() as conn:
+        return await conn.fetch('''
+            UPDATE notifications
+            SET status = 'sending', locked_at = NOW(), attempts = attempts + 1
+            WHERE id IN (
+                SELECT id FROM notifications
+                WHERE (status = 'pending' AND next_attempt_at <= NOW())
+                   OR (status = 'sending' AND locked_at < NOW() - make_interval(secs => $2))
+                ORDER BY next_attempt_at, id
+                LIMIT $1
+                FOR UPDATE SKIP LOCKED
+            )
+            RETURNING id, user_id, text, kind, attempts
+        ''', batch_size, lease_seconds)
+
+async def mark_notifications_sent(notification_ids):
+    """Mark delivered notifications as sent"""
+    if not notification_ids:
+        return False
+    async with pool.acquire() as conn:
+        await conn.execute('''
+            UPDATE notifications
+            SET status = 'sent', sent_at = NOW(), locked_at = NULL, last_error = NULL
+            WHERE id = ANY($1::int[])
+        ''', notification_ids)
+        return True
+
+async def mark_notifications_failed(failures):
+    """
+    Record failed deliveries.
+    failures: list of (notification_id, error_text, retry_at); retry_at=None means the failure is final.
+    """
+    if not failures:
+        return False
+    async with pool.acquire() as conn:
+        await conn.executemany('''
+            UPDATE notifications
+            SET status = CASE WHEN $3::timestamp IS NULL THEN 'failed' ELSE 'pending' END,
+                last_error = $2,
+                next_attempt_at = COALESCE($3::timestamp, next_attempt_at),
+                locked_at = NULL
+            WHERE id = $1
+        ''', failures)
+        return True
+
+# Reminder operations
+async def get_reminder_targets(starts_from, starts_to, meeting_ids=None):
+    """
+    Get confirmed meetings starting in [starts_from, starts_to) together with
+    city, time slot and the member list aggregated into arrays, in a single query.
+    meeting_ids optionally restricts the result to the given meetings.
+    """
+    async with pool.acquire() as conn:
+        return await conn.fetch('''
+            SELECT m.id, m.name, m.meeting_date, m.meeting_time, m.venue, m.venue_address,
+                   c.name AS city_name,
+                   ts.day_of_week AS slot_day, ts.start_time AS slot_start, ts.end_time AS slot_end,
+                   mem.member_ids, mem.member_names, mem.member_surnames
+            FROM meetings m
+            JOIN cities c ON c.id = m.city_id
+            LEFT JOIN LATERAL (
+                SELECT ts.day_of_week, ts.start_time, ts.end_time
+                FROM meeting_time_slots mts
+                JOIN time_slots ts ON ts.id = mts.time_slot_id
+                WHERE mts.meeting_id = m.id
+                LIMIT 1
+            ) ts ON TRUE
+            JOIN LATERAL (
+                SELECT array_agg(u.id ORDER BY u.name, u.surname) AS member_ids,
+                       array_agg(u.name ORDER BY u.name, u.surname) AS member_names,
+                       array_agg(u.surname ORDER BY u.name, u.surname) AS member_surnames
+                FROM meeting_members mm
+                JOIN users u ON u.id = mm.user_id
+                WHERE mm.meeting_id = m.id
+            ) mem ON mem.member_ids IS NOT NULL
+            WHERE m.status = 'confirmed'
+              AND m.meeting_date BETWEEN $1::timestamp::date AND $2::timestamp::date
+              AND m.meeting_date + m.meeting_time >= $1::timestamp
+              AND m.meeting_date + m.meeting_time < $2::timestamp
+              AND ($3::int[] IS NULL OR m.id = ANY($3::int[]))
+            ORDER BY m.meeting_date, m.meeting_time, m.id
+        ''', starts_from, starts_to, meeting_ids)
+
+async def get_meeting_start_times(starts_from, starts_to, meeting_ids=None):
+    """Get id and start timestamp of confirmed meetings starting in [starts_from, starts_to)"""
+    async with pool.acquire() as conn:
+        return await conn.fetch('''
+            SELECT m.id, m.meeting_date + m.meeting_time AS starts_at
+            FROM meetings m
+            WHERE m.status = 'confirmed'
+              AND m.meeting_date BETWEEN $1::timestamp::date AND $2::timestamp::date
+              AND m.meeting_date + m.meeting_time >= $1::timestamp
+              AND m.meeting_date + m.meeting_time < $2::timestamp
+              AND ($3::int[] IS NULL OR m.id = ANY($3::int[]))
+        ''', starts_from, starts_to, meeting_ids)
+
+async def enqueue_reminders(kind, reminders):
+    """
+    Queue reminders that have not been sent yet.
+    reminders: list of (meeting_id, user_id, text).
+    The reminder_log insert and the notifications insert run as one statement,
+    so a reminder is either recorded and queued or neither. Returns the number queued.
+    """
+    if not reminders:
+        return 0
+    meeting_ids, user_ids, texts = zip(*reminders)
+    async with pool.acquire() as conn:
+        rows = await conn.fetch('''
+            WITH candidates AS (
+                SELECT * FROM unnest($1::int[], $2::bigint[], $3::text[]) AS c(meeting_id, user_id, text)
+            ), logged AS (
+                INSERT INTO reminder_log (meeting_id, user_id, kind)
+                SELECT meeting_id, user_id, $4 FROM candidates
+                ON CONFLICT (meeting_id, user_id, kind) DO NOTHING
+                RETURNING meeting_id, user_id
+            )
+            INSERT INTO notifications (user_id, text, kind)
+            SELECT c.user_id, c.text, 'reminder'
+            FROM candidates c
+            JOIN logged l ON l.meeting_id = c.meeting_id AND l.user_id = c.user_id
+            RETURNING id
+        ''', list(meeting_ids), list(user_ids), list(texts), kind)
+        return len(rows)
+
+# Query statistics
+async def get_statement_stats(limit=10):
+    """
+    Top statements by total execution time from pg_stat_statements, i.e. the queries
+    of every bot and service on this database. Empty if the extension is not available.
+    """
+    async with pool.acquire() as conn:
+        try:
+            return await conn.fetch('''
+                SELECT s.query, s.calls, s.total_exec_time, s.max_exec_time
+                FROM pg_stat_statements s
+                WHERE s.dbid = (SELECT oid FROM pg_database WHERE datname = current_database())
+                ORDER BY s.total_exec_time DESC
+                LIMIT $1
+            ''', limit)
+        except (asyncpg.exceptions.UndefinedTableError, asyncpg.exceptions.ObjectNotInPrerequisiteStateError):
+            # CREATE EXTENSION pg_stat_statements not run, or not in shared_preload_libraries
+            return []
+
 # --- ЗАГЛУШКИ ДЛЯ ВОССТАНОВЛЕНИЯ РАБОТОСПОСОБНОСТИ ---
 # TODO: Реализовать эти функции на новой архитектуре (meetings/applications)
 
@@ -881,9 +1190,32 @@ async def get_pending_applications_by_city(city_id):
     Возвращает все заявки для заданного города со статусом 'pending' с расширенными данными (user, timeslot, city).
     """
     async with pool.acquire() as conn:
-        rows = await conn.fetch('''
-            SELECT 
-                a.*, 
+        rows = await conn.fetch_prepared('get_pending_applications_by_city', city_id)
+        return [dict(row) for row in rows]
+
+async def get_pending_applications_page(city_id, after_id=None, before_id=None, limit=config.ADMIN_PAGE_SIZE):
+    """
+    Страница заявок 'pending' для города в порядке (created_at, id), как get_pending_applications_by_city.
+    Курсор — id заявки: after_id — следующая страница, before_id — предыдущая.
+    Если заявку-курсор успели удалить, возвращается первая страница.
+    Возвращает (rows, has_prev, has_next).
+    """
+    backwards = before_id is not None
+    cursor = before_id if backwards else after_id
+    condition = ''
+    params = [city_id, limit + 1]
+    order = 'DESC' if backwards else 'ASC'
+    async with pool.acquire() as conn:
+        if cursor is not None:
+            cursor_row = await conn.fetchrow('SELECT created_at, id FROM applications WHERE id = $1', cursor)
+            if cursor_row is None:
+                backwards, cursor, order = False, None, 'ASC'
+            else:
+                condition = f"AND (a.created_at, a.id) {'<' if backwards else '>'} ($3, $4)"
+                params += [cursor_row['created_at'], cursor_row['id']]
+        rows = await conn.fetch(f'''
+            SELECT
+                a.*,
                 u.name AS user_name, u.surname AS user_surname, u.username AS user_username, u.age AS user_age, u.registration_date, u.status AS user_status,
                 ts.id AS timeslot_id, ts.day_of_week, ts.start_time AS time,
                 c.id AS city_id, c.name AS city_name
@@ -892,9 +1224,22 @@ async def get_pending_applications_by_city(city_id):
             JOIN time_slots ts ON a.time_slot_id = ts.id
             JOIN cities c ON ts.city_id = c.id
             WHERE ts.city_id = $1 AND a.status = 'pending' AND u.status != 'rejected' AND u.status != 'banned'
-            ORDER BY a.created_at
+            {condition}
+            ORDER BY a.created_at {order}, a.id {order}
+            LIMIT $2
+        ''', *params)
+    return _keyset_page(rows, limit, backwards, cursor is not None)
+
+async def count_pending_applications_by_city(city_id):
+    """Количество заявок 'pending' для города (для заголовка постраничного списка)"""
+    async with pool.acquire() as conn:
+        return await conn.fetchval('''
+            SELECT COUNT(*)
+            FROM applications a
+            JOIN users u ON a.user_id = u.id
+            JOIN time_slots ts ON a.time_slot_id = ts.id
+            WHERE ts.city_id = $1 AND a.status = 'pending' AND u.status != 'rejected' AND u.status != 'banned'
         ''', city_id)
-        return [dict(row) for row in rows]
 
 async def get_pending_applications_by_timeslot(city_id, time_slot_id):
     """
@@ -0,0 +1,155 @@
+import json
+import logging
+import time as time_module
+from datetime import date, datetime, time, timedelta
+from typing import Any, Dict, Optional
+
+from aiogram.fsm.state import State
+from aiogram.fsm.storage.base import BaseStorage, StorageKey, StateType
+
+import config
+from database.db import get_pool
+
+logger = logging.getLogger(__name__)
+
+# FSM data holds dates and times (meeting_date, timeslot_time, ...); JSON has no such types,
+# so they are written as {"__date__": "2026-10-17"} and turned back on read
+_TAGS = (("__datetime__", datetime), ("__date__", date), ("__time__", time))
+
+def _default(value):
+    for tag, kind in _TAGS:
+        if isinstance(value, kind):
+            return {tag: value.isoformat()}
+    if isinstance(value, (set, tuple)):
+        return list(value)
+    raise TypeError(f"Object of type {type(value).__name__} is not JSON serializable")
+
+def _object_hook(obj):
+    if len(obj) == 1:
+        for tag, kind in _TAGS:
+            if tag in obj:
+                return kind.fromisoformat(obj[tag])
+    return obj
+
+def dumps_fsm_data(data):
+    """Compact JSON for FSM data, keeping date/time/datetime values"""
+    return json.dumps(data, default=_default, ensure_ascii=False, separators=(",", ":"))
+
+def loads_fsm_data(payload):
+    return json.loads(payload, object_hook=_object_hook)
+
+def _state_name(state: StateType) -> Optional[str]:
+    return state.state if isinstance(state, State) else state
+
+class PostgresStorage(BaseStorage):
+    """
+    aiogram FSM storage in the fsm_storage table, shared by every replica of a bot.
+
+    One row per (bot, chat, user[, thread, destiny]) written with an UPSERT; data is
+    JSONB. A cleared context deletes its row, and rows untouched for ttl seconds are
+    purged, at most once per purge_interval, by whichever process writes first.
+    """
+
+    def __init__(self, ttl=config.FSM_STATE_TTL, purge_interval=config.FSM_PURGE_INTERVAL):
+        self.ttl = ttl
+        self.purge_interval = purge_interval
+        self._next_purge = time_module.monotonic() + purge_interval
+
+    @staticmethod
+    def _key(key: StorageKey):
+        return key.bot_id, key.chat_id, key.user_id, key.thread_id or 0, key.destiny
+
+    async def _maybe_purge(self, conn):
+        if not self.ttl or time_module.monotonic() < self._next_purge:
+            return
+        self._next_purge = time_module.monotonic() + self.purge_interval
+        result = await conn.execute('''
+            DELETE FROM fsm_storage WHERE updated_at < $1
+        ''', datetime.now() - timedelta(seconds=self.ttl))
+        logger.info(f"Purged expired FSM records: {result}")
+
+    async def set_state(self, key: StorageKey, state: StateType = None) -> None:
+        pool = await get_pool()
+        async with pool.acquire() as conn:
+            await conn.execute('''
+                INSERT INTO fsm_storage (bot_id, chat_id, user_id, thread_id, destiny, state, updated_at)
+                VALUES ($1, $2, $3, $4, $5, $6, now())
+                ON CONFLICT (bot_id, chat_id, user_id, thread_id, destiny) DO UPDATE
+                SET state = EXCLUDED.state, updated_at = EXCLUDED.updated_at
+            ''', *self._key(key), _state_name(state))
+            await self._maybe_purge(conn)
+
+    async def get_state(self, key: StorageKey) -> Optional[str]:
+        pool = await get_pool()
+        async with pool.acquire() as conn:
+            return await conn.fetchval('''
+                SELECT state FROM fsm_storage
+                WHERE bot_id = $1 AND chat_id = $2 AND user_id = $3 AND thread_id = $4 AND destiny = $5
+            ''', *self._key(key))
+
+    async def set_data(self, key: StorageKey, data: Dict[str, Any]) -> None:
+        pool = await get_pool()
+        async with pool.acquire() as conn:
+            if not data:
+                # state.clear(): set_state(None) then set_data({}) - nothing left to keep
+                await conn.execute('''
+                    WITH gone AS (
+                        DELETE FROM fsm_storage
+                        WHERE bot_id = $1 AND chat_id = $2 AND user_id = $3 AND thread_id = $4 AND destiny = $5
+                          AND state IS NULL
+                        RETURNING 1
+                    )
+                    UPDATE fsm_storage SET data = '{}'::jsonb, updated_at = now()
+                    WHERE bot_id = $1 AND chat_id = $2 AND user_id = $3 AND thread_id = $4 AND destiny = $5
+                      AND NOT EXISTS (SELECT 1 FROM gone)
+                ''', *self._key(key))
+                return
+            await conn.execute('''
+                INSERT INTO fsm_storage (bot_id, chat_id, user_id, thread_id, destiny, data, updated_at)
+                VALUES ($1, $2, $3, $4, $5, $6::jsonb, now())
+                ON CONFLICT (bot_id, chat_id, user_id, thread_id, destiny) DO UPDATE
+                SET data = EXCLUDED.data, updated_at = EXCLUDED.updated_at
+            ''', *self._key(key), dumps_fsm_data(data))
+            await self._maybe_purge(conn)
+
+    async def get_data(self, key: StorageKey) -> Dict[str, Any]:
+        pool = await get_pool()
+        async with pool.acquire() as conn:
+            payload = await conn.fetchval('''
+                SELECT data::text FROM fsm_storage
+                WHERE bot_id = $1 AND chat_id = $2 AND user_id = $3 AND thread_id = $4 AND destiny = $5
+            ''', *self._key(key))
+        return loads_fsm_data(payload) if payload else {}
+
+    async def close(self) -> None:
+        # The pool belongs to database.db and is closed by close_db()
+        pass
+
+def create_redis_storage(url=None, redis=None):
+    """
+    aiogram's RedisStorage with the same date-aware JSON as PostgresStorage.
+    Works with any Redis-compatible server (Redis, Valkey, KeyDB); redis is an existing
+    client to use instead of url (database/tests_fsm_storage.py passes fakeredis).
+    Needs the redis package.
+    """
+    try:
+        from aiogram.fsm.storage.redis import RedisStorage
+    except ImportError as e:
+        raise RuntimeError("FSM_STORAGE=redis needs the redis package (pip install redis)") from e
+    ttl = config.FSM_STATE_TTL or None
+    options = dict(state_ttl=ttl, data_ttl=ttl, json_dumps=dumps_fsm_data, json_loads=loads_fsm_data)
+    if redis is not None:
+        return RedisStorage(redis, **options)
+    return RedisStorage.from_url(url or config.REDIS_URL, **options)
+
+def create_fsm_storage(backend=None):
+    """FSM storage for a dispatcher according to config.FSM_STORAGE (postgres, redis or memory)"""
+    backend = (backend or config.FSM_STORAGE).lower()
+    if backend == "postgres":
+        return PostgresStorage()
+    if backend == "redis":
+        return create_redis_storage()
+    if backend == "memory":
+        from aiogram.fsm.storage.memory import MemoryStorage
+        return MemoryStorage()
+    raise ValueError(f"Unknown FSM_STORAGE: {backend}")
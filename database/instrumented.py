@@ -0,0 +1,83 @@
+import time
+
+# Connection methods that send a query; *_prepared take a statement name from STATEMENTS
+QUERY_METHODS = frozenset({
+    "execute", "executemany", "fetch", "fetchrow", "fetchval",
+    "fetch_prepared", "fetchrow_prepared", "fetchval_prepared",
+    "copy_records_to_table",
+})
+
+# observer(method, query, args, duration) is called after every query;
+# method "acquire" reports the time spent waiting for a pooled connection (query is None)
+_observers = []
+
+def add_query_observer(observer):
+    """Register a callback for every query sent through the instrumented pool"""
+    if observer not in _observers:
+        _observers.append(observer)
+
+def _notify(method, query, args, duration):
+    for observer in _observers:
+        observer(method, query, args, duration)
+
+def _timed(method, func):
+    async def timed(query, *args, **kwargs):
+        started = time.perf_counter()
+        try:
+            return await func(query, *args, **kwargs)
+        finally:
+            _notify(method, query, args, time.perf_counter() - started)
+    return timed
+
+class InstrumentedConnection:
+    """Connection proxy that reports every query to the observers"""
+
+    def __init__(self, conn):
+        self._conn = conn
+
+    def __getattr__(self, name):
+        attr = getattr(self._conn, name)
+        if name in QUERY_METHODS and _observers:
+            return _timed(name, attr)
+        return attr
+
+class _AcquireContext:
+    def __init__(self, context):
+        self._context = context
+
+    async def __aenter__(self):
+        started = time.perf_counter()
+        conn = await self._context.__aenter__()
+        if _observers:
+            _notify("acquire", None, (), time.perf_counter() - started)
+        return InstrumentedConnection(conn)
+
+    async def __aexit__(self, exc_type, exc, tb):
+        return await self._context.__aexit__(exc_type, exc, tb)
+
+    def __await__(self):
+        conn = yield from self._context.__await__()
+        return InstrumentedConnection(conn)
+
+class InstrumentedPool:
+    """
+    asyncpg pool proxy: acquire() hands out InstrumentedConnection, queries run
+    on the pool itself are timed too. Everything else goes to the real pool.
+    """
+
+    def __init__(self, pool):
+        self._pool = pool
+
+    def acquire(self, *args, **kwargs):
+        return _AcquireContext(self._pool.acquire(*args, **kwargs))
+
+    async def release(self, connection, *args, **kwargs):
+        if isinstance(connection, InstrumentedConnection):
+            connection = connection._conn
+        return await self._pool.release(connection, *args, **kwargs)
+
+    def __getattr__(self, name):
+        attr = getattr(self._pool, name)
+        if name in QUERY_METHODS and _observers:
+            return _timed(name, attr)
+        return attr
@@ -0,0 +1,88 @@
+import asyncio
+import json
+import logging
+
+from database.cache import reference_cache
+from database.db import connect_db
+
+logger = logging.getLogger(__name__)
+
+# Channel filled by the notify_meeting_change() trigger on meetings and meeting_members
+MEETING_CHANGES_CHANNEL = "meeting_changes"
+# Channel filled by the notify_reference_change() trigger on the cached reference tables
+REFERENCE_CHANGES_CHANNEL = "reference_changes"
+
+class ChangeListener:
+    """
+    LISTEN on a dedicated connection (outside the shared pool) and pass change
+    events to registered async handlers.
+
+    handler(payload) receives the decoded JSON payload: {"table", "op", "meeting_id"}
+    on meeting_changes, {"table"} on reference_changes.
+    reconnect handler() is called after every (re)connect, because notifications sent
+    while the connection was down are lost and caches have to be rebuilt.
+    """
+
+    def __init__(self, channel=MEETING_CHANGES_CHANNEL, reconnect_delay=5):
+        self.channel = channel
+        self.reconnect_delay = reconnect_delay
+        self._handlers = []
+        self._reconnect_handlers = []
+        self._queue = asyncio.Queue()
+
+    def add_handler(self, handler):
+        self._handlers.append(handler)
+
+    def add_reconnect_handler(self, handler):
+        self._reconnect_handlers.append(handler)
+
+    def _on_notification(self, connection, pid, channel, payload):
+        try:
+            self._queue.put_nowait(json.loads(payload))
+        except ValueError:
+            logger.error(f"Invalid payload on {channel}: {payload}")
+
+    async def _dispatch(self):
+        """Deliver events one at a time so handlers see them in commit order"""
+        while True:
+            payload = await self._queue.get()
+            for handler in self._handlers:
+                try:
+                    await handler(payload)
+                except Exception as e:
+                    logger.error(f"Error handling {self.channel} event {payload}: {e}")
+
+    async def _listen_once(self):
+        conn = await connect_db()
+        closed = asyncio.Event()
+        conn.add_termination_listener(lambda connection: closed.set())
+        try:
+            await conn.add_listener(self.channel, self._on_notification)
+            logger.info(f"Listening on channel {self.channel}")
+            for handler in self._reconnect_handlers:
+                await handler()
+            await closed.wait()
+        finally:
+            if not conn.is_closed():
+                await conn.close()
+
+    async def run(self):
+        """Keep the LISTEN connection open, reconnecting after failures"""
+        dispatcher = asyncio.create_task(self._dispatch())
+        try:
+            while True:
+                try:
+                    await self._listen_once()
+                    logger.warning(f"Listener connection for {self.channel} closed")
+                except Exception as e:
+                    logger.error(f"Listener on {self.channel} failed: {e}")
+                await asyncio.sleep(self.reconnect_delay)
+        finally:
+            dispatcher.cancel()
+
+def create_reference_listener():
+    """Listener that drops this process's reference cache entries when another process changes a table"""
+    listener = ChangeListener(REFERENCE_CHANGES_CHANNEL)
+    listener.add_handler(reference_cache.handle_change)
+    listener.add_reconnect_handler(reference_cache.handle_reconnect)
+    return listener
@@ -1,7 +1,8 @@
 from sqlalchemy import (
     Column, Integer, BigInteger, String, Text, Boolean,
-    Date, Time, DateTime, ForeignKey, UniqueConstraint, func
+    Date, Time, DateTime, ForeignKey, UniqueConstraint, Index, func, text as sa_text
 )
+from sqlalchemy.dialects.postgresql import JSONB
 from sqlalchemy.ext.declarative import declarative_base
 from sqlalchemy.orm import relationship
 from datetime import datetime
@@ -50,7 +51,10 @@ class TimeSlot(Base):
     updated_at = Column(DateTime, onupdate=func.now())
     
     # Unique constraint for day and times
-    __table_args__ = (UniqueConstraint('day_of_week', 'start_time', 'end_time', name='_day_time_range_uc'),)
+    __table_args__ = (
+        UniqueConstraint('day_of_week', 'start_time', 'end_time', name='_day_time_range_uc'),
+        Index('ix_time_slots_city_active', 'city_id', 'active'),
+    )
     
     # Relationships
     meetings = relationship("Meeting", secondary="meeting_time_slots", back_populates="timeslots")
@@ -94,6 +98,12 @@ class Application(Base):
     created_at = Column(DateTime, default=func.now())
     status = Column(String(20), nullable=False, default="pending")  # pending, approved, rejected, inactive, assigned, completed
     
+    # Admin screens only list pending applications, per time slot, oldest first
+    __table_args__ = (
+        Index('ix_applications_pending_time_slot', 'time_slot_id', 'created_at', postgresql_where=sa_text("status = 'pending'")),
+        Index('ix_applications_status_time_slot', 'status', 'time_slot_id'),
+    )
+    
     # Relationships
     user = relationship("User", back_populates="application")
     timeslot = relationship("TimeSlot")
@@ -126,6 +136,14 @@ class Meeting(Base):
     status = Column(String(50), default="planned")  # planned, confirmed, completed, cancelled
     created_by = Column(BigInteger, ForeignKey("admins.id"), nullable=True)
     created_at = Column(DateTime, default=func.now())
+    # Maintained by the meeting_members_count trigger, never written by the app
+    member_count = Column(Integer, nullable=False, default=0, server_default="0")
+    
+    __table_args__ = (
+        Index('ix_meetings_date_status', 'meeting_date', 'status'),
+        Index('ix_meetings_city_date', 'city_id', 'meeting_date'),
+        Index('ix_meetings_city_member_count', 'city_id', 'member_count'),
+    )
     
     # Relationships
     city = relationship("City", back_populates="meetings")
@@ -144,7 +162,10 @@ class MeetingMember(Base):
     added_by = Column(BigInteger, ForeignKey("admins.id"), nullable=True)
     
     # Unique constraint for meeting and user
-    __table_args__ = (UniqueConstraint('meeting_id', 'user_id', name='_meeting_user_uc'),)
+    __table_args__ = (
+        UniqueConstraint('meeting_id', 'user_id', name='_meeting_user_uc'),
+        Index('ix_meeting_members_user_id', 'user_id'),
+    )
     
     # Relationships
     meeting = relationship("Meeting", back_populates="members")
@@ -193,4 +214,58 @@ class AvailableDate(Base):
     timeslot = relationship("TimeSlot", backref="available_dates")
     
     # Unique constraint for date and timeslot
-    __table_args__ = (UniqueConstraint('date', 'time_slot_id', name='_date_timeslot_uc'),)
\ No newline at end of file
+    __table_args__ = (
+        UniqueConstraint('date', 'time_slot_id', name='_date_timeslot_uc'),
+        Index('ix_available_dates_time_slot_date', 'time_slot_id', 'date'),
+        Index('ix_available_dates_available', 'date', postgresql_where=sa_text("is_available = true")),
+    )
+
+class Notification(Base):
+    """Outbox of messages waiting to be delivered to users by the bot"""
+    __tablename__ = "notifications"
+    
+    id = Column(Integer, primary_key=True)
+    user_id = Column(BigInteger, ForeignKey("users.id", ondelete="CASCADE"), nullable=False)
+    text = Column(Text, nullable=False)
+    kind = Column(String(50))  # approved, rejected, reminder
+    status = Column(String(20), nullable=False, server_default="pending")  # pending, sending, sent, failed
+    attempts = Column(Integer, nullable=False, server_default="0")
+    last_error = Column(Text)
+    next_attempt_at = Column(DateTime, nullable=False, server_default=func.now())
+    locked_at = Column(DateTime)
+    created_at = Column(DateTime, server_default=func.now())
+    sent_at = Column(DateTime)
+    
+    # Partial index used by the dispatcher to claim due rows
+    __table_args__ = (
+        Index('ix_notifications_due', 'next_attempt_at', postgresql_where=sa_text("status IN ('pending', 'sending')")),
+    )
+
+class ReminderLog(Base):
+    """Ledger of reminders already queued, so each one is sent exactly once"""
+    __tablename__ = "reminder_log"
+    
+    id = Column(Integer, primary_key=True)
+    meeting_id = Column(Integer, ForeignKey("meetings.id", ondelete="CASCADE"), nullable=False)
+    user_id = Column(BigInteger, ForeignKey("users.id", ondelete="CASCADE"), nullable=False)
+    kind = Column(String(50), nullable=False)  # day_before, hour_before
+    created_at = Column(DateTime, server_default=func.now())
+    
+    # One reminder of each kind per member of a meeting
+    __table_args__ = (UniqueConstraint('meeting_id', 'user_id', 'kind', name='_reminder_meeting_user_kind_uc'),)
+
+class FsmRecord(Base):
+    """Persisted aiogram FSM state and data of one (bot, chat, user)"""
+    __tablename__ = "fsm_storage"
+    
+    bot_id = Column(BigInteger, primary_key=True)
+    chat_id = Column(BigInteger, primary_key=True)
+    user_id = Column(BigInteger, primary_key=True)
+    thread_id = Column(BigInteger, primary_key=True, server_default="0")
+    destiny = Column(String(50), primary_key=True, server_default="default")
+    state = Column(String(255))
+    data = Column(JSONB, nullable=False, server_default=sa_text("'{}'::jsonb"))
+    updated_at = Column(DateTime, nullable=False, server_default=func.now())
+    
+    # Expired rows are purged by updated_at
+    __table_args__ = (Index('ix_fsm_storage_updated_at', 'updated_at'),)
@@ -0,0 +1,42 @@
+import config
+from database.statements import PreparedConnection, PgBouncerConnection, init_connection
+
+def get_connection_kwargs():
+    """Server address and credentials from config.py"""
+    return {
+        "host": config.DB_HOST,
+        "port": config.DB_PORT,
+        "database": config.DB_NAME,
+        "user": config.DB_USER,
+        "password": config.DB_PASSWORD,
+    }
+
+def get_listen_connection_kwargs():
+    """Like get_connection_kwargs(), but pointing at the server directly (LISTEN does not survive PgBouncer)"""
+    kwargs = get_connection_kwargs()
+    kwargs.update(host=config.DB_LISTEN_HOST, port=config.DB_LISTEN_PORT)
+    return kwargs
+
+def get_pool_kwargs(role=None):
+    """
+    Keyword arguments for asyncpg.create_pool for a service role (main.py mode).
+    Unknown or missing roles get DB_POOL_MIN_SIZE/DB_POOL_MAX_SIZE.
+    """
+    min_size, max_size = config.DB_POOL_SIZES.get(role, (config.DB_POOL_MIN_SIZE, config.DB_POOL_MAX_SIZE))
+    kwargs = get_connection_kwargs()
+    kwargs.update(
+        min_size=min(min_size, max_size),
+        max_size=max_size,
+        timeout=config.DB_POOL_TIMEOUT,
+        max_inactive_connection_lifetime=config.DB_MAX_INACTIVE_CONNECTION_LIFETIME,
+    )
+    if config.DB_PGBOUNCER_MODE:
+        # Named statements would land on random server connections behind PgBouncer
+        kwargs.update(statement_cache_size=0, connection_class=PgBouncerConnection)
+    else:
+        kwargs.update(
+            statement_cache_size=config.DB_STATEMENT_CACHE_SIZE,
+            connection_class=PreparedConnection,
+            init=init_connection,  # Prepare the hot statements on every new connection
+        )
+    return kwargs
@@ -0,0 +1,95 @@
+import logging
+
+import asyncpg
+
+logger = logging.getLogger(__name__)
+
+# Named statements for the hottest queries (run on almost every Telegram update).
+# They are prepared once per pooled connection in the pool's init hook.
+STATEMENTS = {
+    "get_user": '''
+        SELECT * FROM users WHERE id = $1
+    ''',
+    "get_pending_applications_by_city": '''
+        SELECT
+            a.*,
+            u.name AS user_name, u.surname AS user_surname, u.username AS user_username, u.age AS user_age, u.registration_date, u.status AS user_status,
+            ts.id AS timeslot_id, ts.day_of_week, ts.start_time AS time,
+            c.id AS city_id, c.name AS city_name
+        FROM applications a
+        JOIN users u ON a.user_id = u.id
+        JOIN time_slots ts ON a.time_slot_id = ts.id
+        JOIN cities c ON ts.city_id = c.id
+        WHERE ts.city_id = $1 AND a.status = 'pending' AND u.status != 'rejected' AND u.status != 'banned'
+        ORDER BY a.created_at
+    ''',
+    "get_meeting_members": '''
+        SELECT mm.*, u.name, u.surname, u.username
+        FROM meeting_members mm
+        JOIN users u ON mm.user_id = u.id
+        WHERE mm.meeting_id = $1
+        ORDER BY mm.added_at
+    ''',
+}
+
+class PreparedConnection(asyncpg.Connection):
+    """
+    asyncpg connection that keeps the registered statements prepared.
+
+    Use fetch_prepared()/fetchrow_prepared()/fetchval_prepared() with a statement name
+    from STATEMENTS. If a statement was not prepared (or its plan was invalidated by a
+    schema change) it is prepared again on the spot.
+    """
+
+    def _registry(self):
+        prepared = getattr(self, "_prepared_statements", None)
+        if prepared is None:
+            prepared = self._prepared_statements = {}
+        return prepared
+
+    async def prepare_registered(self):
+        """Prepare every statement from STATEMENTS on this connection"""
+        registry = self._registry()
+        for name, query in STATEMENTS.items():
+            registry[name] = await self.prepare(query)
+
+    async def _statement(self, name, refresh=False):
+        registry = self._registry()
+        statement = registry.get(name)
+        if statement is None or refresh:
+            statement = registry[name] = await self.prepare(STATEMENTS[name])
+        return statement
+
+    # PgBouncerConnection turns this off and sends the statement text every time
+    use_registry = True
+
+    async def _run_prepared(self, method, name, args):
+        if not self.use_registry:
+            return await getattr(self, method)(STATEMENTS[name], *args)
+        statement = await self._statement(name)
+        try:
+            return await getattr(statement, method)(*args)
+        except asyncpg.exceptions.InvalidCachedStatementError:
+            # Inside a transaction the error already aborted it, so there is nothing to retry
+            if self.is_in_transaction():
+                raise
+            logger.info(f"Prepared statement {name} invalidated, preparing again")
+            statement = await self._statement(name, refresh=True)
+            return await getattr(statement, method)(*args)
+
+    async def fetch_prepared(self, name, *args):
+        return await self._run_prepared("fetch", name, args)
+
+    async def fetchrow_prepared(self, name, *args):
+        return await self._run_prepared("fetchrow", name, args)
+
+    async def fetchval_prepared(self, name, *args):
+        return await self._run_prepared("fetchval", name, args)
+
+class PgBouncerConnection(PreparedConnection):
+    """Connection for PgBouncer transaction pooling: registered statements are not prepared"""
+    use_registry = False
+
+async def init_connection(conn):
+    """Pool init hook: prepare the registered statements on a new connection"""
+    await conn.prepare_registered()
@@ -0,0 +1,63 @@
+import pytest
+import pytest_asyncio  # Для корректной работы @pytest.mark.asyncio
+from datetime import date, datetime, time
+
+from aiogram.fsm.storage.base import StorageKey
+
+from database.fsm_storage import create_redis_storage, dumps_fsm_data, loads_fsm_data
+
+# Данные, которые admin flows кладут в FSM: даты, время, списки id
+FSM_DATA = {
+    'city_id': 3,
+    'meeting_date': date(2026, 10, 17),
+    'meeting_time': time(19, 30),
+    'created_at': datetime(2026, 10, 17, 18, 5, 42, 123456),
+    'smart_selected_users': [101, 102],
+    'venue': 'Кафе «Пять стульев»',
+    'nested': {'date': date(2026, 1, 1), 'note': None},
+}
+
+KEY = StorageKey(bot_id=1, chat_id=42, user_id=42)
+
+def test_codec_round_trip():
+    """date/time/datetime возвращаются теми же типами, остальное — как есть."""
+    assert loads_fsm_data(dumps_fsm_data(FSM_DATA)) == FSM_DATA
+
+def test_codec_keeps_types():
+    data = loads_fsm_data(dumps_fsm_data(FSM_DATA))
+    # datetime — подкласс date, поэтому проверяем точный тип
+    assert type(data['meeting_date']) is date
+    assert type(data['meeting_time']) is time
+    assert type(data['created_at']) is datetime
+
+def test_codec_tuples_and_sets_become_lists():
+    """В JSON нет кортежей и множеств: они читаются обратно как списки."""
+    data = loads_fsm_data(dumps_fsm_data({'slot': (1, date(2026, 10, 17)), 'ids': {5}}))
+    assert data == {'slot': [1, date(2026, 10, 17)], 'ids': [5]}
+
+def test_codec_leaves_plain_dicts_alone():
+    """Словарь с одним ключом, не являющимся тегом, не превращается в дату."""
+    assert loads_fsm_data(dumps_fsm_data({'x': {'__other__': '2026-10-17'}})) == {'x': {'__other__': '2026-10-17'}}
+
+def test_codec_rejects_unknown_types():
+    with pytest.raises(TypeError):
+        dumps_fsm_data({'value': object()})
+
+@pytest.mark.asyncio
+async def test_redis_storage_on_fakeredis():
+    """RedisStorage с нашим кодеком на fakeredis: состояние, данные и очистка."""
+    fakeredis = pytest.importorskip("fakeredis")
+    storage = create_redis_storage(redis=fakeredis.aioredis.FakeRedis())
+    try:
+        await storage.set_state(KEY, "MeetingManagementStates:create_venue")
+        await storage.set_data(KEY, FSM_DATA)
+        assert await storage.get_state(KEY) == "MeetingManagementStates:create_venue"
+        assert await storage.get_data(KEY) == FSM_DATA
+
+        # state.clear()
+        await storage.set_state(KEY, None)
+        await storage.set_data(KEY, {})
+        assert await storage.get_state(KEY) is None
+        assert await storage.get_data(KEY) == {}
+    finally:
+        await storage.close()
@@ -0,0 +1,120 @@
+import logging
+import os
+import re
+import signal
+import sys
+from functools import lru_cache
+
+import config
+from database.instrumented import add_query_observer
+from database.statements import STATEMENTS
+
+logger = logging.getLogger(__name__)
+
+# Frames of these files are wrappers; the caller is the first frame outside them
+_WRAPPER_FILES = {
+    os.path.join("database", name) for name in ("instrumented.py", "tracing.py", "statements.py")
+}
+
+_COMMENT_RE = re.compile(r"--[^\n]*")
+_STRING_RE = re.compile(r"'(?:[^']|'')*'")
+_NUMBER_RE = re.compile(r"(?<![\w$.])\d+(?:\.\d+)?\b")
+_SPACE_RE = re.compile(r"\s+")
+
+@lru_cache(maxsize=2048)
+def normalize_sql(query):
+    """One-line SQL with literals replaced by ?, so the same statement is counted once"""
+    query = _COMMENT_RE.sub(" ", query)
+    query = _STRING_RE.sub("?", query)
+    query = _NUMBER_RE.sub("?", query)
+    return _SPACE_RE.sub(" ", query).strip()
+
+def _statement_text(method, query):
+    if method.endswith("_prepared"):
+        # query is the name of a registered statement
+        return f"[{query}] {normalize_sql(STATEMENTS.get(query, ''))}"
+    if method == "copy_records_to_table":
+        return f"COPY {query}"
+    return normalize_sql(query)
+
+def _caller():
+    """function (file:line) of the first frame outside the pool wrappers"""
+    frame = sys._getframe(2)
+    while frame is not None:
+        filename = frame.f_code.co_filename
+        if not any(filename.endswith(wrapper) for wrapper in _WRAPPER_FILES):
+            return f"{frame.f_code.co_name} ({os.path.basename(filename)}:{frame.f_lineno})"
+        frame = frame.f_back
+    return "unknown"
+
+class QueryStats:
+    """
+    Calls, total and max duration per normalised statement. At most max_statements
+    are tracked; statements first seen after that are counted under "<other>".
+    """
+
+    OTHER = "<other>"
+
+    def __init__(self, max_statements=config.DB_QUERY_STATS_MAX_STATEMENTS):
+        self.max_statements = max_statements
+        self._stats = {}  # statement -> [calls, total seconds, max seconds]
+
+    def record(self, statement, duration):
+        entry = self._stats.get(statement)
+        if entry is None:
+            if len(self._stats) >= self.max_statements:
+                statement = self.OTHER
+            entry = self._stats.setdefault(statement, [0, 0.0, 0.0])
+        entry[0] += 1
+        entry[1] += duration
+        entry[2] = max(entry[2], duration)
+
+    def top(self, n, by="total"):
+        """[(statement, calls, total, max)] sorted by total time, calls or max time"""
+        column = {"calls": 0, "total": 1, "max": 2}[by]
+        rows = sorted(self._stats.items(), key=lambda item: item[1][column], reverse=True)
+        return [(statement, *entry) for statement, entry in rows[:n]]
+
+    def reset(self):
+        self._stats.clear()
+
+query_stats = QueryStats()
+
+def _trace_query(method, query, args, duration):
+    slow = duration * 1000 >= config.DB_SLOW_QUERY_MS
+    if method == "acquire":
+        if slow:
+            logger.warning(f"Slow pool acquire: waited {duration * 1000:.1f} ms in {_caller()}")
+        return
+    statement = _statement_text(method, query)
+    query_stats.record(statement, duration)
+    if slow:
+        logger.warning(
+            f"Slow query: {duration * 1000:.1f} ms, {method}, {len(args)} params, "
+            f"in {_caller()}: {statement}"
+        )
+
+def format_query_stats(n=config.DB_QUERY_STATS_TOP, width=None):
+    """Text report of the statements with the most total time and the most calls"""
+    def line(statement, calls, total, longest):
+        if width and len(statement) > width:
+            statement = statement[:width - 1] + "…"
+        return f"{calls} calls, {total * 1000:.0f} ms total, {longest * 1000:.0f} ms max: {statement}"
+
+    lines = [f"Top {n} statements by total time:"]
+    lines += [line(*row) for row in query_stats.top(n, by="total")] or ["(no queries yet)"]
+    lines += ["", f"Top {n} statements by calls:"]
+    lines += [line(*row) for row in query_stats.top(n, by="calls")] or ["(no queries yet)"]
+    return "\n".join(lines)
+
+def _dump_query_stats():
+    logger.info("Query stats (SIGUSR1)\n" + format_query_stats())
+
+def install_query_tracing(loop=None):
+    """Start the slow-query log and statement stats; SIGUSR1 writes the stats to the log"""
+    add_query_observer(_trace_query)
+    if loop is not None and hasattr(signal, "SIGUSR1"):
+        try:
+            loop.add_signal_handler(signal.SIGUSR1, _dump_query_stats)
+        except (NotImplementedError, RuntimeError) as e:
+            logger.warning(f"SIGUSR1 query stats dump not available: {e}")
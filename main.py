@@ -1,13 +1,25 @@
+import argparse
 import asyncio
 import logging
+import signal
 import sys
 from aiogram import Bot, Dispatcher
-from aiogram.fsm.storage.memory import MemoryStorage
 from aiogram.types import BotCommand
 
-from config import USER_BOT_TOKEN, ADMIN_BOT_TOKEN
+from config import (
+    USER_BOT_TOKEN, ADMIN_BOT_TOKEN, USER_BOT_WORKERS,
+    WEBHOOK_BASE_URL, WEBHOOK_HOST, WEBHOOK_PORT, WEBHOOK_USER_PATH, WEBHOOK_ADMIN_PATH,
+    WEBHOOK_SECRET, WEBHOOK_SET_ON_STARTUP, WEBHOOK_HANDLE_IN_BACKGROUND,
+    REFERENCE_CACHE_LISTEN, METRICS_PORTS
+)
 from database.db import init_db, close_db
+from database.cache import reference_cache
+from database.fsm_storage import create_fsm_storage
+from database.listener import create_reference_listener
 from services.notification_service import run_notification_service
+from services.outbox_service import run_outbox_dispatcher
+from utils.metrics import start_metrics_server
+from utils.rate_limiter import create_bot
 
 # Configure logging
 import os
@@ -54,36 +66,188 @@ async def set_admin_bot_commands(bot: Bot):
     ]
     await bot.set_my_commands(commands)
 
+def build_user_dispatcher():
+    """User bot and a dispatcher with all user handlers registered"""
+    from user_bot import setup_user_bot
+    
+    bot = create_bot(USER_BOT_TOKEN)
+    dp = Dispatcher(storage=create_fsm_storage())
+    setup_user_bot(dp)
+    return bot, dp
+
+def build_admin_dispatcher():
+    """Admin bot and a dispatcher with all admin handlers registered"""
+    from admin_bot import setup_admin_bot
+    
+    bot = create_bot(ADMIN_BOT_TOKEN)
+    dp = Dispatcher(storage=create_fsm_storage())
+    setup_admin_bot(dp)
+    return bot, dp
+
+async def on_webhook_startup(bot: Bot, dispatcher: Dispatcher, webhook_path: str, set_commands):
+    """Dispatcher startup hook in webhook mode: bot commands and webhook registration"""
+    await set_commands(bot)
+    if not WEBHOOK_SET_ON_STARTUP:
+        return
+    if not WEBHOOK_BASE_URL:
+        logger.warning("WEBHOOK_BASE_URL is not set, webhook is not registered with Telegram")
+        return
+    url = f"{WEBHOOK_BASE_URL.rstrip('/')}{webhook_path}"
+    await bot.set_webhook(
+        url,
+        secret_token=WEBHOOK_SECRET or None,
+        allowed_updates=dispatcher.resolve_used_update_types(),
+    )
+    logger.info(f"Webhook set: {url}")
+
+async def run_webhook():
+    """Serve both bots from one aiohttp app, each on its own path (WEBHOOK_* in config.py)"""
+    from aiohttp import web
+    from aiogram.webhook.aiohttp_server import SimpleRequestHandler, setup_application
+    
+    async def healthz(request):
+        return web.Response(text="ok")
+    
+    app = web.Application()
+    app.router.add_get("/healthz", healthz)
+    
+    bots = (
+        (build_user_dispatcher(), WEBHOOK_USER_PATH, set_user_bot_commands),
+        (build_admin_dispatcher(), WEBHOOK_ADMIN_PATH, set_admin_bot_commands),
+    )
+    for (bot, dp), path, set_commands in bots:
+        SimpleRequestHandler(
+            dispatcher=dp,
+            bot=bot,
+            secret_token=WEBHOOK_SECRET or None,
+            handle_in_background=WEBHOOK_HANDLE_IN_BACKGROUND,
+        ).register(app, path=path)
+        dp.startup.register(on_webhook_startup)
+        # Starts/stops the dispatcher together with the app and closes the bot session
+        setup_application(app, dp, bot=bot, webhook_path=path, set_commands=set_commands)
+    
+    # Load the admin list before the first update arrives
+    await reference_cache.get('admins')
+    
+    runner = web.AppRunner(app)
+    await runner.setup()
+    await web.TCPSite(runner, WEBHOOK_HOST, WEBHOOK_PORT).start()
+    logger.info(f"Webhook server listening on {WEBHOOK_HOST}:{WEBHOOK_PORT} ({WEBHOOK_USER_PATH}, {WEBHOOK_ADMIN_PATH})")
+    try:
+        await asyncio.Event().wait()
+    finally:
+        await runner.cleanup()
+
+async def run_all():
+    """
+    Both bots, the notification service (reminders and the daily available dates
+    update) and the outbox dispatcher as tasks on one event loop. They share the
+    connection pool, the reference cache and the rate limiter of this process.
+    """
+    user_bot, user_dp = build_user_dispatcher()
+    admin_bot, admin_dp = build_admin_dispatcher()
+    
+    # Load the admin list before the first update arrives
+    await reference_cache.get('admins')
+    
+    await set_user_bot_commands(user_bot)
+    await set_admin_bot_commands(admin_bot)
+    for bot in (user_bot, admin_bot):
+        # A webhook left over from webhook mode would block getUpdates
+        await bot.delete_webhook()
+    
+    # Signals are handled here once for all components, not by each dispatcher
+    stop = asyncio.Event()
+    loop = asyncio.get_running_loop()
+    for sig in (signal.SIGINT, signal.SIGTERM):
+        loop.add_signal_handler(sig, stop.set)
+    
+    tasks = {
+        asyncio.create_task(user_dp.start_polling(user_bot, handle_signals=False)): "user bot",
+        asyncio.create_task(admin_dp.start_polling(admin_bot, handle_signals=False)): "admin bot",
+        # Notifications go out through the user bot
+        asyncio.create_task(run_notification_service(user_bot)): "notification service",
+        asyncio.create_task(run_outbox_dispatcher(user_bot)): "outbox dispatcher",
+    }
+    stopper = asyncio.create_task(stop.wait())
+    logger.info("All components started")
+    
+    try:
+        done, _ = await asyncio.wait([*tasks, stopper], return_when=asyncio.FIRST_COMPLETED)
+        # Either a signal arrived or one component stopped; the others are stopped too
+        for task in done:
+            if task is not stopper:
+                error = None if task.cancelled() else task.exception()
+                logger.error(f"{tasks[task]} stopped: {error!r}")
+    finally:
+        for task in [*tasks, stopper]:
+            task.cancel()
+        await asyncio.gather(*tasks, stopper, return_exceptions=True)
+        await user_bot.session.close()
+        await admin_bot.session.close()
+
+def parse_workers(args):
+    """--workers N for user mode (default USER_BOT_WORKERS)"""
+    parser = argparse.ArgumentParser(prog="main.py user")
+    parser.add_argument("--workers", type=int, default=USER_BOT_WORKERS,
+                        help="worker processes; updates are sharded between them by chat id")
+    return max(parser.parse_args(args).workers, 1)
+
+async def run_user_supervisor(workers):
+    """User bot split over worker processes; this process only polls and routes updates"""
+    from user_bot.supervisor import run_supervisor
+    
+    # Built here only for the bot commands and the update types the handlers use
+    bot, dp = build_user_dispatcher()
+    try:
+        await set_user_bot_commands(bot)
+        # A webhook left over from webhook mode would block getUpdates
+        await bot.delete_webhook()
+    finally:
+        await bot.session.close()
+    
+    await run_supervisor(USER_BOT_TOKEN, workers, dp.resolve_used_update_types())
+
 async def main():
     """Main function to start both bots"""
     # Check command line arguments
     if len(sys.argv) < 2:
-        print("Usage: python main.py [user|admin|notification]")
+        print("Usage: python main.py [user [--workers N]|admin|notification|webhook|all]")
         return
     
     mode = sys.argv[1].lower()
     
+    if mode == "user":
+        workers = parse_workers(sys.argv[2:])
+        if workers > 1:
+            # The workers open their own pools, the supervisor needs none
+            logger.info(f"Starting user bot with {workers} worker processes")
+            await run_user_supervisor(workers)
+            return
+    
     # Initialize database connection
-    await init_db()
+    await init_db(role=mode)
+    
+    # /metrics stays on METRICS_HOST, also in webhook mode: the webhook server is public
+    metrics_runner = await start_metrics_server(METRICS_PORTS.get(mode, 0))
+    
+    # Bot processes drop cached cities/time slots/... as soon as another process changes them
+    reference_listener = None
+    if REFERENCE_CACHE_LISTEN and mode in ("user", "admin", "webhook", "all"):
+        reference_listener = asyncio.create_task(create_reference_listener().run())
     
     try:
         if mode == "user":
             # Start user bot
             logger.info("Starting user bot")
-            
-            # Initialize bot and dispatcher
-            bot = Bot(token=USER_BOT_TOKEN)
-            dp = Dispatcher(storage=MemoryStorage())
-            
-            # Import and setup user bot
-            from user_bot import setup_user_bot
-            
-            # Register all user handlers
-            setup_user_bot(dp)
+            bot, dp = build_user_dispatcher()
             
             # Set bot commands
             await set_user_bot_commands(bot)
             
+            # A webhook left over from webhook mode would block getUpdates
+            await bot.delete_webhook()
+            
             # Start polling
             logger.info("User bot started")
             await dp.start_polling(bot)
@@ -91,20 +255,17 @@ async def main():
         elif mode == "admin":
             # Start admin bot
             logger.info("Starting admin bot")
+            bot, dp = build_admin_dispatcher()
             
-            # Initialize bot and dispatcher
-            bot = Bot(token=ADMIN_BOT_TOKEN)
-            dp = Dispatcher(storage=MemoryStorage())
-            
-            # Import and setup admin bot
-            from admin_bot import setup_admin_bot
-            
-            # Register all admin handlers
-            setup_admin_bot(dp)
+            # Load the admin list before the first update arrives
+            await reference_cache.get('admins')
             
             # Set bot commands
             await set_admin_bot_commands(bot)
             
+            # A webhook left over from webhook mode would block getUpdates
+            await bot.delete_webhook()
+            
             # Start polling
             logger.info("Admin bot started")
             await dp.start_polling(bot)
@@ -114,20 +275,37 @@ async def main():
             logger.info("Starting notification service")
             
             # Initialize bot
-            bot = Bot(token=USER_BOT_TOKEN)
+            bot = create_bot(USER_BOT_TOKEN)
+            
+            # Run notification service and outbox dispatcher side by side
+            await asyncio.gather(
+                run_notification_service(bot),
+                run_outbox_dispatcher(bot)
+            )
+            
+        elif mode == "all":
+            # Everything in one process: for small deployments
+            logger.info("Starting user bot, admin bot and notification service in one process")
+            await run_all()
             
-            # Run notification service
-            await run_notification_service(bot)
+        elif mode == "webhook":
+            # Both bots behind one HTTP server instead of long polling
+            logger.info("Starting bots in webhook mode")
+            await run_webhook()
             
         else:
             logger.error(f"Unknown mode: {mode}")
-            print("Usage: python main.py [user|admin|notification]")
+            print("Usage: python main.py [user [--workers N]|admin|notification|webhook|all]")
     
     except (KeyboardInterrupt, SystemExit):
         logger.info("Bot stopped")
     except Exception as e:
         logger.exception(f"Error: {e}")
     finally:
+        if reference_listener is not None:
+            reference_listener.cancel()
+        if metrics_runner is not None:
+            await metrics_runner.cleanup()
         # Close database connection
         await close_db()
 
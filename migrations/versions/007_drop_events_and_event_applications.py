@@ -1,7 +1,7 @@
 """drop events and event_applications tables
 
 Revision ID: 007_drop_events_and_event_applications
-Revises: <укажи предыдущий revision id>
+Revises: 0b1e5c7a2d14
 Create Date: 2024-06-07 00:00:00.000000
 
 """
@@ -9,13 +9,14 @@ from alembic import op
 
 # revision identifiers, used by Alembic.
 revision = '007_drop_events_and_event_applications'
-down_revision = None
+down_revision = '0b1e5c7a2d14'
 branch_labels = None
 depends_on = None
 
 def upgrade():
-    op.drop_table('event_applications')
-    op.drop_table('events')
+    # A database created from the migrations never had these tables
+    op.execute('DROP TABLE IF EXISTS event_applications')
+    op.execute('DROP TABLE IF EXISTS events')
 
 def downgrade():
     # Если потребуется откат, можно восстановить таблицы вручную (структуру можно взять из старых миграций)
@@ -0,0 +1,168 @@
+"""create base schema
+
+Revision ID: 0b1e5c7a2d14
+Revises:
+Create Date: 2026-10-17 18:02:11.540219
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = '0b1e5c7a2d14'
+down_revision = None
+branch_labels = None
+depends_on = None
+
+
+# The tables as they were before 007, so that `alembic upgrade head` works on an empty
+# database. Databases created by the old create_all already have them and are past
+# this revision; skipping existing tables keeps it harmless if it is ever run on one.
+def upgrade() -> None:
+    # The next revision id, 007_drop_events_and_event_applications, does not fit into
+    # Alembic's default VARCHAR(32)
+    op.alter_column('alembic_version', 'version_num',
+               existing_type=sa.String(length=32),
+               type_=sa.String(length=64))
+
+    existing = set(sa.inspect(op.get_bind()).get_table_names())
+
+    def create_table(name, *columns):
+        if name not in existing:
+            op.create_table(name, *columns)
+
+    create_table('users',
+    sa.Column('id', sa.BigInteger(), nullable=False),
+    sa.Column('username', sa.String(length=255), nullable=True),
+    sa.Column('name', sa.String(length=255), nullable=False),
+    sa.Column('surname', sa.String(length=255), nullable=False),
+    sa.Column('age', sa.Integer(), nullable=True),
+    sa.Column('registration_date', sa.DateTime(), nullable=True),
+    sa.Column('status', sa.String(length=50), nullable=True),
+    sa.PrimaryKeyConstraint('id')
+    )
+    create_table('cities',
+    sa.Column('id', sa.Integer(), nullable=False),
+    sa.Column('name', sa.String(length=255), nullable=False),
+    sa.Column('active', sa.Boolean(), nullable=True),
+    sa.PrimaryKeyConstraint('id'),
+    sa.UniqueConstraint('name')
+    )
+    create_table('admins',
+    sa.Column('id', sa.BigInteger(), nullable=False),
+    sa.Column('username', sa.String(length=255), nullable=True),
+    sa.Column('name', sa.String(length=255), nullable=False),
+    sa.Column('added_at', sa.DateTime(), nullable=True),
+    sa.Column('is_superadmin', sa.Boolean(), nullable=True),
+    sa.PrimaryKeyConstraint('id')
+    )
+    # city_id is added by c88cc5b4af66
+    create_table('time_slots',
+    sa.Column('id', sa.Integer(), nullable=False),
+    sa.Column('day_of_week', sa.String(length=20), nullable=False),
+    sa.Column('start_time', sa.Time(), nullable=False),
+    sa.Column('end_time', sa.Time(), nullable=False),
+    sa.Column('active', sa.Boolean(), nullable=True),
+    sa.Column('created_at', sa.DateTime(), nullable=True),
+    sa.Column('updated_at', sa.DateTime(), nullable=True),
+    sa.PrimaryKeyConstraint('id'),
+    sa.UniqueConstraint('day_of_week', 'start_time', 'end_time', name='_day_time_range_uc')
+    )
+    create_table('questions',
+    sa.Column('id', sa.Integer(), nullable=False),
+    sa.Column('text', sa.Text(), nullable=False),
+    sa.Column('active', sa.Boolean(), nullable=True),
+    sa.Column('display_order', sa.Integer(), nullable=False),
+    sa.PrimaryKeyConstraint('id')
+    )
+    create_table('user_answers',
+    sa.Column('id', sa.Integer(), nullable=False),
+    sa.Column('user_id', sa.BigInteger(), nullable=False),
+    sa.Column('question_id', sa.Integer(), nullable=False),
+    sa.Column('answer', sa.Text(), nullable=False),
+    sa.Column('answered_at', sa.DateTime(), nullable=True),
+    sa.ForeignKeyConstraint(['question_id'], ['questions.id'], ondelete='CASCADE'),
+    sa.ForeignKeyConstraint(['user_id'], ['users.id'], ondelete='CASCADE'),
+    sa.PrimaryKeyConstraint('id'),
+    sa.UniqueConstraint('user_id', 'question_id', name='_user_question_uc')
+    )
+    # time_slot_id and status are added by 2d40e61dddd3 and ca961e6b0522
+    create_table('applications',
+    sa.Column('id', sa.Integer(), nullable=False),
+    sa.Column('user_id', sa.BigInteger(), nullable=False),
+    sa.Column('created_at', sa.DateTime(), nullable=True),
+    sa.ForeignKeyConstraint(['user_id'], ['users.id'], ondelete='CASCADE'),
+    sa.PrimaryKeyConstraint('id'),
+    sa.UniqueConstraint('user_id')
+    )
+    create_table('meetings',
+    sa.Column('id', sa.Integer(), nullable=False),
+    sa.Column('name', sa.String(length=255), nullable=False),
+    sa.Column('meeting_date', sa.Date(), nullable=False),
+    sa.Column('meeting_time', sa.Time(), nullable=False),
+    sa.Column('city_id', sa.Integer(), nullable=False),
+    sa.Column('venue', sa.String(length=255), nullable=False),
+    sa.Column('venue_address', sa.String(length=255), nullable=True),
+    sa.Column('status', sa.String(length=50), nullable=True),
+    sa.Column('created_by', sa.BigInteger(), nullable=True),
+    sa.Column('created_at', sa.DateTime(), nullable=True),
+    sa.ForeignKeyConstraint(['city_id'], ['cities.id'], ondelete='CASCADE'),
+    sa.ForeignKeyConstraint(['created_by'], ['admins.id']),
+    sa.PrimaryKeyConstraint('id')
+    )
+    # status is dropped by c88cc5b4af66
+    create_table('meeting_members',
+    sa.Column('id', sa.Integer(), nullable=False),
+    sa.Column('meeting_id', sa.Integer(), nullable=False),
+    sa.Column('user_id', sa.BigInteger(), nullable=False),
+    sa.Column('added_at', sa.DateTime(), nullable=True),
+    sa.Column('added_by', sa.BigInteger(), nullable=True),
+    sa.Column('status', sa.String(), server_default=sa.text("'confirmed'::character varying"), nullable=True),
+    sa.ForeignKeyConstraint(['added_by'], ['admins.id']),
+    sa.ForeignKeyConstraint(['meeting_id'], ['meetings.id'], ondelete='CASCADE'),
+    sa.ForeignKeyConstraint(['user_id'], ['users.id'], ondelete='CASCADE'),
+    sa.PrimaryKeyConstraint('id'),
+    sa.UniqueConstraint('meeting_id', 'user_id', name='_meeting_user_uc')
+    )
+    create_table('venues',
+    sa.Column('id', sa.Integer(), nullable=False),
+    sa.Column('name', sa.String(length=255), nullable=False),
+    sa.Column('address', sa.String(length=255), nullable=False),
+    sa.Column('city_id', sa.Integer(), nullable=False),
+    sa.Column('description', sa.Text(), nullable=True),
+    sa.Column('active', sa.Boolean(), nullable=True),
+    sa.Column('created_at', sa.DateTime(), nullable=True),
+    sa.ForeignKeyConstraint(['city_id'], ['cities.id'], ondelete='CASCADE'),
+    sa.PrimaryKeyConstraint('id')
+    )
+    # The unique constraints are renamed by c88cc5b4af66
+    create_table('meeting_time_slots',
+    sa.Column('id', sa.Integer(), nullable=False),
+    sa.Column('meeting_id', sa.Integer(), nullable=False),
+    sa.Column('time_slot_id', sa.Integer(), nullable=False),
+    sa.Column('created_at', sa.DateTime(), nullable=True),
+    sa.ForeignKeyConstraint(['meeting_id'], ['meetings.id'], ondelete='CASCADE'),
+    sa.ForeignKeyConstraint(['time_slot_id'], ['time_slots.id'], ondelete='CASCADE'),
+    sa.PrimaryKeyConstraint('id'),
+    sa.UniqueConstraint('meeting_id', 'time_slot_id', name='_meeting_time_slot_uc')
+    )
+    create_table('available_dates',
+    sa.Column('id', sa.Integer(), nullable=False),
+    sa.Column('date', sa.Date(), nullable=False),
+    sa.Column('time_slot_id', sa.Integer(), nullable=False),
+    sa.Column('is_available', sa.Boolean(), nullable=True),
+    sa.Column('created_at', sa.DateTime(), nullable=True),
+    sa.Column('updated_at', sa.DateTime(), nullable=True),
+    sa.ForeignKeyConstraint(['time_slot_id'], ['time_slots.id'], ondelete='CASCADE'),
+    sa.PrimaryKeyConstraint('id'),
+    sa.UniqueConstraint('date', 'time_slot_id', name='_date_time_slot_uc')
+    )
+
+
+def downgrade() -> None:
+    for table in (
+        'available_dates', 'meeting_time_slots', 'venues', 'meeting_members', 'meetings',
+        'applications', 'user_answers', 'questions', 'time_slots', 'admins', 'cities', 'users',
+    ):
+        op.drop_table(table)
@@ -0,0 +1,34 @@
+"""add reminder log
+
+Revision ID: 3b9f0d2e6a71
+Revises: 97ae1c71f44d
+Create Date: 2026-10-17 10:03:17.552904
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = '3b9f0d2e6a71'
+down_revision = '97ae1c71f44d'
+branch_labels = None
+depends_on = None
+
+
+def upgrade() -> None:
+    op.create_table('reminder_log',
+    sa.Column('id', sa.Integer(), nullable=False),
+    sa.Column('meeting_id', sa.Integer(), nullable=False),
+    sa.Column('user_id', sa.BigInteger(), nullable=False),
+    sa.Column('kind', sa.String(length=50), nullable=False),
+    sa.Column('created_at', sa.DateTime(), server_default=sa.text('now()'), nullable=True),
+    sa.ForeignKeyConstraint(['meeting_id'], ['meetings.id'], ondelete='CASCADE'),
+    sa.ForeignKeyConstraint(['user_id'], ['users.id'], ondelete='CASCADE'),
+    sa.PrimaryKeyConstraint('id'),
+    sa.UniqueConstraint('meeting_id', 'user_id', 'kind', name='_reminder_meeting_user_kind_uc')
+    )
+
+
+def downgrade() -> None:
+    op.drop_table('reminder_log')
@@ -0,0 +1,60 @@
+"""add meeting change notify triggers
+
+Revision ID: 6c1e4a8f2d95
+Revises: 3b9f0d2e6a71
+Create Date: 2026-10-17 11:20:44.918237
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = '6c1e4a8f2d95'
+down_revision = '3b9f0d2e6a71'
+branch_labels = None
+depends_on = None
+
+
+def upgrade() -> None:
+    # Каждое изменение встречи или состава участников публикуется в канал meeting_changes.
+    # Имя колонки с id встречи передаётся аргументом триггера (id для meetings, meeting_id для meeting_members).
+    # Одинаковые уведомления внутри одной транзакции PostgreSQL схлопывает сам.
+    op.execute("""
+        CREATE OR REPLACE FUNCTION notify_meeting_change() RETURNS trigger AS $$
+        DECLARE
+            new_id integer;
+            old_id integer;
+        BEGIN
+            IF TG_OP <> 'DELETE' THEN
+                new_id := (to_jsonb(NEW) ->> TG_ARGV[0])::integer;
+                PERFORM pg_notify('meeting_changes', json_build_object(
+                    'table', TG_TABLE_NAME, 'op', TG_OP, 'meeting_id', new_id)::text);
+            END IF;
+            IF TG_OP <> 'INSERT' THEN
+                old_id := (to_jsonb(OLD) ->> TG_ARGV[0])::integer;
+                IF new_id IS NULL OR old_id <> new_id THEN
+                    PERFORM pg_notify('meeting_changes', json_build_object(
+                        'table', TG_TABLE_NAME, 'op', TG_OP, 'meeting_id', old_id)::text);
+                END IF;
+            END IF;
+            RETURN NULL;
+        END;
+        $$ LANGUAGE plpgsql;
+    """)
+    op.execute("""
+        CREATE TRIGGER meetings_notify_change
+        AFTER INSERT OR UPDATE OR DELETE ON meetings
+        FOR EACH ROW EXECUTE PROCEDURE notify_meeting_change('id');
+    """)
+    op.execute("""
+        CREATE TRIGGER meeting_members_notify_change
+        AFTER INSERT OR UPDATE OR DELETE ON meeting_members
+        FOR EACH ROW EXECUTE PROCEDURE notify_meeting_change('meeting_id');
+    """)
+
+
+def downgrade() -> None:
+    op.execute("DROP TRIGGER IF EXISTS meeting_members_notify_change ON meeting_members")
+    op.execute("DROP TRIGGER IF EXISTS meetings_notify_change ON meetings")
+    op.execute("DROP FUNCTION IF EXISTS notify_meeting_change()")
@@ -0,0 +1,42 @@
+"""add notifications outbox
+
+Revision ID: 97ae1c71f44d
+Revises: ed00a1f09508
+Create Date: 2026-10-17 09:12:41.305118
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = '97ae1c71f44d'
+down_revision = 'ed00a1f09508'
+branch_labels = None
+depends_on = None
+
+
+def upgrade() -> None:
+    op.create_table('notifications',
+    sa.Column('id', sa.Integer(), nullable=False),
+    sa.Column('user_id', sa.BigInteger(), nullable=False),
+    sa.Column('text', sa.Text(), nullable=False),
+    sa.Column('kind', sa.String(length=50), nullable=True),
+    sa.Column('status', sa.String(length=20), server_default='pending', nullable=False),
+    sa.Column('attempts', sa.Integer(), server_default='0', nullable=False),
+    sa.Column('last_error', sa.Text(), nullable=True),
+    sa.Column('next_attempt_at', sa.DateTime(), server_default=sa.text('now()'), nullable=False),
+    sa.Column('locked_at', sa.DateTime(), nullable=True),
+    sa.Column('created_at', sa.DateTime(), server_default=sa.text('now()'), nullable=True),
+    sa.Column('sent_at', sa.DateTime(), nullable=True),
+    sa.ForeignKeyConstraint(['user_id'], ['users.id'], ondelete='CASCADE'),
+    sa.PrimaryKeyConstraint('id')
+    )
+    # Диспетчер выбирает только ожидающие отправки строки, поэтому индекс частичный
+    op.create_index('ix_notifications_due', 'notifications', ['next_attempt_at'], unique=False,
+                    postgresql_where=sa.text("status IN ('pending', 'sending')"))
+
+
+def downgrade() -> None:
+    op.drop_index('ix_notifications_due', table_name='notifications')
+    op.drop_table('notifications')
@@ -0,0 +1,41 @@
+"""add indexes for hot filters
+
+Revision ID: a4d7e2c91b08
+Revises: 6c1e4a8f2d95
+Create Date: 2026-10-17 13:41:09.207165
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = 'a4d7e2c91b08'
+down_revision = '6c1e4a8f2d95'
+branch_labels = None
+depends_on = None
+
+
+def upgrade() -> None:
+    # Заявки: админские экраны показывают только pending, по слоту, от старых к новым
+    op.create_index('ix_applications_pending_time_slot', 'applications', ['time_slot_id', 'created_at'], unique=False,
+                    postgresql_where=sa.text("status = 'pending'"))
+    op.create_index('ix_applications_status_time_slot', 'applications', ['status', 'time_slot_id'], unique=False)
+    op.create_index('ix_time_slots_city_active', 'time_slots', ['city_id', 'active'], unique=False)
+    op.create_index('ix_meetings_date_status', 'meetings', ['meeting_date', 'status'], unique=False)
+    op.create_index('ix_meetings_city_date', 'meetings', ['city_id', 'meeting_date'], unique=False)
+    op.create_index('ix_meeting_members_user_id', 'meeting_members', ['user_id'], unique=False)
+    op.create_index('ix_available_dates_time_slot_date', 'available_dates', ['time_slot_id', 'date'], unique=False)
+    op.create_index('ix_available_dates_available', 'available_dates', ['date'], unique=False,
+                    postgresql_where=sa.text("is_available = true"))
+
+
+def downgrade() -> None:
+    op.drop_index('ix_available_dates_available', table_name='available_dates')
+    op.drop_index('ix_available_dates_time_slot_date', table_name='available_dates')
+    op.drop_index('ix_meeting_members_user_id', table_name='meeting_members')
+    op.drop_index('ix_meetings_city_date', table_name='meetings')
+    op.drop_index('ix_meetings_date_status', table_name='meetings')
+    op.drop_index('ix_time_slots_city_active', table_name='time_slots')
+    op.drop_index('ix_applications_status_time_slot', table_name='applications')
+    op.drop_index('ix_applications_pending_time_slot', table_name='applications')
@@ -0,0 +1,44 @@
+"""add reference change notify triggers
+
+Revision ID: b7d3e9a1c4f2
+Revises: f3a9d61b7c20
+Create Date: 2026-10-17 18:40:27.615093
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = 'b7d3e9a1c4f2'
+down_revision = 'f3a9d61b7c20'
+branch_labels = None
+depends_on = None
+
+# Tables cached by database.cache.ReferenceCache in every bot process
+REFERENCE_TABLES = ('cities', 'time_slots', 'questions', 'venues', 'admins')
+
+
+def upgrade() -> None:
+    # Любое изменение справочника публикуется в канал reference_changes (один раз на оператор),
+    # чтобы процессы сбрасывали свой кэш сразу, а не по истечении REFERENCE_CACHE_TTL.
+    op.execute("""
+        CREATE OR REPLACE FUNCTION notify_reference_change() RETURNS trigger AS $$
+        BEGIN
+            PERFORM pg_notify('reference_changes', json_build_object('table', TG_TABLE_NAME)::text);
+            RETURN NULL;
+        END;
+        $$ LANGUAGE plpgsql;
+    """)
+    for table in REFERENCE_TABLES:
+        op.execute(f"""
+            CREATE TRIGGER {table}_notify_reference_change
+            AFTER INSERT OR UPDATE OR DELETE OR TRUNCATE ON {table}
+            FOR EACH STATEMENT EXECUTE PROCEDURE notify_reference_change();
+        """)
+
+
+def downgrade() -> None:
+    for table in REFERENCE_TABLES:
+        op.execute(f"DROP TRIGGER IF EXISTS {table}_notify_reference_change ON {table}")
+    op.execute("DROP FUNCTION IF EXISTS notify_reference_change()")
@@ -18,10 +18,11 @@ depends_on = None
 
 def upgrade() -> None:
     # ### commands auto generated by Alembic - please adjust! ###
-    op.drop_table('event_applications')
-    op.drop_table('group_members')
-    op.drop_table('events')
-    op.drop_table('groups')
+    # Already gone after 007 / never created on a fresh database
+    op.execute('DROP TABLE IF EXISTS event_applications')
+    op.execute('DROP TABLE IF EXISTS group_members')
+    op.execute('DROP TABLE IF EXISTS events')
+    op.execute('DROP TABLE IF EXISTS groups')
     op.drop_constraint('_date_time_slot_uc', 'available_dates', type_='unique')
     op.create_unique_constraint('_date_timeslot_uc', 'available_dates', ['date', 'time_slot_id'])
     op.drop_column('meeting_members', 'status')
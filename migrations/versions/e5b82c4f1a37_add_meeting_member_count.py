@@ -0,0 +1,81 @@
+"""add meeting member count
+
+Revision ID: e5b82c4f1a37
+Revises: a4d7e2c91b08
+Create Date: 2026-10-17 15:02:37.551904
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = 'e5b82c4f1a37'
+down_revision = 'a4d7e2c91b08'
+branch_labels = None
+depends_on = None
+
+
+def upgrade() -> None:
+    op.add_column('meetings', sa.Column('member_count', sa.Integer(), server_default='0', nullable=False))
+    op.execute("""
+        UPDATE meetings m
+        SET member_count = mm.cnt
+        FROM (SELECT meeting_id, COUNT(*) AS cnt FROM meeting_members GROUP BY meeting_id) mm
+        WHERE mm.meeting_id = m.id
+    """)
+    # "Встречи со свободными местами" — city_id + member_count < N
+    op.create_index('ix_meetings_city_member_count', 'meetings', ['city_id', 'member_count'], unique=False)
+
+    # Счётчик ведут триггеры на meeting_members, приложение его не пишет
+    op.execute("""
+        CREATE OR REPLACE FUNCTION maintain_meeting_member_count() RETURNS trigger AS $$
+        BEGIN
+            IF TG_OP = 'UPDATE' AND OLD.meeting_id = NEW.meeting_id THEN
+                RETURN NULL;
+            END IF;
+            IF TG_OP <> 'DELETE' THEN
+                UPDATE meetings SET member_count = member_count + 1 WHERE id = NEW.meeting_id;
+            END IF;
+            IF TG_OP <> 'INSERT' THEN
+                UPDATE meetings SET member_count = member_count - 1 WHERE id = OLD.meeting_id;
+            END IF;
+            RETURN NULL;
+        END;
+        $$ LANGUAGE plpgsql;
+    """)
+    op.execute("""
+        CREATE TRIGGER meeting_members_count
+        AFTER INSERT OR DELETE OR UPDATE OF meeting_id ON meeting_members
+        FOR EACH ROW EXECUTE PROCEDURE maintain_meeting_member_count();
+    """)
+
+    # Изменение одного только счётчика не должно публиковаться как изменение встречи:
+    # об изменении состава и так сообщает триггер на meeting_members
+    op.execute("DROP TRIGGER IF EXISTS meetings_notify_change ON meetings")
+    op.execute("""
+        CREATE TRIGGER meetings_notify_change
+        AFTER INSERT OR DELETE ON meetings
+        FOR EACH ROW EXECUTE PROCEDURE notify_meeting_change('id');
+    """)
+    op.execute("""
+        CREATE TRIGGER meetings_notify_update
+        AFTER UPDATE ON meetings
+        FOR EACH ROW
+        WHEN ((to_jsonb(OLD) - 'member_count') IS DISTINCT FROM (to_jsonb(NEW) - 'member_count'))
+        EXECUTE PROCEDURE notify_meeting_change('id');
+    """)
+
+
+def downgrade() -> None:
+    op.execute("DROP TRIGGER IF EXISTS meetings_notify_update ON meetings")
+    op.execute("DROP TRIGGER IF EXISTS meetings_notify_change ON meetings")
+    op.execute("""
+        CREATE TRIGGER meetings_notify_change
+        AFTER INSERT OR UPDATE OR DELETE ON meetings
+        FOR EACH ROW EXECUTE PROCEDURE notify_meeting_change('id');
+    """)
+    op.execute("DROP TRIGGER IF EXISTS meeting_members_count ON meeting_members")
+    op.execute("DROP FUNCTION IF EXISTS maintain_meeting_member_count()")
+    op.drop_index('ix_meetings_city_member_count', table_name='meetings')
+    op.drop_column('meetings', 'member_count')
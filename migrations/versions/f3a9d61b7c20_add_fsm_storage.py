@@ -0,0 +1,37 @@
+"""add fsm storage
+
+Revision ID: f3a9d61b7c20
+Revises: e5b82c4f1a37
+Create Date: 2026-10-17 16:18:52.304117
+
+"""
+from alembic import op
+import sqlalchemy as sa
+from sqlalchemy.dialects import postgresql
+
+
+# revision identifiers, used by Alembic.
+revision = 'f3a9d61b7c20'
+down_revision = 'e5b82c4f1a37'
+branch_labels = None
+depends_on = None
+
+
+def upgrade() -> None:
+    op.create_table('fsm_storage',
+    sa.Column('bot_id', sa.BigInteger(), nullable=False),
+    sa.Column('chat_id', sa.BigInteger(), nullable=False),
+    sa.Column('user_id', sa.BigInteger(), nullable=False),
+    sa.Column('thread_id', sa.BigInteger(), server_default='0', nullable=False),
+    sa.Column('destiny', sa.String(length=50), server_default='default', nullable=False),
+    sa.Column('state', sa.String(length=255), nullable=True),
+    sa.Column('data', postgresql.JSONB(astext_type=sa.Text()), server_default=sa.text("'{}'::jsonb"), nullable=False),
+    sa.Column('updated_at', sa.DateTime(), server_default=sa.text('now()'), nullable=False),
+    sa.PrimaryKeyConstraint('bot_id', 'chat_id', 'user_id', 'thread_id', 'destiny')
+    )
+    op.create_index('ix_fsm_storage_updated_at', 'fsm_storage', ['updated_at'], unique=False)
+
+
+def downgrade() -> None:
+    op.drop_index('ix_fsm_storage_updated_at', table_name='fsm_storage')
+    op.drop_table('fsm_storage')
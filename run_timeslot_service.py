@@ -57,25 +57,18 @@ async def run_daily(hour=0, minute=0):
         if should_run:
             # Run the timeslot service update
             logger.info("Running scheduled timeslot update")
-            result = await timeslot_service.update_available_dates()
+            result = await timeslot_service.update_available_dates(incremental=True)
             
             if result:
                 logger.info("Timeslot update successful")
             else:
                 logger.error("Timeslot update failed")
-            
-            # Run manual cleanup of old dates
-            try:
-                await timeslot_service.remove_old_available_dates()
-                logger.info("Old available dates removed")
-            except Exception as e:
-                logger.error(f"Error removing old available dates: {e}")
 
 async def run_now():
     """Run the timeslot service update immediately"""
     logger.info("Running immediate timeslot update")
     try:
-        await init_db()
+        await init_db(role="timeslot")
         result = await timeslot_service.update_available_dates()
         
         if result:
@@ -105,7 +98,7 @@ async def main():
     # No command line arguments, run in scheduled mode
     if len(sys.argv) == 1:
         try:
-            await init_db()
+            await init_db(role="timeslot")
             # Run scheduled task at 00:30 every day
             await run_daily(hour=0, minute=30)
         finally:
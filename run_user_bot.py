@@ -3,8 +3,8 @@ import sys
 import os
 import subprocess
 
-# Set the script name to pass to main.py
-sys.argv = ["main.py", "user"]
+# Set the script name to pass to main.py (extra arguments such as --workers N are passed on)
+sys.argv = ["main.py", "user", *sys.argv[1:]]
 
 # Import and run the main function
 from main import main
@@ -3,6 +3,8 @@ import asyncio
 from datetime import datetime, date, timedelta, time
 
 from database.db import get_pool, init_db, get_meeting_members
+from database.listener import ChangeListener
+from services.reminder_scheduler import ReminderScheduler
 from services.timeslot_service import timeslot_service  # Импортируем сервис таймслотов
 
 logger = logging.getLogger(__name__)
@@ -112,25 +114,19 @@ class NotificationService:
         if admin_notes:
             text += f"\n\n📝 Feedback from the organizer: {admin_notes}"
         
-        # Send the message with retry logic
-        max_retries = 3
-        for attempt in range(max_retries):
-            try:
-                pool_obj = await self._get_conn()
-                async with pool_obj.acquire() as conn:
-                    await conn.execute('''
-                        INSERT INTO notifications (user_id, text, status)
-                        VALUES ($1, $2, $3)
-                    ''', user_id, text, status)
-                self.logger.info(f"Successfully sent notification to user {user_id} (attempt {attempt+1})")
-                return True
-            except Exception as e:
-                self.logger.error(f"Failed to send notification to user {user_id} (attempt {attempt+1}): {e}")
-                if attempt < max_retries - 1:
-                    await asyncio.sleep(1)  # Wait before retrying
-                else:
-                    self.logger.error(f"All attempts to send notification to user {user_id} failed")
-                    return False
+        # Queue the message; the outbox dispatcher delivers and retries it
+        try:
+            pool_obj = await self._get_conn()
+            async with pool_obj.acquire() as conn:
+                await conn.execute('''
+                    INSERT INTO notifications (user_id, text, kind)
+                    VALUES ($1, $2, $3)
+                ''', user_id, text, status)
+            self.logger.info(f"Queued notification for user {user_id}")
+            return True
+        except Exception as e:
+            self.logger.error(f"Failed to queue notification for user {user_id}: {e}")
+            return False
     
     async def send_group_invitation(self, user_id, group):
         """Send a group invitation to a user"""
@@ -199,23 +195,17 @@ class NotificationService:
                 f"Use /my_meetings to see all your upcoming meetings."
             )
             
-            # Send the message with retry logic
-            max_retries = 3
-            for attempt in range(max_retries):
-                try:
-                    await conn.execute('''
-                        INSERT INTO notifications (user_id, text, status)
-                        VALUES ($1, $2, $3)
-                    ''', user_id, text, "approved")
-                    self.logger.info(f"Successfully sent meeting assignment to user {user_id} (attempt {attempt+1})")
-                    return True
-                except Exception as e:
-                    self.logger.error(f"Failed to send meeting assignment to user {user_id} (attempt {attempt+1}): {e}")
-                    if attempt < max_retries - 1:
-                        await asyncio.sleep(1)  # Wait before retrying
-                    else:
-                        self.logger.error(f"All attempts to send meeting assignment to user {user_id} failed")
-                        return False
+            # Queue the message; the outbox dispatcher delivers and retries it
+            try:
+                await conn.execute('''
+                    INSERT INTO notifications (user_id, text, kind)
+                    VALUES ($1, $2, $3)
+                ''', user_id, text, "approved")
+                self.logger.info(f"Queued meeting assignment for user {user_id}")
+                return True
+            except Exception as e:
+                self.logger.error(f"Failed to queue meeting assignment for user {user_id}: {e}")
+                return False
     
     async def send_meeting_update(self, user_id, meeting, message):
         """Send a meeting update to a user"""
@@ -238,68 +228,43 @@ class NotificationService:
         )
         await self.send_message(user_id, text)
     
-    async def send_day_before_reminder(self, user_id, meeting):
-        """Send a day before reminder to a user with time preference details"""
-        # Check if meeting includes time slot information
-        time_slot_info = ""
-        
-        # Try to get time slot information for this meeting
-        try:
-            pool_obj = await self._get_conn()
-            async with pool_obj.acquire() as conn:
-                time_slot = await conn.fetchrow('''
-                    SELECT ts.day_of_week, ts.start_time, ts.end_time
-                    FROM meeting_time_slots mts
-                    JOIN time_slots ts ON mts.time_slot_id = ts.id
-                    WHERE mts.meeting_id = $1
-                    LIMIT 1
-                ''', meeting['id'])
-                
-                if time_slot:
-                    time_slot_info = f"\n⏰ Time Preference: {time_slot['day_of_week']} {time_slot['start_time'].strftime('%H:%M')}-{time_slot['end_time'].strftime('%H:%M')}"
-        except Exception as e:
-            self.logger.error(f"Error retrieving time slot info for meeting {meeting['id']}: {e}")
-        
-        # Get other members of the meeting
+    def _format_time_slot(self, target, label):
+        """Time slot line for a reminder target, empty if the meeting has no slot"""
+        if not target['slot_day']:
+            return ""
+        return f"\n⏰ {label}: {target['slot_day']} {target['slot_start'].strftime('%H:%M')}-{target['slot_end'].strftime('%H:%M')}"
+
+    def format_day_before_reminder(self, user_id, target):
+        """Render a day before reminder for one member of a reminder target (see get_reminder_targets)"""
+        time_slot_info = self._format_time_slot(target, "Time Preference")
+
+        # Other members of the meeting
+        others = [
+            f"{name} {surname}"
+            for member_id, name, surname in zip(target['member_ids'], target['member_names'], target['member_surnames'])
+            if member_id != user_id
+        ]
         members_info = ""
-        try:
-            pool_obj = await self._get_conn()
-            async with pool_obj.acquire() as conn:
-                members = await conn.fetch('''
-                    SELECT u.id as user_id, u.name, u.surname
-                    FROM meeting_members mm
-                    JOIN users u ON mm.user_id = u.id
-                    WHERE mm.meeting_id = $1
-                    ORDER BY u.name, u.surname
-                ''', meeting['id'])
-                
-                if members:
-                    members_info = "\n\nOther participants:\n"
-                    count = 0
-                    for member in members:
-                        if member['user_id'] != user_id:  # Skip the current user
-                            count += 1
-                            if count <= 5:  # Limit to first 5 other members
-                                members_info += f"{count}. {member['name']} {member['surname']}\n"
-                    
-                    if count > 5:  # If there are more than 5 other members
-                        members_info += f"...and {count - 5} more\n"
-        except Exception as e:
-            self.logger.error(f"Error retrieving members for meeting {meeting['id']}: {e}")
-        
+        if others:
+            members_info = "\n\nOther participants:\n"
+            for i, full_name in enumerate(others[:5], start=1):  # Limit to first 5 other members
+                members_info += f"{i}. {full_name}\n"
+            if len(others) > 5:
+                members_info += f"...and {len(others) - 5} more\n"
+
         text = (
             f"⏰ Reminder: You have a meeting tomorrow!\n\n"
-            f"Meeting: {meeting['name']}\n"
-            f"📍 Location: {meeting['city_name']} - {meeting['venue']}"
+            f"Meeting: {target['name']}\n"
+            f"📍 Location: {target['city_name']} - {target['venue']}"
         )
-        
+
         # Add address if available
-        if meeting.get('venue_address'):
-            text += f"\n📌 Address: {meeting['venue_address']}"
-            
+        if target['venue_address']:
+            text += f"\n📌 Address: {target['venue_address']}"
+
         text += (
-            f"\n📅 Date: {meeting['meeting_date'].strftime('%A, %d.%m.%Y')}\n"
-            f"🕕 Time: {meeting['meeting_time'].strftime('%H:%M')}"
+            f"\n📅 Date: {target['meeting_date'].strftime('%A, %d.%m.%Y')}\n"
+            f"🕕 Time: {target['meeting_time'].strftime('%H:%M')}"
             f"{time_slot_info}"
             f"{members_info}\n\n"
             f"📋 Meeting Agenda:\n"
@@ -311,86 +276,32 @@ class NotificationService:
             f"We look forward to seeing you there!\n\n"
             f"Use /my_meetings to see details about all your upcoming meetings."
         )
-        
-        # Send the message with retry logic
-        max_retries = 3
-        for attempt in range(max_retries):
-            try:
-                pool_obj = await self._get_conn()
-                async with pool_obj.acquire() as conn:
-                    await conn.execute('''
-                        INSERT INTO notifications (user_id, text, status)
-                        VALUES ($1, $2, $3)
-                    ''', user_id, text, "reminder")
-                self.logger.info(f"Successfully sent day-before reminder to user {user_id} (attempt {attempt+1})")
-                return True
-            except Exception as e:
-                self.logger.error(f"Failed to send day-before reminder to user {user_id} (attempt {attempt+1}): {e}")
-                if attempt < max_retries - 1:
-                    await asyncio.sleep(1)  # Wait before retrying
-                else:
-                    self.logger.error(f"All attempts to send day-before reminder to user {user_id} failed")
-                    return False
-    
-    async def send_hour_before_reminder(self, user_id, meeting):
-        """Send an hour before reminder to a user with venue address and time preference details"""
-        # Try to get time slot information for this meeting
-        time_slot_info = ""
-        try:
-            pool_obj = await self._get_conn()
-            async with pool_obj.acquire() as conn:
-                time_slot = await conn.fetchrow('''
-                    SELECT ts.day_of_week, ts.start_time, ts.end_time
-                    FROM meeting_time_slots mts
-                    JOIN time_slots ts ON mts.time_slot_id = ts.id
-                    WHERE mts.meeting_id = $1
-                    LIMIT 1
-                ''', meeting['id'])
-                
-                if time_slot:
-                    time_slot_info = f"\n⏰ Scheduled preference: {time_slot['day_of_week']} {time_slot['start_time'].strftime('%H:%M')}-{time_slot['end_time'].strftime('%H:%M')}"
-        except Exception as e:
-            self.logger.error(f"Error retrieving time slot info for meeting {meeting['id']}: {e}")
-        
+        return text
+
+    def format_hour_before_reminder(self, user_id, target):
+        """Render an hour before reminder for one member of a reminder target"""
+        time_slot_info = self._format_time_slot(target, "Scheduled preference")
+
         text = (
             f"⏰ Reminder: You have a meeting in 1 hour!\n\n"
-            f"Meeting: {meeting['name']}\n"
-            f"📍 Location: {meeting['city_name']} - {meeting['venue']}"
+            f"Meeting: {target['name']}\n"
+            f"📍 Location: {target['city_name']} - {target['venue']}"
         )
-        
+
         # Add address if available
-        if meeting.get('venue_address'):
-            text += f"\n📌 Address: {meeting['venue_address']}"
-            
+        if target['venue_address']:
+            text += f"\n📌 Address: {target['venue_address']}"
+
         text += (
-            f"\n📅 Date: {meeting['meeting_date'].strftime('%A, %d.%m.%Y')}\n"
-            f"🕕 Time: {meeting['meeting_time'].strftime('%H:%M')}"
+            f"\n📅 Date: {target['meeting_date'].strftime('%A, %d.%m.%Y')}\n"
+            f"🕕 Time: {target['meeting_time'].strftime('%H:%M')}"
             f"{time_slot_info}\n\n"
             f"Please arrive 5-10 minutes early to get settled.\n"
             f"We're looking forward to a great discussion!\n"
             f"Don't be late!\n\n"
             f"Use /my_meetings for meeting details."
         )
-        
-        # Send the message with retry logic
-        max_retries = 3
-        for attempt in range(max_retries):
-            try:
-                pool_obj = await self._get_conn()
-                async with pool_obj.acquire() as conn:
-                    await conn.execute('''
-                        INSERT INTO notifications (user_id, text, status)
-                        VALUES ($1, $2, $3)
-                    ''', user_id, text, "reminder")
-                self.logger.info(f"Successfully sent hour-before reminder to user {user_id} (attempt {attempt+1})")
-                return True
-            except Exception as e:
-                self.logger.error(f"Failed to send hour-before reminder to user {user_id} (attempt {attempt+1}): {e}")
-                if attempt < max_retries - 1:
-                    await asyncio.sleep(1)  # Wait before retrying
-                else:
-                    self.logger.error(f"All attempts to send hour-before reminder to user {user_id} failed")
-                    return False
+        return text
 
     async def notify_user_added_to_meeting(self, user_id, meeting_id):
         """Notify a user that they've been added to a meeting based on time preferences"""
@@ -445,11 +356,7 @@ class NotificationService:
                 if i <= 5:  # Limit to 5 members for readability
                     member_list += f"{i}. {member['name']} {member['surname']}\n"
             
-            # Get total member count
-            total_members = await conn.fetchval(
-                'SELECT COUNT(*) FROM meeting_members WHERE meeting_id = $1',
-                meeting_id
-            )
+            total_members = meeting['member_count']
             
             if total_members > 6:  # If there are more members than we display
                 member_list += f"...and {total_members - 6} more\n"
@@ -475,25 +382,19 @@ class NotificationService:
             f"Use /my_meetings to see all your upcoming meetings."
         )
         
-        # Send the message with retry logic
-        max_retries = 3
-        for attempt in range(max_retries):
-            try:
-                pool_obj = await self._get_conn()
-                async with pool_obj.acquire() as conn:
-                    await conn.execute('''
-                        INSERT INTO notifications (user_id, text, status)
-                        VALUES ($1, $2, $3)
-                    ''', user_id, text, "approved")
-                self.logger.info(f"Successfully sent meeting assignment notification to user {user_id} (attempt {attempt+1})")
-                return True
-            except Exception as e:
-                self.logger.error(f"Failed to send meeting assignment to user {user_id} (attempt {attempt+1}): {e}")
-                if attempt < max_retries - 1:
-                    await asyncio.sleep(1)  # Wait before retrying
-                else:
-                    self.logger.error(f"All attempts to send meeting assignment to user {user_id} failed")
-                    return False
+        # Queue the message; the outbox dispatcher delivers and retries it
+        try:
+            pool_obj = await self._get_conn()
+            async with pool_obj.acquire() as conn:
+                await conn.execute('''
+                    INSERT INTO notifications (user_id, text, kind)
+                    VALUES ($1, $2, $3)
+                ''', user_id, text, "approved")
+            self.logger.info(f"Queued meeting assignment notification for user {user_id}")
+            return True
+        except Exception as e:
+            self.logger.error(f"Failed to queue meeting assignment for user {user_id}: {e}")
+            return False
     
     async def notify_user_removed_from_meeting(self, user_id, meeting_id):
         """Notify a user that they've been removed from a meeting"""
@@ -577,7 +478,7 @@ class NotificationService:
 async def run_notification_service(bot):
     """
     Run the notification service in the background.
-    This function starts periodic tasks for sending notifications.
+    Reminders are driven by the deadline scheduler; available dates are refreshed daily.
     """
     notification_service = NotificationService(bot)
     logger.info("Starting notification service...")
@@ -585,128 +486,36 @@ async def run_notification_service(bot):
     # Запуск первоначального обновления доступных дат
     await update_available_dates()
     
-    # Переменная для отслеживания последнего дня обновления доступных дат
-    last_update_day = date.today().day
+    scheduler = ReminderScheduler(notification_service)
     
+    # Изменения встреч приходят через LISTEN/NOTIFY и сразу перестраивают расписание
+    listener = ChangeListener()
+    listener.add_handler(scheduler.handle_change)
+    listener.add_reconnect_handler(scheduler.load)
+    
+    await asyncio.gather(
+        scheduler.run(),
+        listener.run(),
+        run_daily_available_dates_update()
+    )
+
+async def run_daily_available_dates_update():
+    """Обновляет доступные даты каждый день сразу после полуночи"""
     while True:
-        try:
-            # Проверка для ежедневного обновления доступных дат
-            current_day = date.today().day
-            if current_day != last_update_day:
-                await update_available_dates()
-                last_update_day = current_day
-            
-            # Send day before reminders
-            await send_day_before_reminders(notification_service)
-            
-            # Send hour before reminders
-            await send_hour_before_reminders(notification_service)
-            
-            # Wait for next check (every 5 minutes)
-            # More frequent checks reduce the chance of missing notifications
-            await asyncio.sleep(300)  # 5 minutes
-        except Exception as e:
-            logger.error(f"Error in notification service: {e}")
-            # Wait a bit before retrying
-            await asyncio.sleep(60)
+        now = datetime.now()
+        next_run = datetime.combine(now.date() + timedelta(days=1), time.min)
+        await asyncio.sleep((next_run - now).total_seconds())
+        await update_available_dates()
 
 async def update_available_dates():
-    """Обновляет доступные даты на ближайшие две недели"""
+    """Обновляет доступные даты в пределах скользящего окна"""
     try:
-        logger.info("Updating available dates for the next two weeks...")
-        result = await timeslot_service.update_available_dates()
+        logger.info("Updating available dates...")
+        # Инкрементально: удаляются прошедшие дни и добавляются только новые
+        result = await timeslot_service.update_available_dates(incremental=True)
         if result:
             logger.info("Available dates successfully updated")
-            # Также удаляем устаревшие даты
-            await timeslot_service.remove_old_available_dates()
         else:
             logger.error("Failed to update available dates")
     except Exception as e:
         logger.error(f"Error updating available dates: {e}")
-
-async def send_day_before_reminders(notification_service):
-    """Send reminders for meetings happening tomorrow"""
-    logger.info("Checking for meetings tomorrow...")
-    
-    # Calculate tomorrow's date
-    tomorrow = date.today() + timedelta(days=1)
-    
-    try:
-        # Check if pool is initialized
-        pool_obj = await get_pool()
-        if pool_obj is None:
-            logger.info("Database pool not initialized. Initializing...")
-            await init_db()
-            
-        # Get all confirmed meetings for tomorrow
-        async with pool_obj.acquire() as conn:
-            meetings = await conn.fetch('''
-                SELECT g.*, c.name as city_name
-                FROM meetings g
-                JOIN cities c ON g.city_id = c.id
-                WHERE g.meeting_date = $1 AND g.status = $2
-            ''', tomorrow, 'confirmed')
-        
-        for meeting in meetings:
-            # Get all members
-            members = await get_meeting_members(meeting['id'])
-            
-            # Send reminder to each member
-            for member in members:
-                await notification_service.send_day_before_reminder(
-                    member['user_id'], meeting
-                )
-            
-            logger.info(f"Sent day-before reminders for meeting {meeting['id']} to {len(members)} members")
-    except Exception as e:
-        logger.error(f"Error sending day-before reminders: {e}")
-
-async def send_hour_before_reminders(notification_service):
-    """Send reminders for meetings happening in the next hour"""
-    logger.info("Checking for meetings in the next hour...")
-    
-    # Calculate current date and time
-    now = datetime.now()
-    current_date = now.date()
-    current_time = now.time()
-    
-    # Calculate time range (next hour)
-    hour_later = (datetime.combine(date.today(), current_time) + timedelta(hours=1)).time()
-    
-    try:
-        # Check if pool is initialized
-        pool_obj = await get_pool()
-        if pool_obj is None:
-            logger.info("Database pool not initialized. Initializing...")
-            await init_db()
-            
-        # Get all confirmed meetings for today with times in the next hour
-        async with pool_obj.acquire() as conn:
-            meetings = await conn.fetch('''
-                SELECT g.*, c.name as city_name
-                FROM meetings g
-                JOIN cities c ON g.city_id = c.id
-                WHERE g.meeting_date = $1 AND g.status = $2
-                AND g.meeting_time BETWEEN $3 AND $4
-            ''', current_date, 'confirmed', current_time, hour_later)
-        
-        for meeting in meetings:
-            # Check if we're within 15 minutes of the hour mark to avoid duplicate notifications
-            meeting_datetime = datetime.combine(meeting['meeting_date'], meeting['meeting_time'])
-            time_diff = (meeting_datetime - now).total_seconds() / 60
-            
-            # Expanded time window to reduce chance of missing notifications
-            # Now checks if we're between 40 and 80 minutes before the meeting
-            if 40 <= time_diff <= 80:  # Within 20 minutes of the hour mark
-                # Get all members
-                members = await get_meeting_members(meeting['id'])
-                
-                # Send reminder to each member
-                for member in members:
-                    await notification_service.send_hour_before_reminder(
-                        member['user_id'], meeting
-                    )
-                
-                logger.info(f"Sent hour-before reminders for meeting {meeting['id']} to {len(members)} members")
-    except Exception as e:
-        logger.error(f"Error sending hour-before reminders: {e}")
\ No newline at end of file
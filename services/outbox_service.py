@@ -0,0 +1,95 @@
+import logging
+import asyncio
+from datetime import datetime, timedelta
+
+from aiogram.exceptions import TelegramRetryAfter, TelegramForbiddenError, TelegramBadRequest
+
+from database.db import claim_notifications, mark_notifications_sent, mark_notifications_failed
+from config import (
+    OUTBOX_BATCH_SIZE, OUTBOX_CONCURRENCY, OUTBOX_POLL_INTERVAL,
+    OUTBOX_MAX_ATTEMPTS, OUTBOX_LEASE_SECONDS
+)
+
+logger = logging.getLogger(__name__)
+
+class OutboxDispatcher:
+    """Delivers rows queued in the notifications table through the bot"""
+
+    def __init__(self, bot, batch_size=OUTBOX_BATCH_SIZE, concurrency=OUTBOX_CONCURRENCY,
+                 poll_interval=OUTBOX_POLL_INTERVAL, max_attempts=OUTBOX_MAX_ATTEMPTS,
+                 lease_seconds=OUTBOX_LEASE_SECONDS):
+        """Initialize with bot instance and delivery limits"""
+        self.bot = bot
+        self.batch_size = batch_size
+        self.poll_interval = poll_interval
+        self.max_attempts = max_attempts
+        self.lease_seconds = lease_seconds
+        self._semaphore = asyncio.Semaphore(concurrency)
+        self.logger = logging.getLogger(__name__)
+
+    def _retry_at(self, attempts, retry_after=None):
+        """Next attempt time: Telegram's retry_after if given, otherwise exponential backoff"""
+        if attempts >= self.max_attempts:
+            return None
+        if retry_after is not None:
+            delay = retry_after
+        else:
+            delay = min(30 * 2 ** (attempts - 1), 3600)
+        return datetime.now() + timedelta(seconds=delay)
+
+    async def _deliver(self, row):
+        """
+        Send one notification.
+        Returns None on success or (id, error, retry_at) on failure.
+        """
+        async with self._semaphore:
+            try:
+                await self.bot.send_message(row['user_id'], row['text'])
+                return None
+            except TelegramRetryAfter as e:
+                return (row['id'], str(e), self._retry_at(row['attempts'], e.retry_after))
+            except (TelegramForbiddenError, TelegramBadRequest) as e:
+                # The user blocked the bot or the chat does not exist - retrying will not help
+                return (row['id'], str(e), None)
+            except Exception as e:
+                return (row['id'], str(e), self._retry_at(row['attempts']))
+
+    async def dispatch_batch(self):
+        """Claim one batch of due notifications and deliver it. Returns the number of claimed rows"""
+        rows = await claim_notifications(self.batch_size, self.lease_seconds)
+        if not rows:
+            return 0
+
+        results = await asyncio.gather(*(self._deliver(row) for row in rows))
+
+        failures = [result for result in results if result is not None]
+        failed_ids = {failure[0] for failure in failures}
+        sent_ids = [row['id'] for row in rows if row['id'] not in failed_ids]
+
+        await mark_notifications_sent(sent_ids)
+        await mark_notifications_failed(failures)
+
+        self.logger.info(f"Outbox batch: claimed {len(rows)}, sent {len(sent_ids)}, failed {len(failures)}")
+        for notification_id, error, retry_at in failures:
+            if retry_at is None:
+                self.logger.error(f"Notification {notification_id} failed permanently: {error}")
+        return len(rows)
+
+    async def run(self):
+        """Drain the outbox continuously; sleep only when there is nothing left to claim"""
+        self.logger.info("Starting outbox dispatcher...")
+        while True:
+            try:
+                claimed = await self.dispatch_batch()
+            except Exception as e:
+                self.logger.error(f"Error in outbox dispatcher: {e}")
+                claimed = 0
+
+            # A full batch means more rows are probably waiting - continue without sleeping
+            if claimed < self.batch_size:
+                await asyncio.sleep(self.poll_interval)
+
+async def run_outbox_dispatcher(bot):
+    """Run the outbox dispatcher in the background"""
+    dispatcher = OutboxDispatcher(bot)
+    await dispatcher.run()
@@ -0,0 +1,173 @@
+import asyncio
+import heapq
+import itertools
+import logging
+import time as time_module
+from collections import defaultdict
+from datetime import datetime, timedelta
+
+from database.db import get_meeting_start_times, get_reminder_targets, enqueue_reminders
+from config import REMINDER_DAY_BEFORE, REMINDER_HOUR_BEFORE, REMINDER_RESYNC_INTERVAL
+
+logger = logging.getLogger(__name__)
+
+class ReminderScheduler:
+    """
+    Deadline-driven reminder scheduler.
+
+    Keeps a heap of (deadline, meeting, kind) entries for upcoming confirmed meetings
+    and sleeps until the earliest deadline. Meetings are refreshed one by one through
+    refresh_meeting()/remove_meeting(); a full reload every resync_interval is the
+    safety net for changes nobody reported. Superseded heap entries are not removed,
+    they are skipped when popped (their start time no longer matches).
+    Reloads and refreshes hold a lock, so a reload never overwrites a newer refresh.
+    """
+
+    def __init__(self, notification_service, resync_interval=REMINDER_RESYNC_INTERVAL):
+        """Initialize with the notification service used to render reminders"""
+        self.notification_service = notification_service
+        self.resync_interval = resync_interval
+        self.logger = logging.getLogger(__name__)
+
+        # kind -> (how long before the meeting, formatter)
+        self.kinds = {}
+        if REMINDER_DAY_BEFORE:
+            self.kinds["day_before"] = (timedelta(days=1), notification_service.format_day_before_reminder)
+        if REMINDER_HOUR_BEFORE:
+            self.kinds["hour_before"] = (timedelta(hours=1), notification_service.format_hour_before_reminder)
+
+        self._heap = []
+        self._starts = {}  # meeting_id -> start time the heap entries were built for
+        self._counter = itertools.count()
+        self._wakeup = asyncio.Event()
+        self._lock = asyncio.Lock()
+
+    def _lookahead_end(self, now):
+        """Meetings starting before this moment can have a deadline before the next resync"""
+        max_offset = max((offset for offset, _ in self.kinds.values()), default=timedelta(0))
+        return now + max_offset + timedelta(seconds=2 * self.resync_interval)
+
+    def _schedule(self, meeting_id, starts_at, now):
+        """
+        Queue the reminders of a meeting. A deadline that passed more than resync_interval
+        ago is skipped: a meeting confirmed 3 hours ahead gets no "tomorrow" reminder,
+        only reminders missed during a short outage are still sent.
+        """
+        self._starts[meeting_id] = starts_at
+        grace_start = now - timedelta(seconds=self.resync_interval)
+        for kind, (offset, _) in self.kinds.items():
+            deadline = starts_at - offset
+            if deadline < grace_start:
+                continue
+            heapq.heappush(self._heap, (deadline, next(self._counter), meeting_id, kind, starts_at))
+
+    def _is_current(self, entry):
+        return self._starts.get(entry[2]) == entry[4]
+
+    async def load(self):
+        """Rebuild the heap from the database"""
+        async with self._lock:
+            now = datetime.now()
+            rows = await get_meeting_start_times(now, self._lookahead_end(now))
+            self._heap = []
+            self._starts = {}
+            for row in rows:
+                self._schedule(row['id'], row['starts_at'], now)
+        self._wakeup.set()
+        self.logger.info(f"Reminder schedule loaded: {len(rows)} upcoming meetings")
+
+    async def refresh_meeting(self, meeting_id):
+        """Re-read one meeting after it was created, confirmed or rescheduled"""
+        async with self._lock:
+            now = datetime.now()
+            rows = await get_meeting_start_times(now, self._lookahead_end(now), [meeting_id])
+            if rows:
+                if self._starts.get(meeting_id) != rows[0]['starts_at']:
+                    self._schedule(meeting_id, rows[0]['starts_at'], now)
+            else:
+                # Cancelled, not confirmed any more or too far in the future
+                self._starts.pop(meeting_id, None)
+        self._wakeup.set()
+
+    def remove_meeting(self, meeting_id):
+        """Drop all pending reminders of a meeting"""
+        self._starts.pop(meeting_id, None)
+        self._wakeup.set()
+
+    async def handle_change(self, payload):
+        """Apply a meeting_changes event from the database listener"""
+        if payload.get('table') != 'meetings':
+            # Members are read when the reminder fires, membership changes need no reschedule
+            return
+        if payload.get('op') == 'DELETE':
+            # Behind the lock so that a reload in progress cannot bring the meeting back
+            async with self._lock:
+                self.remove_meeting(payload['meeting_id'])
+        else:
+            await self.refresh_meeting(payload['meeting_id'])
+
+    def _next_deadline(self):
+        """Earliest live deadline, discarding superseded entries on the way"""
+        while self._heap and not self._is_current(self._heap[0]):
+            heapq.heappop(self._heap)
+        return self._heap[0][0] if self._heap else None
+
+    def _pop_due(self, now):
+        """Pop every live entry whose deadline has passed, grouped by kind"""
+        due = defaultdict(set)
+        while True:
+            deadline = self._next_deadline()
+            if deadline is None or deadline > now:
+                break
+            _, _, meeting_id, kind, _ = heapq.heappop(self._heap)
+            due[kind].add(meeting_id)
+        return due
+
+    async def _fire(self, due, now):
+        """Render and queue reminders for all due meetings, one query per kind"""
+        for kind, meeting_ids in due.items():
+            offset, formatter = self.kinds[kind]
+            targets = await get_reminder_targets(
+                now, now + offset + timedelta(seconds=self.resync_interval), list(meeting_ids)
+            )
+            reminders = [
+                (target['id'], user_id, formatter(user_id, target))
+                for target in targets
+                for user_id in target['member_ids']
+            ]
+            # The reminder log keeps this exactly-once even if a deadline fires twice
+            queued = await enqueue_reminders(kind, reminders)
+            self.logger.info(f"Queued {queued} {kind} reminders for {len(targets)} meetings")
+
+    async def run(self):
+        """Sleep until the next deadline (or a refresh), fire what is due, repeat"""
+        self.logger.info("Starting reminder scheduler...")
+        await self.load()
+        next_resync = time_module.monotonic() + self.resync_interval
+
+        while True:
+            try:
+                self._wakeup.clear()
+
+                now = datetime.now()
+                due = self._pop_due(now)
+                if due:
+                    await self._fire(due, now)
+
+                if time_module.monotonic() >= next_resync:
+                    await self.load()
+                    next_resync = time_module.monotonic() + self.resync_interval
+
+                timeout = next_resync - time_module.monotonic()
+                deadline = self._next_deadline()
+                if deadline is not None:
+                    timeout = min(timeout, (deadline - datetime.now()).total_seconds())
+
+                try:
+                    await asyncio.wait_for(self._wakeup.wait(), timeout=max(timeout, 0))
+                except asyncio.TimeoutError:
+                    pass
+            except Exception as e:
+                self.logger.error(f"Error in reminder scheduler: {e}")
+                # Wait a bit before retrying
+                await asyncio.sleep(60)
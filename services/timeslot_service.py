@@ -3,105 +3,169 @@ import asyncio
 from datetime import datetime, timedelta, date
 from typing import List, Dict, Optional, Any
 
-from database.db import pool, get_active_timeslots
+from database.db import get_pool, get_active_timeslots, get_timeslot
 from database.models import TimeSlot
+from config import AVAILABLE_DATES_HORIZON_DAYS
 
 logger = logging.getLogger(__name__)
 
+# Map day names to day numbers (0 = Monday, 6 = Sunday)
+DAY_NUMBERS = {
+    'Monday': 0,
+    'Tuesday': 1,
+    'Wednesday': 2,
+    'Thursday': 3,
+    'Friday': 4,
+    'Saturday': 5,
+    'Sunday': 6
+}
+
 class TimeslotService:
-    """Service for managing date-based time slots with a rolling 2-week window"""
+    """Service for managing date-based time slots with a rolling window of AVAILABLE_DATES_HORIZON_DAYS"""
     
     def __init__(self):
         self.logger = logging.getLogger(__name__)
     
-    async def generate_available_dates(self) -> List[Dict[str, Any]]:
+    async def generate_available_dates(self, start_date: Optional[date] = None, end_date: Optional[date] = None,
+                                       time_slots: Optional[List[Any]] = None) -> List[Dict[str, Any]]:
         """
         Generate actual calendar dates for the available time slots
-        Returns a list of available date-time slots for the next 2 weeks
+        Returns a list of available date-time slots within the horizon
+        
+        Args:
+            start_date: First date to generate (default: today)
+            end_date: Last date to generate (default: today + AVAILABLE_DATES_HORIZON_DAYS)
+            time_slots: Slots to generate for (default: all active time slots)
         """
         # Get today's date
         today = date.today()
         
-        # Calculate the end date (2 weeks from today)
-        end_date = today + timedelta(days=14)
+        # Calculate the end date (end of the rolling window)
+        if end_date is None:
+            end_date = today + timedelta(days=AVAILABLE_DATES_HORIZON_DAYS)
         
         # Get all active time slots
-        time_slots = await get_active_timeslots()
+        if time_slots is None:
+            time_slots = await get_active_timeslots()
         
         if not time_slots:
             self.logger.warning("No active time slots found")
             return []
         
-        # Map day names to day numbers (0 = Monday, 6 = Sunday)
-        day_map = {
-            'Monday': 0,
-            'Tuesday': 1,
-            'Wednesday': 2,
-            'Thursday': 3,
-            'Friday': 4,
-            'Saturday': 5,
-            'Sunday': 6
-        }
+        start_date = start_date or today
         
-        # Generate dates for each time slot
-        date_slots = []
+        # Index slots by weekday once (0 = Monday, 6 = Sunday)
+        slots_by_weekday = {}
+        for slot in time_slots:
+            weekday = DAY_NUMBERS.get(slot['day_of_week'])
+            if weekday is not None:
+                slots_by_weekday.setdefault(weekday, []).append(slot)
         
-        current_date = today
-        while current_date <= end_date:
-            # Get the day of the week as an integer (0 = Monday, 6 = Sunday)
-            current_weekday = current_date.weekday()
-            
-            # Find all time slots for this day of the week
-            for slot in time_slots:
-                slot_day = slot['day_of_week']
-                if day_map.get(slot_day) == current_weekday:
+        # Generate dates for each time slot: first matching weekday, then every 7 days
+        date_slots = []
+        for weekday, slots in slots_by_weekday.items():
+            first_date = start_date + timedelta(days=(weekday - start_date.weekday()) % 7)
+            if first_date > end_date:
+                continue
+            dates = [first_date + timedelta(weeks=k) for k in range((end_date - first_date).days // 7 + 1)]
+            for slot in slots:
+                for slot_date in dates:
                     date_slots.append({
-                        'date': current_date,
+                        'date': slot_date,
                         'time_slot_id': slot['id'],
-                        'day_of_week': slot_day,
+                        'day_of_week': slot['day_of_week'],
                         'start_time': slot['start_time'],
                         'end_time': slot['end_time']
                     })
-            
-            # Move to the next day
-            current_date += timedelta(days=1)
         
+        date_slots.sort(key=lambda date_slot: date_slot['date'])
         return date_slots
     
-    async def update_available_dates(self) -> bool:
+    async def _active_timeslots(self, conn):
+        """
+        Active time slots read in the caller's transaction. The per-process reference
+        cache is not used: the notification and timeslot services do not listen for
+        its invalidations and could rebuild the dates from slots up to REFERENCE_CACHE_TTL old.
+        """
+        return await conn.fetch('SELECT * FROM time_slots WHERE active = true')
+    
+    async def _upsert_available_dates(self, conn, available_dates: List[Dict[str, Any]]):
+        """Stream generated dates with COPY into a temp table, then upsert them with a single statement"""
+        await conn.execute('''
+            CREATE TEMP TABLE tmp_available_dates (
+                date DATE NOT NULL,
+                time_slot_id INTEGER NOT NULL
+            ) ON COMMIT DROP
+        ''')
+        await conn.copy_records_to_table(
+            'tmp_available_dates',
+            records=[(date_slot['date'], date_slot['time_slot_id']) for date_slot in available_dates],
+            columns=['date', 'time_slot_id']
+        )
+        await conn.execute('''
+            INSERT INTO available_dates (date, time_slot_id, is_available, created_at)
+            SELECT date, time_slot_id, true, $1
+            FROM tmp_available_dates
+            ON CONFLICT (date, time_slot_id) DO NOTHING
+        ''', datetime.now())
+    
+    async def update_available_dates(self, incremental: bool = False) -> bool:
         """
         Update available dates in the database
-        - Add new available dates within the 2-week window
+        - Add new available dates within the rolling window
         - Remove dates that are no longer within the window
+        
+        Args:
+            incremental: Only generate the days after each slot's last stored date
+                         instead of regenerating the whole window
         """
         try:
-            # Generate available dates
-            available_dates = await self.generate_available_dates()
-            
-            if not available_dates:
-                self.logger.warning("No available dates generated")
-                return False
-            
             # Get today's date
             today = date.today()
+            end_date = today + timedelta(days=AVAILABLE_DATES_HORIZON_DAYS)
             
+            pool = await get_pool()
             async with pool.acquire() as conn:
                 # Start a transaction
                 async with conn.transaction():
-                    # Remove old dates that are in the past or beyond the 2-week window
+                    # Remove old dates that are in the past or beyond the rolling window
                     await conn.execute('''
                         DELETE FROM available_dates
                         WHERE date < $1 OR date > $2
-                    ''', today, today + timedelta(days=14))
+                    ''', today, end_date)
+                    
+                    if incremental:
+                        # Each slot continues after its own last stored day: a slot whose
+                        # regeneration failed or that was re-enabled catches up as well
+                        last_dates = dict(await conn.fetch('''
+                            SELECT time_slot_id, MAX(date)
+                            FROM available_dates
+                            GROUP BY time_slot_id
+                        '''))
+                        slots_by_start = {}
+                        for slot in await self._active_timeslots(conn):
+                            last_date = last_dates.get(slot['id'])
+                            start_date = today if last_date is None else max(today, last_date + timedelta(days=1))
+                            if start_date <= end_date:
+                                slots_by_start.setdefault(start_date, []).append(slot)
+                        
+                        available_dates = []
+                        for start_date, slots in slots_by_start.items():
+                            available_dates += await self.generate_available_dates(start_date, end_date, slots)
+                        
+                        if not available_dates:
+                            self.logger.info("Available dates are already up to date")
+                            return True
+                    else:
+                        # Generate available dates
+                        available_dates = await self.generate_available_dates(
+                            today, end_date, await self._active_timeslots(conn))
+                        
+                        if not available_dates:
+                            self.logger.warning("No available dates generated")
+                            return False
                     
-                    # Insert new dates
-                    for date_slot in available_dates:
-                        await conn.execute('''
-                            INSERT INTO available_dates
-                            (date, time_slot_id, created_at)
-                            VALUES ($1, $2, $3)
-                            ON CONFLICT (date, time_slot_id) DO NOTHING
-                        ''', date_slot['date'], date_slot['time_slot_id'], datetime.now())
+                    await self._upsert_available_dates(conn, available_dates)
             
             self.logger.info(f"Successfully updated {len(available_dates)} available dates")
             return True
@@ -109,6 +173,39 @@ class TimeslotService:
             self.logger.error(f"Error updating available dates: {e}")
             return False
     
+    async def regenerate_timeslot(self, time_slot_id: int) -> bool:
+        """
+        Rebuild the future available dates of a single time slot after it was
+        added, edited, toggled or deleted. Other slots are not touched.
+        """
+        try:
+            today = date.today()
+            end_date = today + timedelta(days=AVAILABLE_DATES_HORIZON_DAYS)
+            
+            slot = await get_timeslot(time_slot_id)
+            if slot and slot['active']:
+                available_dates = await self.generate_available_dates(today, end_date, [slot])
+            else:
+                available_dates = []
+            
+            pool = await get_pool()
+            async with pool.acquire() as conn:
+                async with conn.transaction():
+                    # Remove future dates that no longer match the slot (day changed, slot disabled)
+                    await conn.execute('''
+                        DELETE FROM available_dates
+                        WHERE time_slot_id = $1 AND date >= $2 AND NOT (date = ANY($3::date[]))
+                    ''', time_slot_id, today, [date_slot['date'] for date_slot in available_dates])
+                    
+                    if available_dates:
+                        await self._upsert_available_dates(conn, available_dates)
+            
+            self.logger.info(f"Regenerated {len(available_dates)} available dates for time slot {time_slot_id}")
+            return True
+        except Exception as e:
+            self.logger.error(f"Error regenerating available dates for time slot {time_slot_id}: {e}")
+            return False
+    
     async def get_available_dates(self, filter_by: Optional[Dict[str, Any]] = None) -> List[Dict[str, Any]]:
         """
         Get available dates for meetings
@@ -129,7 +226,7 @@ class TimeslotService:
                 WHERE ad.date >= $1 AND ad.date <= $2 AND ad.is_available = true
             '''
             
-            params = [date.today(), date.today() + timedelta(days=14)]
+            params = [date.today(), date.today() + timedelta(days=AVAILABLE_DATES_HORIZON_DAYS)]
             
             # Add additional filters if provided
             if filter_by:
@@ -141,6 +238,7 @@ class TimeslotService:
             
             query += " ORDER BY ad.date, ts.start_time"
             
+            pool = await get_pool()
             async with pool.acquire() as conn:
                 result = await conn.fetch(query, *params)
                 
@@ -153,6 +251,7 @@ class TimeslotService:
     async def mark_date_unavailable(self, date_id: int) -> bool:
         """Mark a specific date as unavailable"""
         try:
+            pool = await get_pool()
             async with pool.acquire() as conn:
                 await conn.execute('''
                     UPDATE available_dates
@@ -167,6 +266,7 @@ class TimeslotService:
     async def mark_date_available(self, date_id: int) -> bool:
         """Mark a specific date as available"""
         try:
+            pool = await get_pool()
             async with pool.acquire() as conn:
                 await conn.execute('''
                     UPDATE available_dates
@@ -181,6 +281,7 @@ class TimeslotService:
     async def remove_old_available_dates(self):
         """Remove available dates that are in the past"""
         try:
+            pool = await get_pool()
             async with pool.acquire() as conn:
                 await conn.execute('''
                     DELETE FROM available_dates
@@ -195,10 +296,8 @@ class TimeslotService:
     async def run_daily_update(self):
         """Run daily update to generate new available dates and remove old ones"""
         self.logger.info("Running daily update of available dates")
-        result = await self.update_available_dates()
-        if result:
-            await self.remove_old_available_dates()
-        return result
+        # The update also drops the past days
+        return await self.update_available_dates(incremental=True)
 
 
 # Create singleton instance
@@ -14,6 +14,7 @@ from user_bot.handlers.application import router as application_router
 from user_bot.handlers.meetings import register_meetings_handlers
 # from user_bot.handlers.events import register_events_handlers
 from user_bot.handlers.activities import register_activities_handlers
+from utils.metrics import register_metrics_middlewares
 
 # Command mapping for documentation and consistency
 USER_COMMANDS = {
@@ -33,6 +34,9 @@ def register_user_handlers(dp: Dispatcher):
     """Register all user bot handlers"""
     logger.info("Registering user bot handlers")
     
+    # Handler latency, DB and Bot API time (served on /metrics)
+    register_metrics_middlewares(dp, "user")
+    
     # Register handlers in the correct order
     register_start_handlers(dp)
     dp.include_router(application_router)
@@ -4,7 +4,7 @@ from aiogram.types import Message, CallbackQuery
 from aiogram.fsm.context import FSMContext
 from aiogram.fsm.state import State, StatesGroup
 from aiogram.utils.keyboard import InlineKeyboardBuilder
-from database.db import get_active_cities, get_active_timeslots, get_or_create_application, get_user_application, pool, get_user
+from database.db import get_active_cities, get_active_timeslots_by_city, get_or_create_application, get_user_application, pool, get_user
 from user_bot.handlers.start import get_main_menu
 from aiogram.filters import Command
 
@@ -81,9 +81,7 @@ async def select_city(callback: CallbackQuery, state: FSMContext):
     city_id = int(callback.data.split("_")[-1])
     await state.update_data(city_id=city_id)
     try:
-        timeslots = await get_active_timeslots()
-        # Фильтруем по выбранному городу
-        filtered = [ts for ts in timeslots if ts["city_id"] == city_id]
+        filtered = await get_active_timeslots_by_city(city_id)
         if not filtered:
             builder = InlineKeyboardBuilder()
             builder.button(text="В меню", callback_data="main_menu")
@@ -240,8 +238,7 @@ async def back_to_slot(callback: CallbackQuery, state: FSMContext):
     data = await state.get_data()
     city_id = data.get("city_id")
     try:
-        timeslots = await get_active_timeslots()
-        filtered = [ts for ts in timeslots if ts["city_id"] == city_id]
+        filtered = await get_active_timeslots_by_city(city_id)
         builder = InlineKeyboardBuilder()
         for slot in filtered:
             label = f"{slot['day_of_week']} {slot['start_time'].strftime('%H:%M')}"
@@ -0,0 +1,263 @@
+import asyncio
+import bisect
+import hashlib
+import logging
+import multiprocessing
+import os
+import signal
+
+import aiohttp
+
+from config import USER_BOT_WORKER_QUEUE_SIZE
+
+logger = logging.getLogger(__name__)
+
+# Long polling timeout of getUpdates, seconds
+POLL_TIMEOUT = 25
+
+class HashRing:
+    """
+    Consistent hash ring mapping chat ids to worker indexes.
+    Every worker owns `replicas` points on the ring, so changing the number of
+    workers only moves the chats that land next to the added/removed points.
+    """
+
+    def __init__(self, nodes, replicas=128):
+        points = sorted(
+            (self._hash(f"{node}:{replica}"), node)
+            for node in nodes
+            for replica in range(replicas)
+        )
+        self._keys = [point for point, _ in points]
+        self._nodes = [node for _, node in points]
+
+    @staticmethod
+    def _hash(value):
+        return int.from_bytes(hashlib.blake2b(str(value).encode(), digest_size=8).digest(), "big")
+
+    def node_for(self, key):
+        index = bisect.bisect(self._keys, self._hash(key)) % len(self._keys)
+        return self._nodes[index]
+
+def update_chat_id(update):
+    """Chat (or user) a raw update belongs to; updates of one chat have to stay in order"""
+    for key, value in update.items():
+        if key == "update_id" or not isinstance(value, dict):
+            continue
+        chat = value.get("chat") or (value.get("message") or {}).get("chat")
+        if chat:
+            return chat["id"]
+        user = value.get("from") or value.get("user")
+        if user:
+            return user["id"]
+    return 0
+
+# --- Worker process ---
+
+def _worker_main(index, workers, queue):
+    """Entry point of a worker process (spawned: imports the bot stack itself)"""
+    logging.basicConfig(
+        level=logging.INFO,
+        format=f"%(asctime)s - worker {index} - %(name)s - %(levelname)s - %(message)s",
+    )
+    # Ctrl+C reaches the whole process group; the supervisor decides when workers stop
+    signal.signal(signal.SIGINT, signal.SIG_IGN)
+    if hasattr(signal, "SIGUSR1"):
+        # Forwarded by the supervisor; until init_db() installs the stats dump it is ignored
+        signal.signal(signal.SIGUSR1, signal.SIG_IGN)
+    asyncio.run(_run_worker(index, workers, queue))
+
+async def _handle_in_order(dp, bot, update, previous):
+    """Feed one update to the dispatcher after the previous update of the same chat"""
+    if previous is not None:
+        await asyncio.wait([previous])
+    try:
+        await dp.feed_raw_update(bot, update)
+    except Exception as e:
+        logger.exception(f"Error handling update {update.get('update_id')}: {e}")
+
+async def _run_worker(index, workers, queue):
+    from aiogram import Dispatcher
+
+    from config import (
+        USER_BOT_TOKEN, TELEGRAM_GLOBAL_RATE, TELEGRAM_GLOBAL_BURST, METRICS_PORTS,
+        USER_BOT_WORKER_CONCURRENCY, REFERENCE_CACHE_LISTEN,
+    )
+    from database.db import init_db, close_db
+    from database.fsm_storage import create_fsm_storage
+    from database.listener import create_reference_listener
+    from user_bot import setup_user_bot
+    from utils.metrics import start_metrics_server
+    from utils.rate_limiter import create_bot, rate_limiter
+
+    # Telegram's global limit is per bot; the workers share it
+    rate_limiter.global_rate = TELEGRAM_GLOBAL_RATE / workers
+    rate_limiter.global_burst = max(1, TELEGRAM_GLOBAL_BURST // workers)
+
+    await init_db(role="user_worker")
+    # Every worker has its own counters, so each one gets a port
+    first_port = METRICS_PORTS["user_worker"]
+    metrics_runner = await start_metrics_server(first_port and first_port + index)
+    reference_listener = None
+    if REFERENCE_CACHE_LISTEN:
+        reference_listener = asyncio.create_task(create_reference_listener().run())
+    bot = create_bot(USER_BOT_TOKEN)
+    dp = Dispatcher(storage=create_fsm_storage())
+    setup_user_bot(dp)
+    logger.info(f"User bot worker {index}/{workers} started")
+
+    loop = asyncio.get_running_loop()
+    chains = {}  # chat_id -> task of the last update of that chat
+    # Updates taken off the queue but not handled yet. While the limit is reached the
+    # worker stops reading, the queue fills up and the supervisor's put() blocks
+    in_flight = asyncio.Semaphore(USER_BOT_WORKER_CONCURRENCY)
+
+    def finished(chat_id, task):
+        in_flight.release()
+        if chains.get(chat_id) is task:
+            del chains[chat_id]
+
+    try:
+        while True:
+            await in_flight.acquire()
+            update = await loop.run_in_executor(None, queue.get)
+            if update is None:
+                break
+            chat_id = update_chat_id(update)
+            # Different chats run concurrently, one chat strictly in arrival order
+            task = asyncio.create_task(_handle_in_order(dp, bot, update, chains.get(chat_id)))
+            chains[chat_id] = task
+            task.add_done_callback(lambda done, chat_id=chat_id: finished(chat_id, done))
+        if chains:
+            await asyncio.wait(list(chains.values()))
+    finally:
+        if reference_listener is not None:
+            reference_listener.cancel()
+        await bot.session.close()
+        if metrics_runner is not None:
+            await metrics_runner.cleanup()
+        await close_db()
+        logger.info(f"User bot worker {index} stopped")
+
+# --- Supervisor ---
+
+class Supervisor:
+    """
+    Long-polls getUpdates for the user bot in the parent process and hands every raw
+    update to one of N worker processes, chosen by a consistent hash of its chat id.
+    Workers run the usual dispatcher, so all updates of a chat are handled by the
+    same process and in order. Dead workers are restarted on the same queue.
+    """
+
+    def __init__(self, token, workers, allowed_updates=None):
+        self.token = token
+        self.workers = workers
+        self.allowed_updates = allowed_updates
+        self.ring = HashRing(range(workers))
+        self._context = multiprocessing.get_context("spawn")
+        self._queues = [self._context.Queue(maxsize=USER_BOT_WORKER_QUEUE_SIZE) for _ in range(workers)]
+        self._processes = [None] * workers
+        self._offset = None
+        self._stop = asyncio.Event()
+
+    def _start_worker(self, index):
+        process = self._context.Process(
+            target=_worker_main,
+            args=(index, self.workers, self._queues[index]),
+            name=f"user-bot-worker-{index}",
+            daemon=True,
+        )
+        process.start()
+        self._processes[index] = process
+
+    def _forward_signal(self, sig):
+        """Pass a signal on to the workers (SIGUSR1: each one logs its query stats)"""
+        for process in self._processes:
+            if process is not None and process.is_alive():
+                os.kill(process.pid, sig)
+
+    def _check_workers(self):
+        for index, process in enumerate(self._processes):
+            if not process.is_alive():
+                logger.error(f"Worker {index} exited with code {process.exitcode}, restarting")
+                self._start_worker(index)
+
+    async def _get_updates(self, session, timeout=POLL_TIMEOUT):
+        params = {"timeout": timeout}
+        if self._offset is not None:
+            params["offset"] = self._offset
+        if self.allowed_updates is not None:
+            params["allowed_updates"] = self.allowed_updates
+        async with session.post(
+            f"https://api.telegram.org/bot{self.token}/getUpdates",
+            json=params,
+            timeout=aiohttp.ClientTimeout(total=timeout + 10),
+        ) as response:
+            payload = await response.json()
+        if not payload.get("ok"):
+            retry_after = (payload.get("parameters") or {}).get("retry_after", 1)
+            raise RuntimeError(f"getUpdates failed: {payload.get('description')} (retry in {retry_after}s)")
+        return payload["result"]
+
+    async def _dispatch(self, updates):
+        loop = asyncio.get_running_loop()
+        for update in updates:
+            queue = self._queues[self.ring.node_for(update_chat_id(update))]
+            # Blocks while that worker is USER_BOT_WORKER_QUEUE_SIZE updates behind
+            await loop.run_in_executor(None, queue.put, update)
+            self._offset = update["update_id"] + 1
+
+    async def run(self):
+        loop = asyncio.get_running_loop()
+        for sig in (signal.SIGINT, signal.SIGTERM):
+            loop.add_signal_handler(sig, self._stop.set)
+        if hasattr(signal, "SIGUSR1"):
+            # The supervisor runs no queries; without this SIGUSR1 would kill it
+            loop.add_signal_handler(signal.SIGUSR1, self._forward_signal, signal.SIGUSR1)
+
+        for index in range(self.workers):
+            self._start_worker(index)
+        logger.info(f"User bot supervisor started with {self.workers} workers")
+
+        stop_task = asyncio.create_task(self._stop.wait())
+        async with aiohttp.ClientSession() as session:
+            try:
+                while not self._stop.is_set():
+                    self._check_workers()
+                    poll = asyncio.create_task(self._get_updates(session))
+                    await asyncio.wait([poll, stop_task], return_when=asyncio.FIRST_COMPLETED)
+                    if not poll.done():
+                        poll.cancel()
+                        break
+                    try:
+                        updates = poll.result()
+                    except (aiohttp.ClientError, asyncio.TimeoutError, RuntimeError) as e:
+                        logger.error(f"Error polling updates: {e}")
+                        await asyncio.sleep(1)
+                        continue
+                    await self._dispatch(updates)
+            finally:
+                if self._offset is not None:
+                    # Confirm what was handed to the workers so it is not delivered again
+                    try:
+                        await self._get_updates(session, timeout=0)
+                    except Exception as e:
+                        logger.warning(f"Could not confirm the last offset: {e}")
+                stop_task.cancel()
+                await self._shutdown_workers()
+
+    async def _shutdown_workers(self):
+        """Let every worker finish its queue, then stop it"""
+        loop = asyncio.get_running_loop()
+        for queue in self._queues:
+            await loop.run_in_executor(None, queue.put, None)
+        for index, process in enumerate(self._processes):
+            await loop.run_in_executor(None, process.join, 30)
+            if process.is_alive():
+                logger.warning(f"Worker {index} did not stop in time, terminating")
+                process.terminate()
+        logger.info("User bot supervisor stopped")
+
+async def run_supervisor(token, workers, allowed_updates=None):
+    """Run the user bot as a supervisor with `workers` worker processes"""
+    await Supervisor(token, workers, allowed_updates).run()
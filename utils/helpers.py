@@ -153,6 +153,15 @@ def get_meeting_status_emoji(status):
     
     return status_emojis.get(status.lower(), '❓')
 
+def format_occupancy_dots(member_count, max_size=None):
+    """Occupancy of a meeting as 🔴 (taken) and 🟢 (free) seats, e.g. 🔴🔴🟢🟢🟢"""
+    if max_size is None:
+        from config import MAX_MEETING_SIZE
+        max_size = MAX_MEETING_SIZE
+    if member_count <= max_size:
+        return '🔴' * member_count + '🟢' * (max_size - member_count)
+    return '🔴' * max_size + f'+{member_count - max_size}'
+
 def format_meeting_info(meeting, participant_count=None, total_needed=None):
     """Format meeting information for display"""
     status_emoji = get_meeting_status_emoji(meeting['status'])
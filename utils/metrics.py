@@ -0,0 +1,221 @@
+import bisect
+import logging
+import time
+from contextvars import ContextVar
+from typing import Any, Awaitable, Callable, Dict
+
+from aiogram import BaseMiddleware
+from aiogram.client.session.middlewares.base import BaseRequestMiddleware
+from aiogram.types import TelegramObject
+
+from config import METRICS_HOST
+from database.instrumented import add_query_observer
+
+logger = logging.getLogger(__name__)
+
+# Seconds; handlers are usually a few queries and one or two API calls
+LATENCY_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10)
+QUERY_COUNT_BUCKETS = (0, 1, 2, 3, 5, 8, 13, 21, 34, 55)
+
+def _escape(value):
+    return str(value).replace("\\", "\\\\").replace("\"", "\\\"").replace("\n", "\\n")
+
+def _labels(names, values, extra=()):
+    pairs = [*zip(names, values), *extra]
+    if not pairs:
+        return ""
+    return "{" + ",".join(f'{name}="{_escape(value)}"' for name, value in pairs) + "}"
+
+class Counter:
+    def __init__(self, name, help_text, labelnames=()):
+        self.name = name
+        self.help = help_text
+        self.labelnames = tuple(labelnames)
+        self._values = {}
+
+    def inc(self, *labels, amount=1):
+        self._values[labels] = self._values.get(labels, 0) + amount
+
+    def render(self):
+        lines = [f"# HELP {self.name} {self.help}", f"# TYPE {self.name} counter"]
+        for labels, value in sorted(self._values.items()):
+            lines.append(f"{self.name}{_labels(self.labelnames, labels)} {value}")
+        return lines
+
+class Histogram:
+    def __init__(self, name, help_text, labelnames=(), buckets=LATENCY_BUCKETS):
+        self.name = name
+        self.help = help_text
+        self.labelnames = tuple(labelnames)
+        self.buckets = tuple(buckets)
+        self._values = {}  # labels -> [per-bucket counts..., +Inf count, sum]
+
+    def observe(self, value, *labels):
+        series = self._values.get(labels)
+        if series is None:
+            series = self._values[labels] = [0] * (len(self.buckets) + 1) + [0.0]
+        series[bisect.bisect_left(self.buckets, value)] += 1
+        series[-1] += value
+
+    def render(self):
+        lines = [f"# HELP {self.name} {self.help}", f"# TYPE {self.name} histogram"]
+        for labels, series in sorted(self._values.items()):
+            cumulative = 0
+            for bound, count in zip((*self.buckets, "+Inf"), series):
+                cumulative += count
+                le = bound if bound == "+Inf" else repr(float(bound))
+                lines.append(f"{self.name}_bucket{_labels(self.labelnames, labels, [('le', le)])} {cumulative}")
+            lines.append(f"{self.name}_sum{_labels(self.labelnames, labels)} {series[-1]}")
+            lines.append(f"{self.name}_count{_labels(self.labelnames, labels)} {cumulative}")
+        return lines
+
+HANDLER_SECONDS = Histogram(
+    "fivechairs_handler_seconds", "Wall time of an update, by the handler that took it",
+    ("bot", "handler"))
+HANDLER_DB_SECONDS = Histogram(
+    "fivechairs_handler_db_seconds", "Time an update spent waiting for pooled connections and queries",
+    ("bot", "handler"))
+HANDLER_DB_QUERIES = Histogram(
+    "fivechairs_handler_db_queries", "Queries sent while handling an update",
+    ("bot", "handler"), buckets=QUERY_COUNT_BUCKETS)
+HANDLER_API_SECONDS = Histogram(
+    "fivechairs_handler_api_seconds", "Time an update spent in Bot API calls, rate limiter waits included",
+    ("bot", "handler"))
+HANDLER_ERRORS = Counter(
+    "fivechairs_handler_errors_total", "Updates whose handler raised",
+    ("bot", "handler"))
+DB_QUERY_SECONDS = Histogram(
+    "fivechairs_db_query_seconds", "Duration of queries by connection method; acquire is the pool wait",
+    ("method",))
+API_REQUEST_SECONDS = Histogram(
+    "fivechairs_api_request_seconds", "Duration of Bot API requests by method",
+    ("method",))
+
+METRICS = (
+    HANDLER_SECONDS, HANDLER_DB_SECONDS, HANDLER_DB_QUERIES, HANDLER_API_SECONDS,
+    HANDLER_ERRORS, DB_QUERY_SECONDS, API_REQUEST_SECONDS,
+)
+
+def render_metrics():
+    """All metrics of this process in the Prometheus text format"""
+    lines = []
+    for metric in METRICS:
+        lines.extend(metric.render())
+    return "\n".join(lines) + "\n"
+
+class UpdateStats:
+    __slots__ = ("handler", "db_queries", "db_time", "api_time")
+
+    def __init__(self):
+        self.handler = "unhandled"
+        self.db_queries = 0
+        self.db_time = 0.0
+        self.api_time = 0.0
+
+# Stats of the update handled by the current task; None outside of updates
+_current_stats: ContextVar = ContextVar("update_stats", default=None)
+
+def _observe_query(method, query, args, duration):
+    DB_QUERY_SECONDS.observe(duration, method)
+    stats = _current_stats.get()
+    if stats is not None:
+        stats.db_time += duration
+        if method != "acquire":
+            stats.db_queries += 1
+
+class MetricsMiddleware(BaseMiddleware):
+    """
+    Outer middleware on dp.update: times every update and records how much of it
+    went to the database and to the Bot API, labelled with the handler that took it.
+    """
+
+    def __init__(self, bot_name):
+        self.bot_name = bot_name
+
+    async def __call__(
+        self,
+        handler: Callable[[TelegramObject, Dict[str, Any]], Awaitable[Any]],
+        event: TelegramObject,
+        data: Dict[str, Any],
+    ) -> Any:
+        stats = UpdateStats()
+        token = _current_stats.set(stats)
+        started = time.perf_counter()
+        try:
+            return await handler(event, data)
+        except Exception:
+            HANDLER_ERRORS.inc(self.bot_name, stats.handler)
+            raise
+        finally:
+            labels = (self.bot_name, stats.handler)
+            HANDLER_SECONDS.observe(time.perf_counter() - started, *labels)
+            HANDLER_DB_SECONDS.observe(stats.db_time, *labels)
+            HANDLER_DB_QUERIES.observe(stats.db_queries, *labels)
+            HANDLER_API_SECONDS.observe(stats.api_time, *labels)
+            _current_stats.reset(token)
+
+class HandlerNameMiddleware(BaseMiddleware):
+    """Inner middleware: remembers which handler matched, for the labels of MetricsMiddleware"""
+
+    async def __call__(
+        self,
+        handler: Callable[[TelegramObject, Dict[str, Any]], Awaitable[Any]],
+        event: TelegramObject,
+        data: Dict[str, Any],
+    ) -> Any:
+        stats = _current_stats.get()
+        handler_object = data.get("handler")
+        if stats is not None and handler_object is not None:
+            stats.handler = getattr(handler_object.callback, "__name__", "unknown")
+        return await handler(event, data)
+
+class ApiTimingMiddleware(BaseRequestMiddleware):
+    """Session middleware timing Bot API requests, per method and per update"""
+
+    async def __call__(self, make_request, bot, method):
+        started = time.perf_counter()
+        try:
+            return await make_request(bot, method)
+        finally:
+            duration = time.perf_counter() - started
+            API_REQUEST_SECONDS.observe(duration, type(method).__name__)
+            stats = _current_stats.get()
+            if stats is not None:
+                stats.api_time += duration
+
+api_timing = ApiTimingMiddleware()
+
+def register_metrics_middlewares(dp, bot_name):
+    """Per-handler latency, DB and Bot API time for every update of this dispatcher"""
+    add_query_observer(_observe_query)
+    dp.update.outer_middleware(MetricsMiddleware(bot_name))
+    handler_name = HandlerNameMiddleware()
+    dp.message.middleware(handler_name)
+    dp.callback_query.middleware(handler_name)
+
+async def metrics_handler(request):
+    from aiohttp import web
+    return web.Response(text=render_metrics(), content_type="text/plain", charset="utf-8")
+
+async def start_metrics_server(port, host=METRICS_HOST):
+    """
+    Serve /metrics over HTTP on METRICS_HOST; returns the aiohttp runner (cleanup() stops it)
+    or None when metrics are disabled (port 0) or the port is taken.
+    """
+    if not port:
+        return None
+    from aiohttp import web
+
+    add_query_observer(_observe_query)
+    app = web.Application()
+    app.router.add_get("/metrics", metrics_handler)
+    runner = web.AppRunner(app)
+    await runner.setup()
+    try:
+        await web.TCPSite(runner, host, port).start()
+    except OSError as e:
+        logger.warning(f"Metrics endpoint not started on {host}:{port}: {e}")
+        await runner.cleanup()
+        return None
+    logger.info(f"Metrics endpoint on http://{host}:{port}/metrics")
+    return runner
@@ -0,0 +1,149 @@
+import asyncio
+import logging
+import time
+
+from aiogram import Bot
+from aiogram.client.session.middlewares.base import BaseRequestMiddleware
+from aiogram.exceptions import TelegramRetryAfter
+from aiogram.methods import GetUpdates
+
+from config import (
+    TELEGRAM_GLOBAL_RATE, TELEGRAM_GLOBAL_BURST,
+    TELEGRAM_PER_CHAT_RATE, TELEGRAM_PER_CHAT_BURST,
+    TELEGRAM_MAX_RETRIES
+)
+from utils.metrics import api_timing
+
+logger = logging.getLogger(__name__)
+
+# Per-chat buckets that have been idle (and refilled) this long are dropped
+IDLE_BUCKET_TTL = 300
+
+class TokenBucket:
+    """
+    Token bucket that hands out send slots.
+
+    reserve() takes a token immediately and returns how long the caller has to wait
+    before using it. Tokens may go negative, which queues callers in FIFO order
+    without holding a lock across the sleep.
+    """
+
+    def __init__(self, rate, capacity):
+        self.rate = rate
+        self.capacity = capacity
+        self.tokens = capacity
+        self.updated = time.monotonic()
+        self.last_used = self.updated
+        self.blocked_until = 0.0
+
+    def _refill(self, now):
+        self.tokens = min(self.capacity, self.tokens + (now - self.updated) * self.rate)
+        self.updated = now
+
+    def reserve(self):
+        """Take one token and return the delay (seconds) before it may be used"""
+        now = time.monotonic()
+        self._refill(now)
+        self.last_used = now
+        self.tokens -= 1
+        delay = -self.tokens / self.rate if self.tokens < 0 else 0.0
+        return max(delay, self.blocked_until - now)
+
+    def block(self, seconds):
+        """Stop handing out usable tokens for the given time (flood control from Telegram)"""
+        self.blocked_until = max(self.blocked_until, time.monotonic() + seconds)
+
+    def is_idle(self, now):
+        """Unused for IDLE_BUCKET_TTL, full again and not blocked"""
+        # _refill() moves updated, so the age is taken from last_used, which only reserve() sets
+        if now - self.last_used < IDLE_BUCKET_TTL:
+            return False
+        self._refill(now)
+        return self.tokens >= self.capacity and self.blocked_until <= now
+
+class TelegramRateLimiter(BaseRequestMiddleware):
+    """
+    Session middleware that throttles outgoing Bot API requests.
+
+    Every request addressed to a chat goes through two buckets: one per (bot, chat)
+    and one global per bot. Buckets are keyed by bot id, so a single limiter can be
+    attached to both the user and the admin bot. Flood errors (429) block the
+    affected chat for retry_after seconds and the request is retried.
+    """
+
+    def __init__(self, global_rate=TELEGRAM_GLOBAL_RATE, global_burst=TELEGRAM_GLOBAL_BURST,
+                 chat_rate=TELEGRAM_PER_CHAT_RATE, chat_burst=TELEGRAM_PER_CHAT_BURST,
+                 max_retries=TELEGRAM_MAX_RETRIES):
+        self.global_rate = global_rate
+        self.global_burst = global_burst
+        self.chat_rate = chat_rate
+        self.chat_burst = chat_burst
+        self.max_retries = max_retries
+        self._global_buckets = {}
+        self._chat_buckets = {}
+        self._last_cleanup = time.monotonic()
+
+    def _global_bucket(self, bot_id):
+        bucket = self._global_buckets.get(bot_id)
+        if bucket is None:
+            bucket = self._global_buckets[bot_id] = TokenBucket(self.global_rate, self.global_burst)
+        return bucket
+
+    def _chat_bucket(self, bot_id, chat_id):
+        key = (bot_id, chat_id)
+        bucket = self._chat_buckets.get(key)
+        if bucket is None:
+            bucket = self._chat_buckets[key] = TokenBucket(self.chat_rate, self.chat_burst)
+        return bucket
+
+    def _cleanup(self):
+        """Drop per-chat buckets nobody has used for a while"""
+        now = time.monotonic()
+        if now - self._last_cleanup < IDLE_BUCKET_TTL:
+            return
+        self._last_cleanup = now
+        stale = [key for key, bucket in self._chat_buckets.items() if bucket.is_idle(now)]
+        for key in stale:
+            del self._chat_buckets[key]
+
+    async def acquire(self, bot_id, chat_id):
+        """Wait until a request to chat_id may be sent"""
+        # The chat slot is awaited first so a slow chat does not hold a global slot
+        delay = self._chat_bucket(bot_id, chat_id).reserve()
+        if delay > 0:
+            await asyncio.sleep(delay)
+        delay = self._global_bucket(bot_id).reserve()
+        if delay > 0:
+            await asyncio.sleep(delay)
+
+    async def __call__(self, make_request, bot, method):
+        chat_id = getattr(method, "chat_id", None)
+        if isinstance(method, GetUpdates) or chat_id is None:
+            return await make_request(bot, method)
+
+        self._cleanup()
+        attempt = 0
+        while True:
+            await self.acquire(bot.id, chat_id)
+            try:
+                return await make_request(bot, method)
+            except TelegramRetryAfter as e:
+                attempt += 1
+                self._chat_bucket(bot.id, chat_id).block(e.retry_after)
+                if attempt > self.max_retries:
+                    raise
+                logger.warning(
+                    f"Flood control for chat {chat_id}: retry after {e.retry_after}s "
+                    f"(attempt {attempt}/{self.max_retries})"
+                )
+
+# Shared limiter instance for every bot created in this process
+rate_limiter = TelegramRateLimiter()
+
+def create_bot(token, **kwargs):
+    """Create a Bot whose outgoing requests go through the shared rate limiter"""
+    bot = Bot(token=token, **kwargs)
+    # Registered first, so the timing includes the time spent waiting in the limiter
+    bot.session.middleware(api_timing)
+    bot.session.middleware(rate_limiter)
+    return bot
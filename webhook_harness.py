@@ -0,0 +1,101 @@
+#!/usr/bin/env python3
+"""
+Нагрузочная проверка webhook-режима: отправляет синтетические апдейты Telegram
+на локально запущенный сервер (python main.py webhook) и печатает задержки.
+
+Чтобы мерить задержку обработчика целиком, сервер запускают с
+WEBHOOK_HANDLE_IN_BACKGROUND=false — тогда ответ приходит после обработки апдейта.
+Исходящие запросы к Bot API бот делает как обычно, поэтому синтетические чаты
+лучше не смешивать с рабочим ботом.
+
+Запуск:
+    python webhook_harness.py [--bot user|admin] [--count 1000] [--concurrency 50] [--text /start]
+"""
+import argparse
+import asyncio
+import itertools
+import statistics
+import sys
+import time
+
+import aiohttp
+
+from config import WEBHOOK_PORT, WEBHOOK_USER_PATH, WEBHOOK_ADMIN_PATH, WEBHOOK_SECRET
+
+# Синтетические пользователи получают id вне диапазона реальных Telegram id
+USER_ID_BASE = 10 ** 12
+
+_update_ids = itertools.count(1)
+
+def make_update(user_id, text):
+    """Минимальный Update с текстовым сообщением в личном чате"""
+    update_id = next(_update_ids)
+    return {
+        "update_id": update_id,
+        "message": {
+            "message_id": update_id,
+            "date": int(time.time()),
+            "chat": {"id": user_id, "type": "private", "first_name": "Load"},
+            "from": {"id": user_id, "is_bot": False, "first_name": "Load", "last_name": str(user_id)},
+            "text": text,
+            **({"entities": [{"type": "bot_command", "offset": 0, "length": len(text.split()[0])}]}
+               if text.startswith("/") else {}),
+        },
+    }
+
+async def post_updates(url, count, concurrency, users, text):
+    """Отправляет count апдейтов не более чем в concurrency параллельных запросах"""
+    headers = {"X-Telegram-Bot-Api-Secret-Token": WEBHOOK_SECRET} if WEBHOOK_SECRET else {}
+    latencies = []
+    errors = {}
+    queue = asyncio.Queue()
+    for i in range(count):
+        queue.put_nowait(USER_ID_BASE + i % users)
+
+    async def worker(session):
+        while not queue.empty():
+            user_id = queue.get_nowait()
+            started = time.perf_counter()
+            try:
+                async with session.post(url, json=make_update(user_id, text), headers=headers) as response:
+                    await response.read()
+                    if response.status != 200:
+                        errors[response.status] = errors.get(response.status, 0) + 1
+            except aiohttp.ClientError as e:
+                errors[type(e).__name__] = errors.get(type(e).__name__, 0) + 1
+            latencies.append(time.perf_counter() - started)
+
+    async with aiohttp.ClientSession() as session:
+        started = time.perf_counter()
+        await asyncio.gather(*(worker(session) for _ in range(concurrency)))
+        elapsed = time.perf_counter() - started
+    return latencies, errors, elapsed
+
+def report(latencies, errors, elapsed):
+    latencies = sorted(latencies)
+    def percentile(p):
+        return latencies[min(len(latencies) - 1, int(len(latencies) * p))] * 1000
+    print(f"Requests:   {len(latencies)} in {elapsed:.2f}s ({len(latencies) / elapsed:.1f} updates/s)")
+    print(f"Latency ms: mean {statistics.mean(latencies) * 1000:.1f}, p50 {percentile(0.5):.1f}, "
+          f"p95 {percentile(0.95):.1f}, p99 {percentile(0.99):.1f}, max {latencies[-1] * 1000:.1f}")
+    if errors:
+        print(f"Errors:     {errors}")
+
+async def main():
+    parser = argparse.ArgumentParser(description="POST synthetic Telegram updates to the local webhook server")
+    parser.add_argument("--url", help=f"webhook URL (default: http://127.0.0.1:{WEBHOOK_PORT}<bot path>)")
+    parser.add_argument("--bot", choices=("user", "admin"), default="user")
+    parser.add_argument("--count", type=int, default=1000)
+    parser.add_argument("--concurrency", type=int, default=50)
+    parser.add_argument("--users", type=int, default=100, help="number of distinct synthetic chats")
+    parser.add_argument("--text", default="/start", help="message text of every update")
+    args = parser.parse_args()
+
+    url = args.url or f"http://127.0.0.1:{WEBHOOK_PORT}{WEBHOOK_USER_PATH if args.bot == 'user' else WEBHOOK_ADMIN_PATH}"
+    print(f"POST {args.count} updates to {url} (concurrency {args.concurrency}, {args.users} chats)")
+    latencies, errors, elapsed = await post_updates(url, args.count, args.concurrency, args.users, args.text)
+    report(latencies, errors, elapsed)
+    return 1 if errors else 0
+
+if __name__ == "__main__":
+    sys.exit(asyncio.run(main()))